@@ -11,6 +11,10 @@ import fire
 from metagpt.ext.stanford_town.roles.st_role import STRole
 from metagpt.ext.stanford_town.stanford_town import StanfordTown
 from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
+from metagpt.ext.stanford_town.utils.embedding import (
+    EMBEDDING_CACHE_PATH,
+    init_embedding_service,
+)
 from metagpt.ext.stanford_town.utils.mg_ga_transform import (
     get_reverie_meta,
     write_curr_sim_code,
@@ -21,9 +25,15 @@ from metagpt.logs import logger
 
 
 async def startup(
-    idea: str, fork_sim_code: str, sim_code: str, temp_storage_path: str, investment: float = 30.0, n_round: int = 500
+    idea: str,
+    fork_sim_code: str,
+    sim_code: str,
+    temp_storage_path: str,
+    investment: float = 30.0,
+    n_round: int = 500,
+    headless: bool = False,
 ):
-    town = StanfordTown()
+    town = StanfordTown(headless=headless)
     logger.info("StanfordTown init environment")
 
     # copy `storage/{fork_sim_code}` to `storage/{sim_code}`
@@ -48,9 +58,10 @@ async def startup(
         )
         roles.append(role)
 
-    # init temp_storage
-    write_curr_sim_code({"sim_code": sim_code}, temp_storage_path)
-    write_curr_step({"step": reverie_meta.get("step", 0)}, temp_storage_path)
+    if not headless:
+        # init temp_storage
+        write_curr_sim_code({"sim_code": sim_code}, temp_storage_path)
+        write_curr_step({"step": reverie_meta.get("step", 0)}, temp_storage_path)
 
     await town.hire(roles)
 
@@ -67,6 +78,9 @@ def main(
     temp_storage_path: Optional[str] = None,
     investment: float = 30.0,
     n_round: int = 500,
+    embedding_backend: str = "openai",
+    embedding_cache_path: str = str(EMBEDDING_CACHE_PATH),
+    headless: bool = False,
 ):
     """
     Args:
@@ -76,7 +90,11 @@ def main(
         temp_storage_path: generative_agents temp_storage path inside `environment/frontend_server` to interact.
         investment: the investment of running agents
         n_round: rounds to run agents
+        embedding_backend: `openai`, or `hash` for deterministic local embeddings to run or replay offline
+        embedding_cache_path: sqlite file of the embeddings shared across runs, empty to disable the disk cache
+        headless: run without the frontend, the steps are only logged into `storage/{sim_code}/steps.jsonl`
     """
+    init_embedding_service(backend=embedding_backend, cache_path=embedding_cache_path)
 
     asyncio.run(
         startup(
@@ -86,6 +104,7 @@ def main(
             temp_storage_path=temp_storage_path,
             investment=investment,
             n_round=n_round,
+            headless=headless,
         )
     )
 
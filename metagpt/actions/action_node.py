@@ -8,6 +8,7 @@
 NOTE: You should use typing.List instead of list to do type annotation. Because in the markdown extraction process,
   we can use typing to extract the type of the node, but we cannot use built-in list to extract.
 """
+import asyncio
 import json
 import re
 import typing
@@ -17,6 +18,7 @@ from typing import Any, Dict, List, Optional, Tuple, Type, Union
 from pydantic import BaseModel, Field, create_model, model_validator
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
+from metagpt.actions.action_graph import ActionGraph
 from metagpt.actions.action_outcls_registry import register_action_outcls
 from metagpt.const import USE_CONFIG_TIMEOUT
 from metagpt.llm import BaseLLM
@@ -25,6 +27,7 @@ from metagpt.provider.postprocess.llm_output_postprocess import llm_output_postp
 from metagpt.utils.common import OutputParser, general_after_log
 from metagpt.utils.human_interaction import HumanInteraction
 from metagpt.utils.sanitize import sanitize
+from metagpt.utils.serialize import get_model_json_schema
 
 
 class ReviewMode(Enum):
@@ -130,6 +133,10 @@ def dict_to_markdown(d, prefix="- ", kv_sep="\n", postfix="\n"):
     return markdown_str
 
 
+# model classes created by ActionNode.create_class, keyed by class name and the signature of the node mapping
+_node_class_cache: Dict[Tuple[str, tuple], Type[BaseModel]] = {}
+
+
 class ActionNode:
     """ActionNode is a tree of nodes."""
 
@@ -241,6 +248,23 @@ class ActionNode:
             return self._get_children_mapping(exclude=exclude)
         return {} if exclude and self.key in exclude else self._get_self_mapping()
 
+    def _get_mapping_signature(self, mode="children", exclude=None) -> tuple:
+        """Hashable signature of `get_mapping`, cheap to compute as no pydantic Field is built"""
+        exclude = exclude or []
+
+        def _get_signature(node: "ActionNode") -> tuple:
+            return tuple(
+                (key, _get_signature(child))
+                if child.children
+                else (key, str(child.expected_type), repr(child.example), child.instruction)
+                for key, child in node.children.items()
+                if key not in exclude
+            )
+
+        if mode == "children" or (mode == "auto" and self.children):
+            return _get_signature(self)
+        return () if self.key in exclude else ((self.key, str(self.expected_type)),)
+
     @classmethod
     @register_action_outcls
     def create_model_class(cls, class_name: str, mapping: Dict[str, Tuple[Type, Any]]):
@@ -281,8 +305,12 @@ class ActionNode:
 
     def create_class(self, mode: str = "auto", class_name: str = None, exclude=None):
         class_name = class_name if class_name else f"{self.key}_AN"
-        mapping = self.get_mapping(mode=mode, exclude=exclude)
-        return self.create_model_class(class_name, mapping)
+        # Skip building the mapping if a node of the same structure has created the class
+        signature = (class_name, self._get_mapping_signature(mode=mode, exclude=exclude))
+        if signature not in _node_class_cache:
+            mapping = self.get_mapping(mode=mode, exclude=exclude)
+            _node_class_cache[signature] = self.create_model_class(class_name, mapping)
+        return _node_class_cache[signature]
 
     def _create_children_class(self, exclude=None):
         """使用object内有的字段直接生成model_class"""
@@ -440,7 +468,7 @@ class ActionNode:
 
         if schema == "json":
             parsed_data = llm_output_postprocess(
-                output=content, schema=output_class.model_json_schema(), req_key=f"[/{TAG}]"
+                output=content, schema=get_model_json_schema(output_class), req_key=f"[/{TAG}]"
             )
         else:  # using markdown parser
             parsed_data = OutputParser.parse_data_with_mapping(content, output_data_mapping)
@@ -602,6 +630,11 @@ class ActionNode:
         timeout=USE_CONFIG_TIMEOUT,
         exclude=[],
         function_name: str = None,
+        max_concurrency: int = 4,
+        child_timeout: Optional[float] = None,
+        child_retries: int = 0,
+        graph: Optional[ActionGraph] = None,
+        stream_children: bool = False,
     ):
         """Fill the node(s) with mode.
 
@@ -617,10 +650,15 @@ class ActionNode:
          - root: fill root's node and gather output
         :param strgy: simple/complex
          - simple: run only once
-         - complex: run each node
+         - complex: run each node, see `complex_fill`
         :param images: the list of image url or base64 for gpt4-v
         :param timeout: Timeout for llm invocation.
         :param exclude: The keys of ActionNode to exclude.
+        :param max_concurrency: complex only, max number of children filled at the same time.
+        :param child_timeout: complex only, timeout in seconds of filling one child, no limit if None.
+        :param child_retries: complex only, times to retry a child after it failed or timed out.
+        :param graph: complex only, the children wait for their predecessors in the graph.
+        :param stream_children: complex only, update instruct_content each time a child is filled.
         :return: self
         """
         self.set_llm(llm)
@@ -647,16 +685,112 @@ class ActionNode:
         if strgy == "simple":
             return await self.simple_fill(schema=schema, mode=mode, images=images, timeout=timeout, exclude=exclude)
         elif strgy == "complex":
-            # 这里隐式假设了拥有children
-            tmp = {}
-            for _, i in self.children.items():
-                if exclude and i.key in exclude:
-                    continue
-                child = await i.simple_fill(schema=schema, mode=mode, images=images, timeout=timeout, exclude=exclude)
-                tmp.update(child.instruct_content.model_dump())
-            cls = self._create_children_class()
-            self.instruct_content = cls(**tmp)
-            return self
+            return await self.complex_fill(
+                schema=schema,
+                mode=mode,
+                images=images,
+                timeout=timeout,
+                exclude=exclude,
+                max_concurrency=max_concurrency,
+                child_timeout=child_timeout,
+                child_retries=child_retries,
+                graph=graph,
+                stream_children=stream_children,
+            )
+
+    async def complex_fill(
+        self,
+        schema,
+        mode,
+        images: Optional[Union[str, list[str]]] = None,
+        timeout=USE_CONFIG_TIMEOUT,
+        exclude=None,
+        max_concurrency: int = 4,
+        child_timeout: Optional[float] = None,
+        child_retries: int = 0,
+        graph: Optional[ActionGraph] = None,
+        stream_children: bool = False,
+    ):
+        """Fill the children concurrently, then merge their outputs in the order of `self.children`.
+
+        If `graph` is given, a child starts after its predecessors in the graph are filled, with their outputs
+        appended to its context.
+        """
+        # 这里隐式假设了拥有children
+        exclude = list(exclude or [])
+        children = {key: child for key, child in self.children.items() if key not in exclude}
+        prevs = {key: [] for key in children}
+        for from_key, to_keys in (graph.edges if graph else {}).items():
+            for to_key in to_keys:
+                if from_key in children and to_key in children:
+                    prevs[to_key].append(from_key)
+        self._check_acyclic(prevs)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+        filled: Dict[str, Any] = {}
+
+        async def _fill_child(key: str, child: "ActionNode"):
+            if prevs[key]:
+                await asyncio.gather(*[tasks[k] for k in prevs[key]])
+                prev_outputs = "\n".join(
+                    f"## {k}\n{children[k].instruct_content.model_dump_json()}" for k in prevs[key]
+                )
+                child.set_context(f"{self.context}\n{prev_outputs}")
+            for attempt in range(child_retries + 1):
+                try:
+                    async with semaphore:
+                        await asyncio.wait_for(
+                            child.simple_fill(
+                                schema=schema, mode=mode, images=images, timeout=timeout, exclude=exclude
+                            ),
+                            timeout=child_timeout,
+                        )
+                    break
+                except Exception as e:
+                    if attempt == child_retries:
+                        raise
+                    logger.warning(f"Retry filling {key} ({attempt + 1}/{child_retries}): {e!r}")
+            filled[key] = child.instruct_content.model_dump()
+            if stream_children:
+                partial, pending = {}, []
+                for k in children:
+                    if k in filled:
+                        partial.update(filled[k])
+                    else:
+                        pending.append(k)
+                self.instruct_content = self.create_class(mode="children", exclude=exclude + pending)(**partial)
+
+        tasks.update({key: asyncio.create_task(_fill_child(key, child)) for key, child in children.items()})
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        tmp = {}
+        for key in children:
+            tmp.update(filled[key])
+        cls = self._create_children_class(exclude=exclude)
+        self.instruct_content = cls(**tmp)
+        return self
+
+    @staticmethod
+    def _check_acyclic(prevs: Dict[str, List[str]]):
+        """Raise ValueError if the dependencies `{key: [predecessor keys]}` have a cycle"""
+        in_degree = {key: len(keys) for key, keys in prevs.items()}
+        nexts = {key: [] for key in prevs}
+        for key, keys in prevs.items():
+            for k in keys:
+                nexts[k].append(key)
+        ready = [key for key, degree in in_degree.items() if not degree]
+        for key in ready:
+            for k in nexts[key]:
+                in_degree[k] -= 1
+                if not in_degree[k]:
+                    ready.append(k)
+        if len(ready) != len(prevs):
+            raise ValueError(f"Cyclic dependencies between nodes: {set(prevs) - set(ready)}")
 
     async def human_review(self) -> dict[str, str]:
         review_comments = HumanInteraction().interact_with_instruct_content(
@@ -706,7 +840,7 @@ class ActionNode:
         output_class_name = f"{self.key}_AN_REVIEW"
         output_class = self.create_class(class_name=output_class_name, exclude=exclude_keys)
         parsed_data = llm_output_postprocess(
-            output=content, schema=output_class.model_json_schema(), req_key=f"[/{TAG}]"
+            output=content, schema=get_model_json_schema(output_class), req_key=f"[/{TAG}]"
         )
         instruct_content = output_class(**parsed_data)
         return instruct_content.model_dump()
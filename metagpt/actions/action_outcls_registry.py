@@ -4,10 +4,35 @@
 #           with same class name and mapping
 
 from functools import wraps
+from typing import Hashable
+
+from pydantic.fields import FieldInfo
 
 action_outcls_registry = dict()
 
 
+def _normalize_type(tp) -> str:
+    # eliminate typing influence
+    return str(tp).replace("typing.List", "list").replace("typing.Dict", "dict")
+
+
+def _normalize(item) -> Hashable:
+    """
+    Structural signature of an argument of `create_model_class`, mappings are compared regardless of the field order
+        {'field': (list[str], FieldInfo(default='x', description='y'))} -> (('field', ('list[str]', "'x'", 'y')),)
+    """
+    if isinstance(item, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in item.items()))
+    if isinstance(item, tuple) and len(item) == 2:
+        type_v, field_v = item
+        if isinstance(field_v, FieldInfo):
+            field_v = (repr(field_v.default), field_v.description)
+        else:
+            field_v = repr(field_v)
+        return _normalize_type(type_v), field_v
+    return _normalize_type(item)
+
+
 def register_action_outcls(func):
     """
     Due to `create_model` return different Class even they have same class name and mapping.
@@ -23,14 +48,9 @@ def register_action_outcls(func):
         arr = list(args) + list(kwargs.values())
         """
         outcls_id example
-            "<class 'metagpt.actions.action_node.ActionNode'>_test_{'field': (str, Ellipsis)}"
+            ("<class 'metagpt.actions.action_node.ActionNode'>", 'test', (('field', ("<class 'str'>", 'Ellipsis')),))
         """
-        for idx, item in enumerate(arr):
-            if isinstance(item, dict):
-                arr[idx] = dict(sorted(item.items()))
-        outcls_id = "_".join([str(i) for i in arr])
-        # eliminate typing influence
-        outcls_id = outcls_id.replace("typing.List", "list").replace("typing.Dict", "dict")
+        outcls_id = tuple(_normalize(i) for i in arr)
 
         if outcls_id in action_outcls_registry:
             return action_outcls_registry[outcls_id]
@@ -8,14 +8,17 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import json
 import re
-from typing import Literal, Tuple
+import tempfile
+from typing import IO, AsyncGenerator, Callable, Literal, Optional, Tuple
 
 import nbformat
 from nbclient import NotebookClient
 from nbclient.exceptions import CellTimeoutError, DeadKernelError
 from nbformat import NotebookNode
 from nbformat.v4 import new_code_cell, new_markdown_cell, new_output
+from pydantic import Field, PrivateAttr
 from rich.box import MINIMAL
 from rich.console import Console, Group
 from rich.live import Live
@@ -24,40 +27,97 @@ from rich.panel import Panel
 from rich.syntax import Syntax
 
 from metagpt.actions import Action
+from metagpt.actions.di.kernel_pool import PooledKernel, get_kernel_pool
 from metagpt.logs import logger
 
+SPILL_SUMMARY_LEN = 200
+
+
+class StreamNotebookClient(NotebookClient):
+    """NotebookClient passing the text of the stream outputs to `on_stream` as they arrive"""
+
+    on_stream: Optional[Callable[[str], None]] = None
+
+    def output(self, outs, msg, display_id, cell_index):
+        if self.on_stream is not None and msg["msg_type"] == "stream":
+            self.on_stream(msg["content"]["text"])
+        return super().output(outs, msg, display_id, cell_index)
+
 
 class ExecuteNbCode(Action):
-    """execute notebook code block, return result to llm, and display it."""
+    """execute notebook code block, return result to llm, and display it.
+
+    In headless mode the code and figures are neither rendered nor decoded. The outputs of the code cells older than
+    the last `max_cells_in_memory` ones are spilled to a temporary file in `spill_dir`, only a summary is kept in `nb`;
+    `full_notebook` loads them back.
+    """
 
     nb: NotebookNode
     nb_client: NotebookClient
     console: Console
     interaction: str
     timeout: int = 600
+    use_kernel_pool: bool = True
+    kernel: Optional[PooledKernel] = Field(default=None, exclude=True)
+    headless: bool = False
+    max_cells_in_memory: Optional[int] = 20
+    spill_dir: Optional[str] = None
+    last_result: Optional[Tuple[str, bool]] = Field(default=None, exclude=True)
+    _spill_file: Optional[IO[bytes]] = PrivateAttr(None)
 
     def __init__(
         self,
-        nb=nbformat.v4.new_notebook(),
+        nb=None,
         timeout=600,
+        use_kernel_pool=True,
+        headless=False,
+        max_cells_in_memory=20,
+        spill_dir=None,
     ):
+        nb = nbformat.v4.new_notebook() if nb is None else nb
         super().__init__(
             nb=nb,
-            nb_client=NotebookClient(nb, timeout=timeout),
+            nb_client=StreamNotebookClient(nb, timeout=timeout),
             timeout=timeout,
             console=Console(),
             interaction=("ipython" if self.is_ipython() else "terminal"),
+            use_kernel_pool=use_kernel_pool,
+            headless=headless,
+            max_cells_in_memory=max_cells_in_memory,
+            spill_dir=spill_dir,
         )
 
     async def build(self):
-        if self.nb_client.kc is None or not await self.nb_client.kc.is_alive():
+        if self.use_kernel_pool:
+            await self._lease_kernel()
+        elif self.nb_client.kc is None or not await self.nb_client.kc.is_alive():
             self.nb_client.create_kernel_manager()
             self.nb_client.start_new_kernel()
             self.nb_client.start_new_kernel_client()
 
+    async def _lease_kernel(self):
+        """lease a warm kernel from the kernel pool, killed and replaced if found dead"""
+        pool = get_kernel_pool()
+        if self.kernel is not None and self.nb_client.kc is not self.kernel.kc:
+            # the notebook client was replaced, the new one starts from a clean kernel
+            await pool.release(self.kernel)
+            self.kernel = None
+        elif self.kernel is not None and not await self.kernel.is_alive():
+            await pool.discard(self.kernel)
+            self.kernel = None
+        if self.kernel is None:
+            self.kernel = await pool.acquire()
+            self.nb_client.km, self.nb_client.kc = self.kernel.km, self.kernel.kc
+
     async def terminate(self):
         """kill NotebookClient"""
-        if self.nb_client.km is not None and await self.nb_client.km.is_alive():
+        if self.kernel is not None:
+            # return the kernel to the pool, reset for the next lease
+            kernel, self.kernel = self.kernel, None
+            self.nb_client.kc = None
+            self.nb_client.km = None
+            await get_kernel_pool().release(kernel)
+        elif self.nb_client.km is not None and await self.nb_client.km.is_alive():
             await self.nb_client.km.shutdown_kernel(now=True)
             await self.nb_client.km.cleanup_resources()
 
@@ -79,10 +139,10 @@ class ExecuteNbCode(Action):
         """reset NotebookClient"""
         await self.terminate()
 
-        # sleep 1s to wait for the kernel to be cleaned up completely
-        await asyncio.sleep(1)
-        await self.build()
-        self.nb_client = NotebookClient(self.nb, timeout=self.timeout)
+        if not self.use_kernel_pool:
+            # sleep 1s to wait for the kernel to be cleaned up completely
+            await asyncio.sleep(1)
+        self.nb_client = StreamNotebookClient(self.nb, timeout=self.timeout)
 
     def add_code_cell(self, code: str):
         self.nb.cells.append(new_code_cell(source=code))
@@ -91,6 +151,8 @@ class ExecuteNbCode(Action):
         self.nb.cells.append(new_markdown_cell(source=markdown))
 
     def _display(self, code: str, language: Literal["python", "markdown"] = "python"):
+        if self.headless:
+            return
         if language == "python":
             code = Syntax(code, "python", theme="paraiso-dark", line_numbers=True)
             self.console.print(code)
@@ -118,6 +180,8 @@ class ExecuteNbCode(Action):
             ):
                 output_text = output["text"]
             elif output["output_type"] == "display_data":
+                if self.headless:
+                    continue
                 if "image/png" in output["data"]:
                     self.show_bytes_figure(output["data"]["image/png"], self.interaction)
                 else:
@@ -182,14 +246,24 @@ class ExecuteNbCode(Action):
             error_msg = "Cell execution timed out: Execution exceeded the time limit and was stopped; consider optimizing your code for better performance."
             return False, error_msg
         except DeadKernelError:
+            if self.kernel is not None:
+                # kill and replace the kernel, e.g., killed for exceeding the CPU time limit of its lease
+                await get_kernel_pool().discard(self.kernel)
+                self.kernel = None
             await self.reset()
             return False, "DeadKernelError"
         except Exception:
             return self.parse_outputs(self.nb.cells[-1].outputs)
 
-    async def run(self, code: str, language: Literal["python", "markdown"] = "python") -> Tuple[str, bool]:
+    async def run(
+        self,
+        code: str,
+        language: Literal["python", "markdown"] = "python",
+        on_stream: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, bool]:
         """
         return the output of code execution, and a success indicator (bool) of code execution.
+        `on_stream` is called with the stdout and stderr text of the cell as it is printed.
         """
         self._display(code, language)
 
@@ -202,7 +276,14 @@ class ExecuteNbCode(Action):
 
             # run code
             cell_index = len(self.nb.cells) - 1
-            success, outputs = await self.run_cell(self.nb.cells[-1], cell_index)
+            if isinstance(self.nb_client, StreamNotebookClient):
+                self.nb_client.on_stream = on_stream
+            try:
+                success, outputs = await self.run_cell(self.nb.cells[-1], cell_index)
+            finally:
+                if isinstance(self.nb_client, StreamNotebookClient):
+                    self.nb_client.on_stream = None
+            self.spill_outputs()
 
             if "!pip" in code:
                 success = False
@@ -217,6 +298,65 @@ class ExecuteNbCode(Action):
         else:
             raise ValueError(f"Only support for language: python, markdown, but got {language}, ")
 
+    async def run_stream(self, code: str) -> AsyncGenerator[str, None]:
+        """
+        yield the stdout and stderr text of the python code as it is printed. Closing the generator early, e.g., with
+        `contextlib.aclosing`, interrupts the cell to cut off a runaway output. The output of the code execution and
+        its success indicator are in `last_result` once the generator is exhausted or closed.
+        """
+        queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        task = asyncio.create_task(self.run(code, on_stream=queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+        finally:
+            if not task.done() and self.nb_client.km is not None:
+                await self.nb_client.km.interrupt_kernel()
+            self.last_result = await task
+
+    def spill_outputs(self):
+        """spill the outputs of the code cells older than the last `max_cells_in_memory` ones, keep a summary"""
+        if self.max_cells_in_memory is None:
+            return
+        code_cells = [cell for cell in self.nb.cells if cell.cell_type == "code"]
+        for cell in code_cells[: len(code_cells) - self.max_cells_in_memory]:
+            if not cell.get("outputs") or "spilled_outputs" in cell.metadata:
+                continue
+            if self._spill_file is None:
+                self._spill_file = tempfile.TemporaryFile(dir=self.spill_dir, prefix="metagpt_nb_", suffix=".jsonl")
+            offset = self._spill_file.seek(0, 2)
+            self._spill_file.write(json.dumps(cell.outputs, ensure_ascii=False).encode("utf-8") + b"\n")
+            summary = summarize_outputs(cell.outputs)
+            cell.metadata["spilled_outputs"] = offset
+            cell.outputs = [new_output(output_type="stream", name="stdout", text=summary)]
+
+    def full_notebook(self) -> NotebookNode:
+        """return a copy of the notebook with the spilled outputs loaded back"""
+        nb = nbformat.from_dict(json.loads(json.dumps(self.nb)))
+        for cell in nb.cells:
+            offset = cell.metadata.pop("spilled_outputs", None)
+            if offset is None or self._spill_file is None:
+                continue
+            self._spill_file.seek(offset)
+            cell.outputs = nbformat.from_dict(json.loads(self._spill_file.readline()))
+        return nb
+
+
+def summarize_outputs(outputs: list, max_len: int = SPILL_SUMMARY_LEN) -> str:
+    """the leading text of the cell outputs, images and other rich data left out"""
+    texts = []
+    for output in outputs:
+        if output["output_type"] == "stream":
+            texts.append(output["text"])
+        elif output["output_type"] == "execute_result":
+            texts.append(output["data"].get("text/plain", ""))
+        elif output["output_type"] == "error":
+            texts.append(f"{output['ename']}: {output['evalue']}")
+    text = remove_escape_and_color_codes("".join(texts))
+    text = text[:max_len] + "..." if len(text) > max_len else text
+    return f"[{len(outputs)} outputs spilled to disk] {text}"
+
 
 def remove_escape_and_color_codes(input_str: str):
     # 使用正则表达式去除jupyter notebook输出结果中的转义字符和颜色代码
@@ -0,0 +1,337 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    :   kernel_pool.py
+@Desc    :   Warm pool of Jupyter kernels leased by ExecuteNbCode, instead of one kernel started per executor.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import statistics
+import time
+from collections import deque
+from typing import Optional, Sequence
+
+from jupyter_client import AsyncKernelManager
+
+from metagpt.logs import logger
+
+DEFAULT_PRELOAD_IMPORTS = ("numpy", "pandas", "sklearn")
+
+# imported without binding a name, so the kernels start with the modules loaded but an empty namespace
+_PRELOAD_CODE = """
+for __module in {modules!r}:
+    try:
+        __import__(__module)
+    except Exception:
+        pass
+del __module
+"""
+
+_RESET_CODE = """
+get_ipython().run_line_magic("reset", "-f")
+import gc as __gc, os as __os, sys as __sys
+__os.chdir({cwd!r})
+if "matplotlib.pyplot" in __sys.modules:
+    __sys.modules["matplotlib.pyplot"].close("all")
+__gc.collect()
+del __gc, __os, __sys
+"""
+
+# the soft limits are set on top of the usage at lease time, the hard ones are kept so the next lease can raise them
+_LIMITS_CODE = """
+def __set_limits(memory_limit, time_limit):
+    import os, resource, time
+
+    def set_limit(kind, used, limit):
+        hard = resource.getrlimit(kind)[1]
+        soft = used + limit if hard == resource.RLIM_INFINITY else min(used + limit, hard)
+        resource.setrlimit(kind, (soft, hard))
+
+    if memory_limit:
+        with open("/proc/self/statm") as f:
+            set_limit(resource.RLIMIT_AS, int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE"), memory_limit)
+    if time_limit:
+        set_limit(resource.RLIMIT_CPU, int(time.process_time()) + 1, time_limit)
+
+try:
+    __set_limits({memory_limit!r}, {time_limit!r})
+except Exception:  # no /proc nor resource module, e.g., on Windows, the kernel runs without limits
+    pass
+del __set_limits
+"""
+
+
+class PooledKernel:
+    """A kernel manager and its client, started by the pool in the event loop they are bound to"""
+
+    def __init__(self, km: AsyncKernelManager, kc, loop: asyncio.AbstractEventLoop, start_latency: float):
+        self.km = km
+        self.kc = kc
+        self.loop = loop
+        self.start_latency = start_latency
+        self.n_leases = 0
+
+    async def is_alive(self) -> bool:
+        try:
+            return await self.km.is_alive()
+        except Exception:
+            return False
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        process = getattr(self.km.provisioner, "process", None)
+        return process.poll() if process is not None else None
+
+    async def execute(self, code: str, timeout: float) -> bool:
+        """Run the code silently, return whether it succeeded, raise `TimeoutError` if no reply came in time"""
+        reply = await self.kc.execute_interactive(
+            code, silent=True, store_history=False, allow_stdin=False, timeout=timeout, output_hook=lambda msg: None
+        )
+        return reply["content"]["status"] == "ok"
+
+    async def shutdown(self):
+        try:
+            if await self.is_alive():
+                await self.km.shutdown_kernel(now=True)
+            else:
+                await self.km.cleanup_resources()
+        except Exception as e:
+            logger.warning(f"Failed to shut down the kernel: {e}")
+            self.kill()
+        finally:
+            self.kc.stop_channels()
+
+    def kill(self):
+        """Kill the kernel process without the event loop, e.g., at exit or once the loop is closed"""
+        process = getattr(self.km.provisioner, "process", None)
+        try:
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait(timeout=5)
+            self.kc.stop_channels()
+            self.km.cleanup_connection_file()
+        except Exception:
+            pass
+
+
+class KernelPool:
+    """
+    Pool of Jupyter kernels started ahead of the executors asking for one, keeping `min_idle` of them warm with the
+    `preload_imports` modules loaded. A lease returned to the pool has its namespace reset with `%reset -f` instead of
+    a restart of the kernel; a kernel found dead, failing its reset or leased `max_leases_per_kernel` times is shut
+    down and replaced. Each lease may allocate `memory_limit` MB of address space and spend `time_limit` seconds of CPU
+    on top of what the kernel used before, past which the allocation fails or the kernel is killed.
+    The kernels are bound to the event loop they were started in, the pool starts new ones in a new loop.
+    """
+
+    def __init__(
+        self,
+        min_idle: int = 1,
+        max_idle: int = 4,
+        preload_imports: Sequence[str] = DEFAULT_PRELOAD_IMPORTS,
+        memory_limit: Optional[int] = None,
+        time_limit: Optional[int] = None,
+        max_leases_per_kernel: int = 20,
+        kernel_name: str = "",
+        startup_timeout: float = 60,
+        reset_timeout: float = 10,
+    ):
+        self.min_idle = min_idle
+        self.max_idle = max(max_idle, min_idle)
+        self.preload_imports = tuple(preload_imports)
+        self.memory_limit = memory_limit
+        self.time_limit = time_limit
+        self.max_leases_per_kernel = max_leases_per_kernel
+        self.kernel_name = kernel_name
+        self.startup_timeout = startup_timeout
+        self.reset_timeout = reset_timeout
+        self.cwd = os.getcwd()
+        self._idle: list[PooledKernel] = []
+        self._leased: set[PooledKernel] = set()
+        self._warming: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.start_latencies: deque[float] = deque(maxlen=100)
+        self.starts = 0
+        self.leases = 0
+        self.warm_hits = 0
+        self.resets = 0
+        self.replacements = 0
+
+    async def acquire(self) -> PooledKernel:
+        """Lease a kernel, warm if one is idle or being started, a new one otherwise"""
+        self._bind_loop()
+        kernel = None
+        while kernel is None:
+            while self._idle and kernel is None:
+                candidate = self._idle.pop()
+                if await candidate.is_alive():
+                    kernel = candidate
+                else:
+                    await self._replace(candidate)
+            if kernel is not None:
+                self.warm_hits += 1
+            elif self._warming:
+                await asyncio.wait(set(self._warming), return_when=asyncio.FIRST_COMPLETED)
+            else:
+                kernel = await self._start_kernel()
+
+        self._leased.add(kernel)
+        kernel.n_leases += 1
+        self.leases += 1
+        self._fill()
+        if self.memory_limit or self.time_limit:
+            memory_limit = self.memory_limit * 1024 * 1024 if self.memory_limit else None
+            code = _LIMITS_CODE.format(memory_limit=memory_limit, time_limit=self.time_limit)
+            await kernel.execute(code, self.reset_timeout)
+        return kernel
+
+    async def release(self, kernel: PooledKernel):
+        """Return a leased kernel, reset for the next lease, or replaced if it can not be"""
+        self._leased.discard(kernel)
+        if kernel.loop is not asyncio.get_running_loop():
+            kernel.kill()
+            return
+        if len(self._idle) >= self.max_idle:
+            await kernel.shutdown()
+            return
+        if kernel.n_leases >= self.max_leases_per_kernel or not await kernel.is_alive():
+            await self._replace(kernel)
+            return
+
+        try:
+            # a kernel still busy, e.g., with a cell timed out, does not reply in time and is replaced
+            ok = await kernel.execute(_RESET_CODE.format(cwd=self.cwd), self.reset_timeout)
+        except Exception as e:
+            logger.warning(f"Failed to reset the kernel, replacing it: {e}")
+            ok = False
+        if not ok:
+            await self._replace(kernel)
+            return
+        self.resets += 1
+        self._idle.append(kernel)
+
+    async def discard(self, kernel: PooledKernel):
+        """Kill a leased kernel, e.g., dead or stuck, a new one is warmed in its place"""
+        self._leased.discard(kernel)
+        if kernel.loop is not asyncio.get_running_loop():
+            kernel.kill()
+            return
+        await self._replace(kernel)
+
+    async def _replace(self, kernel: PooledKernel):
+        exit_code = kernel.exit_code
+        if exit_code is not None:
+            logger.warning(f"The kernel exited with code {exit_code}, replacing it")
+        self.replacements += 1
+        await kernel.shutdown()
+        self._fill()
+
+    async def _start_kernel(self) -> PooledKernel:
+        start = time.perf_counter()
+        km = AsyncKernelManager(kernel_name=self.kernel_name) if self.kernel_name else AsyncKernelManager()
+        await km.start_kernel(cwd=self.cwd)
+        kc = km.client()
+        kernel = PooledKernel(km, kc, asyncio.get_running_loop(), 0.0)
+        try:
+            kc.start_channels()
+            await kc.wait_for_ready(timeout=self.startup_timeout)
+            kc.allow_stdin = False
+            if self.preload_imports:
+                await kernel.execute(_PRELOAD_CODE.format(modules=self.preload_imports), self.startup_timeout)
+        except BaseException:
+            kernel.kill()
+            raise
+        kernel.start_latency = time.perf_counter() - start
+        self.start_latencies.append(kernel.start_latency)
+        self.starts += 1
+        return kernel
+
+    async def _warm(self):
+        try:
+            kernel = await self._start_kernel()
+        except Exception as e:
+            logger.warning(f"Failed to warm up a kernel: {e}")
+            return
+        if kernel.loop is self._loop:
+            self._idle.append(kernel)
+        else:
+            kernel.kill()
+
+    def _fill(self):
+        """Warm kernels in the background until `min_idle` of them are idle or being started"""
+        while len(self._idle) + len(self._warming) < self.min_idle:
+            task = asyncio.create_task(self._warm())
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # the idle kernels of the previous event loop can not be used any more
+        for kernel in self._idle:
+            kernel.kill()
+        self._idle = []
+        self._warming = set()
+        self._loop = loop
+
+    def stats(self) -> dict:
+        """Return the pool usage metrics, the kernel start latency in seconds"""
+        n_kernels = len(self._idle) + len(self._leased)
+        latencies = self.start_latencies or [0.0]
+        return {
+            "idle": len(self._idle),
+            "leased": len(self._leased),
+            "warming": len(self._warming),
+            "utilization": len(self._leased) / n_kernels if n_kernels else 0.0,
+            "starts": self.starts,
+            "start_latency_mean": statistics.fmean(latencies),
+            "start_latency_max": max(latencies),
+            "leases": self.leases,
+            "warm_hits": self.warm_hits,
+            "resets": self.resets,
+            "replacements": self.replacements,
+        }
+
+    async def aclose(self):
+        """Shut the idle kernels down, the leased ones are shut down when returned"""
+        logger.debug(f"Kernel pool: {self.stats()}")
+        tasks = list(self._warming)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        for kernel in idle:
+            if kernel.loop is asyncio.get_running_loop():
+                await kernel.shutdown()
+            else:
+                kernel.kill()
+
+    def close(self):
+        for kernel in [*self._idle, *self._leased]:
+            kernel.kill()
+        self._idle = []
+        self._leased = set()
+        self._loop = None
+
+
+_kernel_pool: Optional[KernelPool] = None
+
+
+def get_kernel_pool() -> KernelPool:
+    """The kernel pool shared by the executors"""
+    global _kernel_pool
+    if _kernel_pool is None:
+        _kernel_pool = KernelPool()
+        atexit.register(_kernel_pool.close)
+    return _kernel_pool
+
+
+def set_kernel_pool(pool: KernelPool):
+    global _kernel_pool
+    if _kernel_pool is not None and _kernel_pool is not pool:
+        _kernel_pool.close()
+    _kernel_pool = pool
+    atexit.register(pool.close)
@@ -5,7 +5,7 @@ from __future__ import annotations
 import asyncio
 from typing import Any, Callable, Optional, Union
 
-from pydantic import TypeAdapter, model_validator
+from pydantic import PrivateAttr, TypeAdapter, model_validator
 
 from metagpt.actions import Action
 from metagpt.config2 import config
@@ -180,13 +180,24 @@ class CollectLinks(Action):
 
 
 class WebBrowseAndSummarize(Action):
-    """Action class to explore the web and provide summaries of articles and webpages."""
+    """Action class to explore the web and provide summaries of articles and webpages.
+
+    The pages are summarized map-reduce style: each page is summarized as soon as it is loaded, while the others are
+    still loading, its chunks concurrently, and the summaries of its chunks are reduced level by level until they fit
+    in one prompt. At most `max_concurrency` LLM calls of the action run at the same time, the concurrent runs of the
+    action included. A page is pruned once `prune_after` of its chunks are not relevant while none is.
+    """
 
     name: str = "WebBrowseAndSummarize"
     i_context: Optional[str] = None
     desc: str = "Explore the web and provide summaries of articles and webpages."
     browse_func: Union[Callable[[list[str]], None], None] = None
     web_browser_engine: Optional[WebBrowserEngine] = None
+    max_concurrency: int = 8
+    prune_after: Optional[int] = 3
+
+    _semaphore: Optional[asyncio.Semaphore] = PrivateAttr(None)
+    _semaphore_loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(None)
 
     @model_validator(mode="after")
     def validate_engine_and_run_func(self):
@@ -216,35 +227,62 @@ class WebBrowseAndSummarize(Action):
         Returns:
             A dictionary containing the URLs as keys and their summaries as values.
         """
-        contents = await self.web_browser_engine.run(url, *urls)
-        if not urls:
-            contents = [contents]
-
-        summaries = {}
         prompt_template = WEB_BROWSE_AND_SUMMARIZE_PROMPT.format(query=query, content="{}")
-        for u, content in zip([url, *urls], contents):
-            content = content.inner_text
-            chunk_summaries = []
-            for prompt in generate_prompt_chunk(content, prompt_template, self.llm.model, system_text, 4096):
+        urls = [url, *urls]
+        summaries = await asyncio.gather(*(self._browse_and_summarize(u, prompt_template, system_text) for u in urls))
+        return dict(zip(urls, summaries))
+
+    async def _browse_and_summarize(self, url: str, prompt_template: str, system_text: str) -> Optional[str]:
+        page = await self.web_browser_engine.run(url)
+        prompts = generate_prompt_chunk(page.inner_text, prompt_template, self.llm.model, system_text, 4096)
+        chunk_summaries = await self._summarize_chunks(list(prompts), system_text, prune=True)
+        return await self._reduce(chunk_summaries, prompt_template, system_text)
+
+    async def _summarize_chunks(self, prompts: list[str], system_text: str, prune: bool = False) -> list[str]:
+        """The summaries of the chunks in order, the ones not relevant left out"""
+        summaries = [None] * len(prompts)
+        n_relevant = n_irrelevant = 0
+
+        async def summarize(i: int, prompt: str):
+            nonlocal n_relevant, n_irrelevant
+            async with self._get_semaphore():
+                if prune and self.prune_after and n_relevant == 0 and n_irrelevant >= self.prune_after:
+                    return
                 logger.debug(prompt)
                 summary = await self._aask(prompt, [system_text])
-                if summary == "Not relevant.":
-                    continue
-                chunk_summaries.append(summary)
-
-            if not chunk_summaries:
-                summaries[u] = None
-                continue
-
-            if len(chunk_summaries) == 1:
-                summaries[u] = chunk_summaries[0]
-                continue
-
-            content = "\n".join(chunk_summaries)
-            prompt = WEB_BROWSE_AND_SUMMARIZE_PROMPT.format(query=query, content=content)
-            summary = await self._aask(prompt, [system_text])
-            summaries[u] = summary
-        return summaries
+            if summary == "Not relevant.":
+                n_irrelevant += 1
+            else:
+                n_relevant += 1
+                summaries[i] = summary
+
+        await asyncio.gather(*(summarize(i, prompt) for i, prompt in enumerate(prompts)))
+        return [i for i in summaries if i is not None]
+
+    async def _reduce(self, summaries: list[str], prompt_template: str, system_text: str) -> Optional[str]:
+        """Reduce the summaries of the chunks to one, summarizing them by prompt-sized groups until they fit in one"""
+        n_prompts = None
+        while len(summaries) > 1:
+            prompts = list(
+                generate_prompt_chunk("\n".join(summaries), prompt_template, self.llm.model, system_text, 4096)
+            )
+            if len(prompts) == 1 or (n_prompts is not None and len(prompts) >= n_prompts):
+                if len(prompts) > 1:  # the summaries are no shorter than what they summarize
+                    logger.warning(
+                        f"Summaries still exceed one prompt after reduction, keep the first of {len(prompts)}"
+                    )
+                async with self._get_semaphore():
+                    return await self._aask(prompts[0], [system_text])
+            n_prompts = len(prompts)
+            summaries = await self._summarize_chunks(prompts, system_text)
+        return summaries[0] if summaries else None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
 
 
 class ConductResearch(Action):
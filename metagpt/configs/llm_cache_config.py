@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : llm_cache_config.py
+"""
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+
+from metagpt.configs.redis_config import RedisConfig
+from metagpt.const import CONFIG_ROOT
+from metagpt.utils.yaml_model import YamlModel
+
+
+class LLMCacheBackend(Enum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+    REDIS = "redis"
+
+
+class LLMCacheConfig(YamlModel):
+    """Config for the LLM response cache
+
+    Examples:
+    ---------
+    llm:
+      ...
+      cache:
+        backend: "sqlite"
+        ttl: 86400
+    """
+
+    backend: LLMCacheBackend = LLMCacheBackend.MEMORY
+    ttl: int = 0  # seconds, 0 means never expire
+    max_size: int = 1024  # max number of responses of the memory backend
+    path: Path = CONFIG_ROOT / "llm_cache.sqlite3"  # database file of the sqlite backend
+    redis: Optional[RedisConfig] = None  # server of the redis backend
@@ -11,6 +11,7 @@ from typing import Optional
 
 from pydantic import field_validator
 
+from metagpt.configs.llm_cache_config import LLMCacheConfig
 from metagpt.const import CONFIG_ROOT, LLM_API_TIMEOUT, METAGPT_ROOT
 from metagpt.utils.yaml_model import YamlModel
 
@@ -100,6 +101,9 @@ class LLMConfig(YamlModel):
     # For Messages Control
     use_system_prompt: bool = True
 
+    # Response cache, disabled if not set
+    cache: Optional[LLMCacheConfig] = None
+
     @field_validator("api_key")
     @classmethod
     def check_llm_key(cls, v):
@@ -88,16 +88,14 @@ class Context(BaseModel):
             return self.cost_manager
 
     def llm(self) -> BaseLLM:
-        """Return a LLM instance, fixme: support cache"""
-        # if self._llm is None:
+        """Return a LLM instance, its SDK client is shared with other instances through `LLM_CLIENT_POOL`"""
         self._llm = create_llm_instance(self.config.llm)
         if self._llm.cost_manager is None:
             self._llm.cost_manager = self._select_costmanager(self.config.llm)
         return self._llm
 
     def llm_with_cost_manager_from_llm_config(self, llm_config: LLMConfig) -> BaseLLM:
-        """Return a LLM instance, fixme: support cache"""
-        # if self._llm is None:
+        """Return a LLM instance, its SDK client is shared with other instances through `LLM_CLIENT_POOL`"""
         llm = create_llm_instance(llm_config)
         if llm.cost_manager is None:
             llm.cost_manager = self._select_costmanager(llm_config)
@@ -4,13 +4,24 @@
 
 import asyncio
 from abc import abstractmethod
+from collections import deque
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Set, Union
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, Optional, Set, Union
 
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
-from pydantic import BaseModel, ConfigDict, Field, SerializeAsAny, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    SerializeAsAny,
+    computed_field,
+    model_validator,
+)
 
+from metagpt.const import MESSAGE_ROUTE_TO_ALL
 from metagpt.context import Context
 from metagpt.environment.api.env_api import (
     EnvAPIAbstract,
@@ -20,7 +31,7 @@ from metagpt.environment.api.env_api import (
 from metagpt.environment.base_env_space import BaseEnvAction, BaseEnvObsParams
 from metagpt.logs import logger
 from metagpt.schema import Message
-from metagpt.utils.common import get_function_schema, is_coroutine_func, is_send_to
+from metagpt.utils.common import get_function_schema, is_coroutine_func
 
 if TYPE_CHECKING:
     from metagpt.roles.role import Role  # noqa: F401
@@ -131,9 +142,13 @@ class Environment(ExtEnv):
     desc: str = Field(default="")  # 环境描述
     roles: dict[str, SerializeAsAny["Role"]] = Field(default_factory=dict, validate_default=True)
     member_addrs: Dict["Role", Set] = Field(default_factory=dict, exclude=True)
-    history: str = ""  # For debug
+    history_size: int = 1000  # The number of latest messages kept in `history` for debug, 0 to disable it
+    history_file: Optional[Path] = None  # Append every published message to this file if set
     context: Context = Field(default_factory=Context, exclude=True)
 
+    _routes: Dict[str, Dict["Role", None]] = PrivateAttr(default_factory=dict)  # address -> subscribed roles
+    _history: Deque[str] = PrivateAttr(default_factory=deque)
+
     def reset(
         self,
         *,
@@ -148,11 +163,28 @@ class Environment(ExtEnv):
     def step(self, action: BaseEnvAction) -> tuple[dict[str, Any], float, bool, bool, dict[str, Any]]:
         pass
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def init_history(cls, data: Any, handler) -> "Environment":
+        history = ""
+        if isinstance(data, dict) and "history" in data:
+            data = dict(data)
+            history = data.pop("history") or ""
+        env = handler(data)
+        env._history = deque([history.removeprefix("\n")] if history else [], maxlen=env.history_size or None)
+        return env
+
     @model_validator(mode="after")
     def init_roles(self):
         self.add_roles(self.roles.values())
         return self
 
+    @computed_field
+    @property
+    def history(self) -> str:
+        """The latest `history_size` published messages, for debug."""
+        return "".join(f"\n{i}" for i in self._history)
+
     def add_role(self, role: "Role"):
         """增加一个在当前环境的角色
         Add a role in the current environment
@@ -182,18 +214,33 @@ class Environment(ExtEnv):
         in RFC 113.
         """
         logger.debug(f"publish_message: {message.dump()}")
-        found = False
         # According to the routing feature plan in Chapter 2.2.3.2 of RFC 113
-        for role, addrs in self.member_addrs.items():
-            if is_send_to(message, addrs):
-                role.put_message(message)
-                found = True
-        if not found:
+        if MESSAGE_ROUTE_TO_ALL in message.send_to:
+            recipients = self.member_addrs.keys()
+        else:
+            recipients = {}
+            for addr in message.send_to:
+                recipients.update(self._routes.get(addr, {}))
+        for role in recipients:
+            role.put_message(message)
+        if not recipients:
             logger.warning(f"Message no recipients: {message.dump()}")
-        self.history += f"\n{message}"  # For debug
+        self._record_history(message)
 
         return True
 
+    def _record_history(self, message: Message):
+        """For debug"""
+        if not self.history_size and not self.history_file:
+            return
+        record = str(message)
+        if self.history_size:
+            self._history.append(record)
+        if self.history_file:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.history_file, "a", encoding="utf-8") as writer:
+                writer.write(f"{record}\n")
+
     async def run(self, k=1):
         """处理一次所有信息的运行
         Process all Role runs at once
@@ -235,8 +282,15 @@ class Environment(ExtEnv):
         return self.member_addrs.get(obj, {})
 
     def set_addresses(self, obj, addresses):
-        """Set the addresses of the object"""
+        """Set the addresses of the object, and update the address -> roles routing table used by `publish_message`"""
+        for addr in self.member_addrs.get(obj, set()):
+            subscribers = self._routes.get(addr, {})
+            subscribers.pop(obj, None)
+            if not subscribers:
+                self._routes.pop(addr, None)
         self.member_addrs[obj] = addresses
+        for addr in addresses:
+            self._routes.setdefault(addr, {})[obj] = None
 
     def archive(self, auto_archive=True):
         if auto_archive and self.context.git_repo:
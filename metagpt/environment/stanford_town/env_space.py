@@ -45,6 +45,7 @@ class EnvAction(BaseEnvAction):
     def check_coord(cls, coord) -> npt.NDArray[np.int64]:
         if not isinstance(coord, np.ndarray):
             return np.array(coord)
+        return coord
 
 
 class EnvObsType(BaseEnvObsType):
@@ -55,6 +56,8 @@ class EnvObsType(BaseEnvObsType):
     GET_TITLE = 1  # get the tile detail dictionary with given tile coord
     TILE_PATH = 2  # get the tile address with given tile coord
     TILE_NBR = 3  # get the neighbors of given tile coord and its vision radius
+    SHORTEST_PATH = 4  # get the shortest path from given tile coord to the target tile coord
+    PERCEIVE = 5  # get the spaces and the closest events within the vision radius of given tile coord
 
 
 class EnvObsParams(BaseEnvObsParams):
@@ -66,14 +69,19 @@ class EnvObsParams(BaseEnvObsParams):
     coord: npt.NDArray[np.int64] = Field(
         default_factory=lambda: np.zeros(2, dtype=np.int64), description="tile coordinate"
     )
+    target_coord: npt.NDArray[np.int64] = Field(
+        default_factory=lambda: np.zeros(2, dtype=np.int64), description="target tile coordinate"
+    )
     level: str = Field(default="", description="different level of title")
     vision_radius: int = Field(default=0, description="the vision radius of current tile")
+    att_bandwidth: int = Field(default=0, description="the number of the closest events to perceive")
 
-    @field_validator("coord", mode="before")
+    @field_validator("coord", "target_coord", mode="before")
     @classmethod
     def check_coord(cls, coord) -> npt.NDArray[np.int64]:
         if not isinstance(coord, np.ndarray):
             return np.array(coord)
+        return coord
 
 
 EnvObsValType = Union[list[list[str]], dict[str, set[tuple[int, int]]], list[list[dict[str, Any]]]]
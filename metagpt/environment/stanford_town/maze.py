@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : The NumPy layers of the StanfordTown maze and the shortest paths over its collision mask
+
+import heapq
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+Tile = tuple[int, int]  # (x, y)
+
+
+class Maze:
+    """
+    The block id layers of the maze, indexed by [y, x], 0 means no block.
+    The shortest paths are cached by (start, end) and the cache is cleared when the collision layer changes.
+    """
+
+    def __init__(
+        self,
+        collision: npt.ArrayLike,
+        sector: Optional[npt.ArrayLike] = None,
+        arena: Optional[npt.ArrayLike] = None,
+        game_object: Optional[npt.ArrayLike] = None,
+        spawning_location: Optional[npt.ArrayLike] = None,
+        path_cache_size: int = 4096,
+    ):
+        self.collision_ids = np.asarray(collision, dtype=np.int32)
+        self.height, self.width = self.collision_ids.shape
+        empty = np.zeros_like(self.collision_ids)
+        self.sector = empty if sector is None else np.asarray(sector, dtype=np.int32)
+        self.arena = empty if arena is None else np.asarray(arena, dtype=np.int32)
+        self.game_object = empty if game_object is None else np.asarray(game_object, dtype=np.int32)
+        self.spawning_location = empty if spawning_location is None else np.asarray(spawning_location, dtype=np.int32)
+        self.path_cache_size = path_cache_size
+        self._path_cache: OrderedDict[tuple[Tile, Tile], tuple[Tile, ...]] = OrderedDict()
+        self._reset_collision()
+
+    @property
+    def collision(self) -> npt.NDArray[np.bool_]:
+        """The collision mask, read only, use `set_collision` to change it"""
+        return self._collision
+
+    def _reset_collision(self):
+        self._collision = self.collision_ids != 0
+        self._collision.flags.writeable = False
+        self._blocked = self._collision.ravel().tolist()  # faster than the array for the per tile lookups of A*
+        self._path_cache.clear()
+
+    def set_collision(self, tile: Tile, block_id: int):
+        """Set the collision block id of the tile in (x, y) form, 0 to make it walkable"""
+        x, y = tile
+        if self.collision_ids[y, x] == block_id:
+            return
+        self.collision_ids[y, x] = block_id
+        self._reset_collision()
+
+    def nearby_slices(self, tile: Tile, vision_r: int) -> tuple[slice, slice]:
+        """
+        The (rows, columns) slices of the square within `vision_r` of the tile in (x, y) form, clipped like the
+        `generative_agents` maze, whose last row and column are never in sight.
+        """
+        x, y = tile
+        rows = slice(max(y - vision_r, 0), min(y + vision_r + 1, self.height - 1))
+        cols = slice(max(x - vision_r, 0), min(x + vision_r + 1, self.width - 1))
+        return rows, cols
+
+    def find_path(self, start: Tile, end: Tile) -> list[Tile]:
+        """
+        The shortest path between the tiles in (x, y) form, both included, moving up, down, left or right onto the
+        tiles without collision. Return an empty list if `end` is unreachable.
+        """
+        start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+        key = (start, end)
+        if key in self._path_cache:
+            self._path_cache.move_to_end(key)
+            return list(self._path_cache[key])
+
+        path = tuple(self._astar(start, end))
+        self._path_cache[key] = path
+        if len(self._path_cache) > self.path_cache_size:
+            self._path_cache.popitem(last=False)
+        return list(path)
+
+    def _astar(self, start: Tile, end: Tile) -> list[Tile]:
+        width, height, blocked = self.width, self.height, self._blocked
+        (sx, sy), (ex, ey) = start, end
+        if start == end:
+            return [start]
+        if blocked[ey * width + ex]:
+            return []
+
+        # the heap entries are (estimated length, -steps, tile index), the deeper tiles are expanded first on a tie
+        start_idx, end_idx = sy * width + sx, ey * width + ex
+        steps = {start_idx: 0}
+        came_from = {start_idx: -1}
+        heap = [(abs(ex - sx) + abs(ey - sy), 0, start_idx)]
+        while heap:
+            _, neg_step, idx = heapq.heappop(heap)
+            if idx == end_idx:
+                break
+            step = -neg_step
+            if step > steps[idx]:
+                continue
+            y, x = divmod(idx, width)
+            for nbr, nx, ny in (
+                (idx - width, x, y - 1),
+                (idx - 1, x - 1, y),
+                (idx + width, x, y + 1),
+                (idx + 1, x + 1, y),
+            ):
+                if nx < 0 or ny < 0 or nx >= width or ny >= height or blocked[nbr]:
+                    continue
+                if step + 1 < steps.get(nbr, step + 2):
+                    steps[nbr] = step + 1
+                    came_from[nbr] = idx
+                    heapq.heappush(heap, (step + 1 + abs(ex - nx) + abs(ey - ny), -step - 1, nbr))
+        else:
+            return []
+
+        path = []
+        idx = end_idx
+        while idx != -1:
+            y, x = divmod(idx, width)
+            path.append((x, y))
+            idx = came_from[idx]
+        path.reverse()
+        return path
@@ -7,7 +7,8 @@ import math
 from pathlib import Path
 from typing import Any, Optional
 
-from pydantic import ConfigDict, Field, model_validator
+import numpy as np
+from pydantic import ConfigDict, Field, PrivateAttr, model_validator
 
 from metagpt.environment.base_env import ExtEnv, mark_as_readable, mark_as_writeable
 from metagpt.environment.stanford_town.env_space import (
@@ -19,8 +20,11 @@ from metagpt.environment.stanford_town.env_space import (
     get_action_space,
     get_observation_space,
 )
+from metagpt.environment.stanford_town.maze import Maze
 from metagpt.utils.common import read_csv_to_list, read_json_file
 
+EVENT_BUCKET_SIZE = 8  # the tiles width/height of the spatial buckets of the event index
+
 
 class StanfordTownExtEnv(ExtEnv):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -35,6 +39,12 @@ class StanfordTownExtEnv(ExtEnv):
     tiles: list[list[dict]] = Field(default=[])
     address_tiles: dict[str, set] = Field(default=dict())
     collision_maze: list[list] = Field(default=[])
+    maze: Optional[Maze] = Field(default=None, exclude=True, description="the block id layers of the maze")
+
+    # the event index, of the tiles with events
+    _subject_tiles: dict[str, set[tuple[int, int]]] = PrivateAttr(default_factory=dict)  # subject -> tiles
+    # arena address -> spatial bucket -> tiles
+    _arena_event_tiles: dict[str, dict[tuple[int, int], set[tuple[int, int]]]] = PrivateAttr(default_factory=dict)
 
     @model_validator(mode="before")
     @classmethod
@@ -124,6 +134,13 @@ class StanfordTownExtEnv(ExtEnv):
             game_object_maze += [game_object_maze_raw[i : i + tw]]
             spawning_location_maze += [spawning_location_maze_raw[i : i + tw]]
         values["collision_maze"] = collision_maze
+        values["maze"] = Maze(
+            collision=np.array(collision_maze, dtype=np.int32),
+            sector=np.array(sector_maze, dtype=np.int32),
+            arena=np.array(arena_maze, dtype=np.int32),
+            game_object=np.array(game_object_maze, dtype=np.int32),
+            spawning_location=np.array(spawning_location_maze, dtype=np.int32),
+        )
 
         tiles = []
         for i in range(maze_height):
@@ -211,6 +228,40 @@ class StanfordTownExtEnv(ExtEnv):
         values["observation_space"] = get_observation_space()
         return values
 
+    @model_validator(mode="after")
+    def _init_event_index(self):
+        self._subject_tiles = {}
+        self._arena_event_tiles = {}
+        for y, row in enumerate(self.tiles):
+            for x, tile_details in enumerate(row):
+                if tile_details["events"]:
+                    self._index_tile_events((x, y))
+        return self
+
+    def _index_tile_events(self, tile: tuple[int, int]):
+        x, y = tile
+        events = self.tiles[y][x]["events"]
+        for event in events:
+            self._subject_tiles.setdefault(event[0], set()).add(tile)
+        if events:
+            buckets = self._arena_event_tiles.setdefault(self.get_tile_path(tile, level="arena"), {})
+            buckets.setdefault((x // EVENT_BUCKET_SIZE, y // EVENT_BUCKET_SIZE), set()).add(tile)
+
+    def _unindex_tile_events(self, tile: tuple[int, int]):
+        x, y = tile
+        events = self.tiles[y][x]["events"]
+        for event in events:
+            tiles = self._subject_tiles.get(event[0], set())
+            tiles.discard(tile)
+            if not tiles:
+                self._subject_tiles.pop(event[0], None)
+        if events:
+            buckets = self._arena_event_tiles[self.get_tile_path(tile, level="arena")]
+            bucket = (x // EVENT_BUCKET_SIZE, y // EVENT_BUCKET_SIZE)
+            buckets[bucket].discard(tile)
+            if not buckets[bucket]:
+                del buckets[bucket]
+
     def reset(
         self,
         *,
@@ -245,6 +296,12 @@ class StanfordTownExtEnv(ExtEnv):
             obs = self.get_tile_path(tile=obs_params.coord, level=obs_params.level)
         elif obs_type == EnvObsType.TILE_NBR:
             obs = self.get_nearby_tiles(tile=obs_params.coord, vision_r=obs_params.vision_radius)
+        elif obs_type == EnvObsType.SHORTEST_PATH:
+            obs = self.find_path(start=obs_params.coord, end=obs_params.target_coord)
+        elif obs_type == EnvObsType.PERCEIVE:
+            obs = self.perceive(
+                tile=obs_params.coord, vision_r=obs_params.vision_radius, att_bandwidth=obs_params.att_bandwidth
+            )
         return obs
 
     def step(self, action: EnvAction) -> tuple[dict[str, EnvObsValType], float, bool, bool, dict[str, Any]]:
@@ -370,27 +427,87 @@ class StanfordTownExtEnv(ExtEnv):
         OUTPUT:
           nearby_tiles: a list of tiles that are within the radius.
         """
-        left_end = 0
-        if tile[0] - vision_r > left_end:
-            left_end = tile[0] - vision_r
+        rows, cols = self.get_nearby_slices(tile, vision_r)
+        return [(x, y) for x in range(cols.start, cols.stop) for y in range(rows.start, rows.stop)]
 
-        right_end = self.maze_width - 1
-        if tile[0] + vision_r + 1 < right_end:
-            right_end = tile[0] + vision_r + 1
+    @mark_as_readable
+    def get_nearby_slices(self, tile: tuple[int, int], vision_r: int) -> tuple[slice, slice]:
+        """
+        The (rows, columns) slices of the tiles returned by `get_nearby_tiles`, to index the layers of `self.maze`,
+        e.g. `self.maze.collision[rows, cols]`.
+        """
+        return self.maze.nearby_slices(tile, vision_r)
 
-        bottom_end = self.maze_height - 1
-        if tile[1] + vision_r + 1 < bottom_end:
-            bottom_end = tile[1] + vision_r + 1
+    @mark_as_readable
+    def find_path(self, start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        The shortest walkable path between the tiles in (x, y) form, both included, empty if `end` is unreachable.
+        e.g., [(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)...]
+        """
+        return self.maze.find_path(start, end)
 
-        top_end = 0
-        if tile[1] - vision_r > top_end:
-            top_end = tile[1] - vision_r
+    @mark_as_writeable
+    def set_tile_collision(self, tile: tuple[int, int], block_id: str) -> None:
+        """
+        Set the collision block of a tile, "0" to make it walkable, the cached paths are dropped.
 
-        nearby_tiles = []
-        for i in range(left_end, right_end):
-            for j in range(top_end, bottom_end):
-                nearby_tiles += [(i, j)]
-        return nearby_tiles
+        INPUT:
+          tile: The tile coordinate of our interest in (x, y) form.
+          block_id: The collision block id of the tile, e.g., "32125"
+        OUPUT:
+          None
+        """
+        x, y = tile
+        self.collision_maze[y][x] = block_id
+        self.tiles[y][x]["collision"] = block_id != "0"
+        self.maze.set_collision((x, y), int(block_id))
+
+    @mark_as_readable
+    def get_subject_tiles(self, subject: str) -> set[tuple[int, int]]:
+        """The tiles in (x, y) form with an event of the subject, e.g., Isabella Rodriguez"""
+        return set(self._subject_tiles.get(subject, ()))
+
+    @mark_as_readable
+    def perceive(self, tile: tuple[int, int], vision_r: int, att_bandwidth: int) -> dict[str, list]:
+        """
+        What a persona at the tile perceives, in one call instead of one `access_tile` and `get_tile_path` per
+        nearby tile.
+
+        INPUT:
+          tile: The tile coordinate of the persona in (x, y) form.
+          vision_r: The radius of the persona's vision, as in `get_nearby_tiles`.
+          att_bandwidth: The number of the closest events to perceive.
+        OUTPUT:
+          {"spaces": the tile details of the distinct addresses within the radius,
+           "events": the `att_bandwidth` closest distinct events within the radius that take place in the same arena,
+                     the closest first}
+        """
+        x, y = int(tile[0]), int(tile[1])
+        rows, cols = self.get_nearby_slices((x, y), vision_r)
+
+        # one tile per distinct (sector, arena, game object) block ids within the radius, in the order of
+        # `get_nearby_tiles`, column by column
+        layers = np.stack(
+            [self.maze.sector[rows, cols].T, self.maze.arena[rows, cols].T, self.maze.game_object[rows, cols].T],
+            axis=-1,
+        )
+        _, first = np.unique(layers.reshape(-1, 3), axis=0, return_index=True)
+        n_rows = rows.stop - rows.start
+        spaces = [self.tiles[rows.start + i % n_rows][cols.start + i // n_rows] for i in sorted(first.tolist())]
+
+        nearest = {}
+        buckets = self._arena_event_tiles.get(self.get_tile_path((x, y), level="arena"), {})
+        for bx in range(cols.start // EVENT_BUCKET_SIZE, (cols.stop - 1) // EVENT_BUCKET_SIZE + 1):
+            for by in range(rows.start // EVENT_BUCKET_SIZE, (rows.stop - 1) // EVENT_BUCKET_SIZE + 1):
+                for tx, ty in buckets.get((bx, by), ()):
+                    if not (cols.start <= tx < cols.stop and rows.start <= ty < rows.stop):
+                        continue
+                    dist = math.dist((tx, ty), (x, y))
+                    for event in self.tiles[ty][tx]["events"]:
+                        if event not in nearest or (dist, tx, ty) < nearest[event]:
+                            nearest[event] = (dist, tx, ty)
+        events = sorted(nearest, key=nearest.get)[:att_bandwidth]
+        return {"spaces": spaces, "events": events}
 
     @mark_as_writeable
     def add_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -405,7 +522,7 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        self.tiles[tile[1]][tile[0]]["events"].add(curr_event)
+        self._update_tile_events(tile, added=[tuple(curr_event)])
 
     @mark_as_writeable
     def remove_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -420,19 +537,13 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event == curr_event:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        self._update_tile_events(tile, removed=[tuple(curr_event)])
 
     @mark_as_writeable
     def turn_event_from_tile_idle(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event == curr_event:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
-                new_event = (event[0], None, None, None)
-                self.tiles[tile[1]][tile[0]]["events"].add(new_event)
+        curr_event = tuple(curr_event)
+        if curr_event in self.tiles[tile[1]][tile[0]]["events"]:
+            self._update_tile_events(tile, removed=[curr_event], added=[(curr_event[0], None, None, None)])
 
     @mark_as_writeable
     def remove_subject_events_from_tile(self, subject: str, tile: tuple[int, int]) -> None:
@@ -445,7 +556,15 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event[0] == subject:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        x, y = int(tile[0]), int(tile[1])
+        if (x, y) in self._subject_tiles.get(subject, ()):
+            self._update_tile_events((x, y), removed=[i for i in self.tiles[y][x]["events"] if i[0] == subject])
+
+    def _update_tile_events(self, tile: tuple[int, int], removed: list[tuple] = (), added: list[tuple] = ()):
+        """Change the events of a tile and its entries in the event index"""
+        x, y = int(tile[0]), int(tile[1])
+        self._unindex_tile_events((x, y))
+        events = self.tiles[y][x]["events"]
+        events.difference_update(removed)
+        events.update(added)
+        self._index_tile_events((x, y))
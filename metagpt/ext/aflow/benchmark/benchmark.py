@@ -1,17 +1,26 @@
 import asyncio
+import contextvars
 import json
 import os
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, List, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 
 import aiofiles
 import pandas as pd
 from tqdm.asyncio import tqdm_asyncio
 
+from metagpt.ext.aflow.benchmark.result_cache import ResultCache, get_problem_id
+from metagpt.ext.aflow.benchmark.sandbox import get_sandbox_pool
 from metagpt.logs import logger
-from metagpt.utils.common import write_json_file
+
+MISMATCH_LOG_FNAME = "log.jsonl"
+
+# the mismatches logged by the problem being evaluated in the current task, cached along with its result
+_problem_mismatches: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("problem_mismatches", default=None)
+# the errors reported by the problem being evaluated in the current task, its result is not cached if there are any
+_problem_errors: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("problem_errors", default=None)
 
 
 class BaseBenchmark(ABC):
@@ -33,8 +42,11 @@ class BaseBenchmark(ABC):
             return filtered_data
         return data
 
-    def save_results_to_csv(self, results: List[Tuple[Any, ...]], columns: List[str]):
+    def save_results_to_csv(self, results: List[Tuple[Any, ...]], columns: List[str], summary: dict = None):
+        """Save the results, one row per problem, along with the `summary` of the run in its own columns if given"""
         df = pd.DataFrame(results, columns=columns)
+        if summary:
+            df = df.assign(**summary)
         avg_score = df["score"].mean()
         t_cost = df["cost"].max()
         a_cost = t_cost / len(df) if len(df) > 0 else 0
@@ -60,17 +72,27 @@ class BaseBenchmark(ABC):
             "extracted_output": extracted_output,
             "extract_answer_code": extract_answer_code,
         }
-        log_file = Path(self.log_path) / "log.json"
-        if log_file.exists():
-            with log_file.open("r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    data = []
-        else:
-            data = []
-        data.append(log_data)
-        write_json_file(log_file, data, encoding="utf-8", indent=4)
+        mismatches = _problem_mismatches.get()
+        if mismatches is not None:
+            mismatches.append(log_data)
+        self._append_mismatches([log_data])
+
+    def report_error(self, error: BaseException):
+        """
+        Report the error the problem being evaluated failed with, e.g., an LLM call out of retries or a timeout. The
+        result scored for the problem is not cached, and the problem is evaluated again on the next run.
+        """
+        errors = _problem_errors.get()
+        if errors is not None:
+            errors.append(error)
+
+    def _append_mismatches(self, mismatches: List[dict]):
+        """Append the mismatches to `log.jsonl` of the log path, one per line"""
+        if not mismatches:
+            return
+        lines = "".join(json.dumps(i, ensure_ascii=False, default=str) + "\n" for i in mismatches)
+        with (Path(self.log_path) / MISMATCH_LOG_FNAME).open("a", encoding="utf-8") as f:
+            f.write(lines)
 
     @abstractmethod
     async def evaluate_problem(self, problem: dict, graph: Callable) -> Tuple[Any, ...]:
@@ -84,21 +106,80 @@ class BaseBenchmark(ABC):
     def get_result_columns(self) -> List[str]:
         pass
 
-    async def evaluate_all_problems(self, data: List[dict], graph: Callable, max_concurrent_tasks: int = 50):
+    async def evaluate_all_problems(
+        self,
+        data: List[dict],
+        graph: Callable,
+        max_concurrent_tasks: int = 50,
+        result_cache: ResultCache = None,
+        workflow_hash: str = None,
+        run_index: int = 0,
+    ):
+        """
+        Evaluate the problems, concurrently. Given a result cache and the hash of the workflow, the problems it has
+        scored already in the run are not evaluated again, and the others are cached as soon as they are scored, but
+        for the ones failing with an error reported by `report_error`.
+        """
+        use_cache = result_cache is not None and workflow_hash is not None
+        problem_ids = [get_problem_id(problem) for problem in data]
+        cached = result_cache.get_many(workflow_hash, run_index, problem_ids) if use_cache else {}
+        if cached:
+            logger.info(f"{len(cached)}/{len(data)} {self.name} problems already scored by the workflow, skipped")
+            # the mismatches of a workflow evaluated again in another round are logged in this round too
+            log_path = os.path.abspath(self.log_path)
+            self._append_mismatches(
+                [
+                    mismatch
+                    for _, mismatches, cached_log_path in cached.values()
+                    if os.path.abspath(cached_log_path or "") != log_path
+                    for mismatch in mismatches
+                ]
+            )
         semaphore = asyncio.Semaphore(max_concurrent_tasks)
 
-        async def sem_evaluate(problem):
+        async def sem_evaluate(problem, problem_id):
+            if problem_id in cached:
+                return cached[problem_id][0]
             async with semaphore:
-                return await self.evaluate_problem(problem, graph)
+                mismatches, errors = [], []
+                _problem_mismatches.set(mismatches)
+                _problem_errors.set(errors)
+                result = await self.evaluate_problem(problem, graph)
+            if use_cache and not errors:
+                result_cache.put(workflow_hash, run_index, problem_id, result, mismatches, self.log_path)
+            return result
 
-        tasks = [sem_evaluate(problem) for problem in data]
+        tasks = [asyncio.ensure_future(sem_evaluate(problem, i)) for problem, i in zip(data, problem_ids)]
         return await tqdm_asyncio.gather(*tasks, desc=f"Evaluating {self.name} problems", total=len(data))
 
-    async def run_evaluation(self, graph: Callable, va_list: List[int], max_concurrent_tasks: int = 50):
+    async def run_evaluation(
+        self,
+        graph: Callable,
+        va_list: List[int],
+        max_concurrent_tasks: int = 50,
+        result_cache: ResultCache = None,
+        workflow_hash: str = None,
+        run_index: int = 0,
+    ):
         data = await self.load_data(va_list)
-        results = await self.evaluate_all_problems(data, graph, max_concurrent_tasks)
+        sandbox_stats = get_sandbox_pool().stats
+        snapshot = sandbox_stats.snapshot()
+        results = await self.evaluate_all_problems(
+            data,
+            graph,
+            max_concurrent_tasks,
+            result_cache=result_cache,
+            workflow_hash=workflow_hash,
+            run_index=run_index,
+        )
+        # the jobs of the sandbox pool shared by the benchmarks and operators, while the problems were evaluated
+        sandbox_summary = sandbox_stats.since(snapshot)
+        if sandbox_summary["sandbox_jobs"]:
+            logger.info(f"Sandbox throughput: {sandbox_summary['sandbox_throughput']:.2f} jobs/s")
+        else:
+            sandbox_summary = None
         columns = self.get_result_columns()
-        average_score, average_cost, total_cost = self.save_results_to_csv(results, columns)
+        average_score, average_cost, total_cost = self.save_results_to_csv(results, columns, summary=sandbox_summary)
         logger.info(f"Average score on {self.name} dataset: {average_score:.5f}")
         logger.info(f"Total Cost: {total_cost:.5f}")
         return average_score, average_cost, total_cost
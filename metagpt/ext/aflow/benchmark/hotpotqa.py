@@ -65,6 +65,7 @@ class HotpotQABenchmark(BaseBenchmark):
 
         except Exception as e:
             logger.info(f"Maximum retries reached. Skipping this sample. Error: {e}")
+            self.report_error(e)
             return input_text, context_str, str(e), expected_output, 0.0, 0.0
 
     def get_result_columns(self) -> List[str]:
@@ -1,11 +1,16 @@
 import asyncio
-import threading
 import time
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Callable, List, Tuple
 
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
 from metagpt.ext.aflow.benchmark.benchmark import BaseBenchmark
+from metagpt.ext.aflow.benchmark.sandbox import (
+    SandboxTimeoutError,
+    check_program,
+    get_sandbox_pool,
+    record_job_times,
+)
 from metagpt.logs import logger
 from metagpt.utils.sanitize import sanitize
 
@@ -14,48 +19,9 @@ class HumanEvalBenchmark(BaseBenchmark):
     def __init__(self, name: str, file_path: str, log_path: str):
         super().__init__(name, file_path, log_path)
 
-    class TimeoutError(Exception):
-        pass
-
-    def run_with_timeout(self, func, args, timeout):
-        result = []
-        stop_event = threading.Event()
-
-        def target():
-            try:
-                result.append(func(*args))
-            except Exception as e:
-                result.append(e)
-            finally:
-                stop_event.set()
-
-        thread = threading.Thread(target=target)
-        thread.start()
-        is_timeout = not stop_event.wait(timeout)
-
-        if is_timeout:
-            raise self.TimeoutError("Function execution timed out")
-
-        if not result:
-            return None
-        if isinstance(result[0], Exception):
-            raise result[0]
-        return result[0]
-
-    def check_solution(self, solution, test, entry_point):
+    async def check_solution(self, solution, test, entry_point):
         solution = sanitize(code=solution, entrypoint=entry_point)
         try:
-            global_dict = {
-                "math": __import__("math"),
-                "hashlib": __import__("hashlib"),
-                "re": __import__("re"),
-                "List": List,
-                "Dict": Dict,
-                "Tuple": Tuple,
-                "Optional": Optional,
-                "Any": Any,
-            }
-
             # Add handling for special cases
             if entry_point == "decode_cyclic":
                 solution = (
@@ -74,21 +40,10 @@ class HumanEvalBenchmark(BaseBenchmark):
                     + solution
                 )
 
-            exec(solution, global_dict)
-
-            if entry_point not in global_dict:
-                raise ValueError(f"Function {entry_point} is not defined in the solution.")
-
-            exec(test, global_dict)
-
-            check = global_dict["check"]
-
-            result = self.run_with_timeout(check, (global_dict[entry_point],), 15)
-
-            if result is None:
-                result = (self.PASS, "The solution passed all test cases.")
+            await get_sandbox_pool().run(check_program, solution, test, entry_point, True, timeout=15)
+            result = (self.PASS, "The solution passed all test cases.")
 
-        except self.TimeoutError:
+        except SandboxTimeoutError:
             result = (
                 self.FAIL,
                 "Execution timed out. Please check if your solution contains infinite loops or overly time-consuming operations.",
@@ -122,30 +77,34 @@ class HumanEvalBenchmark(BaseBenchmark):
             prediction, cost = await self._generate_output(graph, input_text, data["entry_point"])
 
             # Check the solution
-            ret = self.check_solution(prediction, data["test"], data["entry_point"])
+            with record_job_times() as job_times:
+                ret = await self.check_solution(prediction, data["test"], data["entry_point"])
             test_case_details = ret[1]
             expected_output = test_case_details + expected_output
 
             # Calculate score based on the check result
             score = 1.0 if ret[0] == self.PASS else 0.0
+            check_time = sum(job_times)
 
             # Log mismatch if the score is 0
             if score == 0:
                 self.log_mismatch(input_text, expected_output, prediction, score)
 
-            return input_text, prediction, expected_output, score, cost
+            return input_text, prediction, expected_output, score, cost, check_time
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             logger.info("Timeout error. Skipping this sample.")
-            return input_text, "Timeout", expected_output, 0.0, 0.0
+            self.report_error(e)
+            return input_text, "Timeout", expected_output, 0.0, 0.0, 0.0
 
         except Exception as e:
             logger.info(f"Maximum retries reached. Skipping this sample. Error: {e}")
-            return input_text, str(e), expected_output, 0.0, 0.0
+            self.report_error(e)
+            return input_text, str(e), expected_output, 0.0, 0.0, 0.0
 
     def calculate_score(self, expected_output: str, prediction: str) -> Tuple[float, str]:
         # The scoring logic for HumanEval is already implemented in evaluate_problem, this is just to conform to the interface
         return 0.0, prediction
 
     def get_result_columns(self) -> List[str]:
-        return ["inputs", "prediction", "expected_output", "score", "cost"]
+        return ["inputs", "prediction", "expected_output", "score", "cost", "check_time"]
@@ -131,6 +131,7 @@ class MATHBenchmark(BaseBenchmark):
 
         except Exception as e:
             logger.info(f"Maximum retries reached. Skipping this sample. Error: {e}")
+            self.report_error(e)
             return input_text, str(e), expected_output, 0.0, 0.0
 
     def get_result_columns(self) -> List[str]:
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# @Desc    : per-(workflow, problem) cache of the evaluation results, a re-run skips the problems already scored
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+RESULT_CACHE_FNAME = "results_cache.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    workflow_hash TEXT NOT NULL,
+    run_index INTEGER NOT NULL,
+    problem_id TEXT NOT NULL,
+    result TEXT NOT NULL,
+    mismatches TEXT NOT NULL,
+    log_path TEXT,
+    PRIMARY KEY (workflow_hash, run_index, problem_id)
+);
+"""
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def get_problem_id(problem: dict) -> str:
+    """The hash of the problem content, a problem edited in the dataset is scored again"""
+    return _sha1(json.dumps(problem, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def get_workflow_hash(directory: str, llm_config=None) -> Optional[str]:
+    """
+    The hash of the `graph.py` and `prompt.py` of the round directory and of the model executing them, None if the
+    files are missing. The round number the graph imports its prompt from is left out, so a workflow generated again
+    in a later round hits the results of the earlier one.
+    """
+    sources = []
+    for fname in ("graph.py", "prompt.py"):
+        file_path = os.path.join(directory, fname)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, "r", encoding="utf-8") as file:
+            sources.append(re.sub(r"round_\d+", "round_N", file.read()))
+    model = getattr(llm_config, "model", None) or ""
+    return _sha1("\n".join([*sources, model]))
+
+
+class ResultCache:
+    """
+    The results of the problems in a SQLite database, one row per (workflow hash, run index, problem id), committed
+    as soon as the problem is scored so a crashed evaluation resumes from where it stopped. The run index keeps the
+    repeated validation runs of a workflow apart. The mismatches the problem logged are kept along with its result.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get_many(
+        self, workflow_hash: str, run_index: int, problem_ids: List[str]
+    ) -> Dict[str, Tuple[tuple, list, str]]:
+        """problem id -> (result, mismatches, log path) of the problems scored already"""
+        cached = {}
+        wanted = set(problem_ids)
+        cursor = self._conn.execute(
+            "SELECT problem_id, result, mismatches, log_path FROM results WHERE workflow_hash = ? AND run_index = ?",
+            (workflow_hash, run_index),
+        )
+        for problem_id, result, mismatches, log_path in cursor:
+            if problem_id in wanted:
+                cached[problem_id] = (tuple(json.loads(result)), json.loads(mismatches), log_path)
+        return cached
+
+    def put(self, workflow_hash: str, run_index: int, problem_id: str, result: tuple, mismatches: list, log_path: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                workflow_hash,
+                run_index,
+                problem_id,
+                json.dumps(list(result), ensure_ascii=False, default=str),
+                json.dumps(mismatches, ensure_ascii=False, default=str),
+                log_path,
+            ),
+        )
+        self._conn.commit()
+
+    def clear(self, workflow_hash: str = None):
+        if workflow_hash is None:
+            self._conn.execute("DELETE FROM results")
+        else:
+            self._conn.execute("DELETE FROM results WHERE workflow_hash = ?", (workflow_hash,))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+_result_caches: Dict[str, ResultCache] = {}
+
+
+def get_result_cache(directory: str) -> ResultCache:
+    """The result cache of the directory holding the rounds, opened once per process"""
+    path = os.path.abspath(os.path.join(directory, RESULT_CACHE_FNAME))
+    if path not in _result_caches:
+        _result_caches[path] = ResultCache(path)
+    return _result_caches[path]
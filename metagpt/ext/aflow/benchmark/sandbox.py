@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# @Desc    : warm pool of sandboxed worker processes running the generated code of the benchmarks and operators
+
+import asyncio
+import atexit
+import contextvars
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows, the workers run without memory limit
+    resource = None
+
+SANDBOX_TIMEOUT = 15  # seconds
+SANDBOX_MEMORY_LIMIT = 2048  # MB of address space a worker can allocate on top of the one it started with
+
+# the seconds the workers ran the jobs of the current task for, recorded by `record_job_times`
+_job_times: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("sandbox_job_times", default=None)
+
+DISALLOWED_IMPORTS = [
+    "os",
+    "sys",
+    "subprocess",
+    "multiprocessing",
+    "matplotlib",
+    "seaborn",
+    "plotly",
+    "bokeh",
+    "ggplot",
+    "pylab",
+    "tkinter",
+    "PyQt5",
+    "wx",
+    "pyglet",
+]
+
+
+class SandboxError(Exception):
+    """The code raised in the worker, the message is the one of the original exception"""
+
+    def __init__(self, message: str, error_type: str = "Exception"):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class SandboxTimeoutError(SandboxError):
+    pass
+
+
+class SandboxCrashError(SandboxError):
+    """The worker died while running the code, e.g., killed for exceeding the memory limit"""
+
+
+def _check_globals() -> dict:
+    return {
+        "math": __import__("math"),
+        "hashlib": __import__("hashlib"),
+        "re": __import__("re"),
+        "List": List,
+        "Dict": Dict,
+        "Tuple": Tuple,
+        "Optional": Optional,
+        "Any": Any,
+    }
+
+
+def check_program(solution: str, test: str, entry_point: str, pass_entry_point: bool = True):
+    """Run the `check` function of the test against the solution, raise if the solution fails"""
+    global_dict = _check_globals()
+    exec(solution, global_dict)
+    if entry_point not in global_dict:
+        raise ValueError(f"Function {entry_point} is not defined in the solution.")
+    exec(test, global_dict)
+    check = global_dict["check"]
+    if pass_entry_point:
+        check(global_dict[entry_point])
+    else:
+        check()
+
+
+def run_test_codes(test_codes: List[str]) -> List[Optional[tuple]]:
+    """
+    Run the test programs in order, each ends up as None if passed, ("AssertionError", message, traceback lines) if
+    failed, or ("Exception", message) if it raised otherwise, which stops the remaining ones.
+    """
+    results = []
+    for test_code in test_codes:
+        try:
+            exec(test_code, _check_globals())
+            results.append(None)
+        except AssertionError as e:
+            results.append(("AssertionError", str(e), traceback.format_exception(*sys.exc_info())))
+        except Exception as e:
+            results.append(("Exception", str(e)))
+            break
+    return results
+
+
+def run_code(code):
+    try:
+        # Create a new global namespace
+        global_namespace = {}
+
+        # Check for prohibited imports
+        for lib in DISALLOWED_IMPORTS:
+            if f"import {lib}" in code or f"from {lib}" in code:
+                return "Error", f"Prohibited import: {lib} and graphing functionalities"
+
+        # Use exec to execute the code
+        exec(code, global_namespace)
+        # Assume the code defines a function named 'solve'
+        if "solve" in global_namespace and callable(global_namespace["solve"]):
+            result = global_namespace["solve"]()
+            return "Success", str(result)
+        else:
+            return "Error", "Function 'solve' not found"
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        tb_str = traceback.format_exception(exc_type, exc_value, exc_traceback)
+        return "Error", f"Execution error: {str(e)}\n{''.join(tb_str)}"
+
+
+def _address_space_size() -> int:
+    """The bytes of address space in use, inherited from the parent if forked, 0 if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _worker_main(conn, memory_limit: int):
+    if memory_limit and resource is not None:
+        limit = _address_space_size() + memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+        func, args = job
+        try:
+            reply = (True, func(*args))
+        except BaseException as e:  # SystemExit of the generated code included
+            reply = (False, (type(e).__name__, str(e)))
+        try:
+            conn.send(reply)
+        except Exception as e:  # unpicklable result
+            conn.send((False, (type(e).__name__, f"Unable to send the result back: {e}")))
+
+
+class _Worker:
+    def __init__(self, ctx, memory_limit: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.n_jobs = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SandboxStats:
+    def __init__(self):
+        self.n_jobs = 0
+        self.n_timeouts = 0
+        self.n_crashes = 0
+        self.busy_time = 0.0  # seconds the workers spent on the jobs
+        self.start_time = time.perf_counter()
+
+    @property
+    def throughput(self) -> float:
+        """Jobs per second since the pool was created"""
+        elapsed = time.perf_counter() - self.start_time
+        return self.n_jobs / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "n_jobs": self.n_jobs,
+            "n_timeouts": self.n_timeouts,
+            "n_crashes": self.n_crashes,
+            "busy_time": self.busy_time,
+            "time": time.perf_counter(),
+        }
+
+    def since(self, snapshot: dict) -> dict:
+        """The jobs run since the snapshot was taken, with their throughput in jobs per second"""
+        elapsed = time.perf_counter() - snapshot["time"]
+        n_jobs = self.n_jobs - snapshot["n_jobs"]
+        return {
+            "sandbox_jobs": n_jobs,
+            "sandbox_throughput": n_jobs / elapsed if elapsed > 0 else 0.0,
+            "sandbox_busy_time": self.busy_time - snapshot["busy_time"],
+            "sandbox_timeouts": self.n_timeouts - snapshot["n_timeouts"],
+            "sandbox_crashes": self.n_crashes - snapshot["n_crashes"],
+        }
+
+    def __repr__(self):
+        return (
+            f"{self.n_jobs} jobs, {self.throughput:.2f} jobs/s, {self.busy_time:.2f}s busy, "
+            f"{self.n_timeouts} timeouts, {self.n_crashes} crashes"
+        )
+
+
+class SandboxPool:
+    """
+    Warm pool of `size` worker processes, each runs one job at a time in its own interpreter under a memory limit.
+    A worker running past the timeout of its job is killed and respawned, so is a worker that crashed or has run
+    `max_jobs_per_worker` jobs, since the generated code may leave it in a bad state, e.g., patched builtins.
+    The jobs are module level functions and their arguments, both picklable.
+    """
+
+    def __init__(
+        self,
+        size: int = None,
+        timeout: float = SANDBOX_TIMEOUT,
+        memory_limit: int = SANDBOX_MEMORY_LIMIT,
+        max_jobs_per_worker: int = 200,
+    ):
+        self.size = size or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.stats = SandboxStats()
+        # a forked worker starts in milliseconds without importing `__main__` again, a worker stuck on a lock held by
+        # another thread at fork time is killed on timeout like any other
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.memory_limit)
+        self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> _Worker:
+        self._workers.remove(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.close()
+        return self._spawn()
+
+    async def _acquire(self) -> _Worker:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # the pool outlives the event loops, e.g., one per optimization round
+            self._loop = loop
+            self._idle = asyncio.Queue()
+            while len(self._workers) < self.size:
+                self._spawn()
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+        return await self._idle.get()
+
+    async def run(self, func: Callable, *args, timeout: float = None) -> Any:
+        """Run `func(*args)` in a worker, raise `SandboxTimeoutError` after `timeout` seconds, `self.timeout` if None"""
+        timeout = self.timeout if timeout is None else timeout
+        worker = await self._acquire()
+        start = time.perf_counter()
+        try:
+            worker.conn.send((func, args))
+            worker.n_jobs += 1
+            if not await asyncio.to_thread(worker.conn.poll, timeout):
+                self.stats.n_timeouts += 1
+                worker = self._retire(worker, kill=True)
+                raise SandboxTimeoutError(f"Execution timed out after {timeout} seconds", "TimeoutError")
+            ok, result = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self.stats.n_crashes += 1
+            worker = self._retire(worker, kill=True)
+            raise SandboxCrashError(f"The sandbox worker crashed: {e!r}", type(e).__name__)
+        except asyncio.CancelledError:  # the job may still be running
+            worker = self._retire(worker, kill=True)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.n_jobs += 1
+            self.stats.busy_time += elapsed
+            job_times = _job_times.get()
+            if job_times is not None:
+                job_times.append(elapsed)
+            if worker.n_jobs >= self.max_jobs_per_worker:
+                worker = self._retire(worker)
+            self._idle.put_nowait(worker)
+
+        if not ok:
+            error_type, message = result
+            raise SandboxError(message, error_type)
+        return result
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+        self._loop = None
+
+
+@contextmanager
+def record_job_times() -> Iterator[list]:
+    """Collect the seconds the workers ran the jobs of the current task for, the wait for a free worker left out"""
+    job_times = []
+    token = _job_times.set(job_times)
+    try:
+        yield job_times
+    finally:
+        _job_times.reset(token)
+
+
+_sandbox_pool: Optional[SandboxPool] = None
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """The sandbox pool shared by the benchmarks and the operators"""
+    global _sandbox_pool
+    if _sandbox_pool is None:
+        _sandbox_pool = SandboxPool()
+        atexit.register(_sandbox_pool.close)
+    return _sandbox_pool
+
+
+def set_sandbox_pool(pool: SandboxPool):
+    global _sandbox_pool
+    if _sandbox_pool is not None and _sandbox_pool is not pool:
+        _sandbox_pool.close()
+    _sandbox_pool = pool
+    atexit.register(pool.close)
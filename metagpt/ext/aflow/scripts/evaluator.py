@@ -3,6 +3,7 @@
 # @Author  : all
 # @Desc    : Evaluation for different datasets
 
+import os
 from typing import Dict, Literal, Tuple
 
 from metagpt.ext.aflow.benchmark.benchmark import BaseBenchmark
@@ -12,6 +13,7 @@ from metagpt.ext.aflow.benchmark.hotpotqa import HotpotQABenchmark
 from metagpt.ext.aflow.benchmark.humaneval import HumanEvalBenchmark
 from metagpt.ext.aflow.benchmark.math import MATHBenchmark
 from metagpt.ext.aflow.benchmark.mbpp import MBPPBenchmark
+from metagpt.ext.aflow.benchmark.result_cache import get_result_cache, get_workflow_hash
 
 # If you want to customize tasks, add task types here and provide evaluation functions, just like the ones given above
 DatasetType = Literal["HumanEval", "MBPP", "GSM8K", "MATH", "HotpotQA", "DROP"]
@@ -34,8 +36,20 @@ class Evaluator:
         }
 
     async def graph_evaluate(
-        self, dataset: DatasetType, graph, params: dict, path: str, is_test: bool = False
+        self,
+        dataset: DatasetType,
+        graph,
+        params: dict,
+        path: str,
+        is_test: bool = False,
+        run_index: int = 0,
+        use_cache: bool = True,
     ) -> Tuple[float, float, float]:
+        """
+        Evaluate the graph of the round directory `path`. With `use_cache`, the results are cached per problem in the
+        directory holding the rounds, keyed by the workflow hash and `run_index`, the index of the repeated run, so only
+        the problems the workflow has not scored in this run yet, e.g., added to the dataset or left by a crash, are run.
+        """
         if dataset not in self.dataset_configs:
             raise ValueError(f"Unsupported dataset: {dataset}")
 
@@ -49,7 +63,11 @@ class Evaluator:
             va_list = None  # For test data, generally use None to test all
         else:
             va_list = None  # Use None to test all Validation data, or set va_list (e.g., [1, 2, 3]) to use partial data
-        return await benchmark.run_evaluation(configured_graph, va_list)
+        workflow_hash = get_workflow_hash(path, params.get("llm_config")) if use_cache else None
+        result_cache = get_result_cache(os.path.dirname(os.path.abspath(path))) if workflow_hash else None
+        return await benchmark.run_evaluation(
+            configured_graph, va_list, result_cache=result_cache, workflow_hash=workflow_hash, run_index=run_index
+        )
 
     async def _configure_graph(self, dataset, graph, params: dict):
         # Here you can configure the graph based on params
@@ -2,17 +2,21 @@
 # @Date    : 6/27/2024 17:36 PM
 # @Author  : didi
 # @Desc    : operator demo of aflow
-import asyncio
-import concurrent.futures
 import random
-import sys
-import traceback
 from collections import Counter
 from typing import Dict, List, Tuple
 
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 from metagpt.actions.action_node import ActionNode
+from metagpt.ext.aflow.benchmark.sandbox import (
+    SANDBOX_TIMEOUT,
+    SandboxError,
+    SandboxTimeoutError,
+    get_sandbox_pool,
+    run_code,
+    run_test_codes,
+)
 from metagpt.ext.aflow.scripts.operator_an import (
     AnswerGenerateOp,
     CodeGenerateOp,
@@ -116,70 +120,20 @@ class ScEnsemble(Operator):
         return {"response": solutions[answer_mapping[answer]]}
 
 
-def run_code(code):
-    try:
-        # Create a new global namespace
-        global_namespace = {}
-
-        disallowed_imports = [
-            "os",
-            "sys",
-            "subprocess",
-            "multiprocessing",
-            "matplotlib",
-            "seaborn",
-            "plotly",
-            "bokeh",
-            "ggplot",
-            "pylab",
-            "tkinter",
-            "PyQt5",
-            "wx",
-            "pyglet",
-        ]
-
-        # Check for prohibited imports
-        for lib in disallowed_imports:
-            if f"import {lib}" in code or f"from {lib}" in code:
-                logger.info("Detected prohibited import: %s", lib)
-                return "Error", f"Prohibited import: {lib} and graphing functionalities"
-
-        # Use exec to execute the code
-        exec(code, global_namespace)
-        # Assume the code defines a function named 'solve'
-        if "solve" in global_namespace and callable(global_namespace["solve"]):
-            result = global_namespace["solve"]()
-            return "Success", str(result)
-        else:
-            return "Error", "Function 'solve' not found"
-    except Exception as e:
-        exc_type, exc_value, exc_traceback = sys.exc_info()
-        tb_str = traceback.format_exception(exc_type, exc_value, exc_traceback)
-        return "Error", f"Execution error: {str(e)}\n{''.join(tb_str)}"
-
-
 class Programmer(Operator):
     def __init__(self, llm: LLM, name: str = "Programmer"):
         super().__init__(llm, name)
 
     async def exec_code(self, code, timeout=30):
         """
-        Asynchronously execute code and return an error if timeout occurs.
+        Asynchronously execute code in the shared sandbox pool and return an error if timeout occurs.
         """
-        loop = asyncio.get_running_loop()
-        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
-            try:
-                # Submit run_code task to the process pool
-                future = loop.run_in_executor(executor, run_code, code)
-                # Wait for the task to complete or timeout
-                result = await asyncio.wait_for(future, timeout=timeout)
-                return result
-            except asyncio.TimeoutError:
-                # Timeout, attempt to shut down the process pool
-                executor.shutdown(wait=False, cancel_futures=True)
-                return "Error", "Code execution timed out"
-            except Exception as e:
-                return "Error", f"Unknown error: {str(e)}"
+        try:
+            return await get_sandbox_pool().run(run_code, code, timeout=timeout)
+        except SandboxTimeoutError:
+            return "Error", "Code execution timed out"
+        except Exception as e:
+            return "Error", f"Unknown error: {str(e)}"
 
     async def code_generate(self, problem, analysis, feedback, mode):
         """
@@ -218,32 +172,37 @@ class Test(Operator):
     def __init__(self, llm: LLM, name: str = "Test"):
         super().__init__(llm, name)
 
-    def exec_code(self, solution, entry_point):
+    async def exec_code(self, solution, entry_point, timeout=SANDBOX_TIMEOUT):
         test_cases = extract_test_cases_from_jsonl(entry_point)
+        test_codes = [test_case_2_test_function(solution, test_case, entry_point) for test_case in test_cases]
+
+        # all the test cases run at once in the sandbox
+        try:
+            results = await get_sandbox_pool().run(run_test_codes, test_codes, timeout=timeout)
+        except SandboxError as e:
+            results = [("Exception", str(e))]
 
         fail_cases = []
-        for test_case in test_cases:
-            test_code = test_case_2_test_function(solution, test_case, entry_point)
-            try:
-                exec(test_code, globals())
-            except AssertionError as e:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                tb_str = traceback.format_exception(exc_type, exc_value, exc_traceback)
+        for test_case, result in zip(test_cases, results):
+            if result is None:
+                continue
+            if result[0] == "AssertionError":
+                _, error_message, tb_str = result
                 with open("tester.txt", "a") as f:
                     f.write("test_error of " + entry_point + "\n")
                 error_infomation = {
                     "test_fail_case": {
                         "test_case": test_case,
                         "error_type": "AssertionError",
-                        "error_message": str(e),
+                        "error_message": error_message,
                         "traceback": tb_str,
                     }
                 }
                 fail_cases.append(error_infomation)
-            except Exception as e:
+            else:
                 with open("tester.txt", "a") as f:
-                    f.write(entry_point + " " + str(e) + "\n")
-                return {"exec_fail_case": str(e)}
+                    f.write(entry_point + " " + result[1] + "\n")
+                return {"exec_fail_case": result[1]}
         if fail_cases != []:
             return fail_cases
         else:
@@ -257,7 +216,7 @@ class Test(Operator):
         }
         """
         for _ in range(test_loop):
-            result = self.exec_code(solution, entry_point)
+            result = await self.exec_code(solution, entry_point)
             if result == "no error":
                 return {"result": True, "solution": solution}
             elif "exec_fail_case" in result:
@@ -280,7 +239,7 @@ class Test(Operator):
                 response = await self._fill_node(ReflectionTestOp, prompt, mode="code_fill")
                 solution = response["reflection_and_solution"]
 
-        result = self.exec_code(solution, entry_point)
+        result = await self.exec_code(solution, entry_point)
         if result == "no error":
             return {"result": True, "solution": solution}
         else:
@@ -74,7 +74,7 @@ class Optimizer:
             for i in range(test_n):
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
-                score = loop.run_until_complete(self.test())
+                score = loop.run_until_complete(self.test(run_index=i))
             return None
 
         for opt_round in range(self.max_rounds):
@@ -128,10 +128,18 @@ class Optimizer:
             self.graph = self.graph_utils.load_graph(self.round, graph_path)
             avg_score = await self.evaluation_utils.evaluate_graph(self, directory, validation_n, data, initial=True)
 
+        directory = self.graph_utils.create_round_directory(graph_path, self.round + 1)
+        experience = self.experience_utils.load_pending_experience(directory)
+        if experience is not None:
+            # the graph of the round was generated by a crashed run, the problems it scored already are not run again
+            logger.info(f"Resume the evaluation of round {self.round + 1}")
+            self.graph = self.graph_utils.load_graph(self.round + 1, graph_path)
+            avg_score = await self.evaluation_utils.evaluate_graph(self, directory, validation_n, data, initial=False)
+            self.experience_utils.update_experience(directory, experience, avg_score)
+            return avg_score
+
         # Create a loop until the generated graph meets the check conditions
         while True:
-            directory = self.graph_utils.create_round_directory(graph_path, self.round + 1)
-
             top_rounds = self.data_utils.get_top_rounds(self.sample)
             sample = self.data_utils.select_round(top_rounds)
 
@@ -167,6 +175,7 @@ class Optimizer:
         self.graph_utils.write_graph_files(directory, response, self.round + 1, self.dataset)
 
         experience = self.experience_utils.create_experience_data(sample, response["modification"])
+        self.experience_utils.save_experience(directory, experience)
 
         self.graph = self.graph_utils.load_graph(self.round + 1, graph_path)
 
@@ -178,7 +187,7 @@ class Optimizer:
 
         return avg_score
 
-    async def test(self):
+    async def test(self, run_index: int = 0):
         rounds = [5]  # You can choose the rounds you want to test here.
         data = []
 
@@ -191,7 +200,9 @@ class Optimizer:
             directory = self.graph_utils.create_round_directory(graph_path, round)
             self.graph = self.graph_utils.load_graph(round, graph_path)
 
-            score, avg_cost, total_cost = await self.evaluation_utils.evaluate_graph_test(self, directory, is_test=True)
+            score, avg_cost, total_cost = await self.evaluation_utils.evaluate_graph_test(
+                self, directory, is_test=True, run_index=run_index
+            )
 
             new_data = self.data_utils.create_result_data(round, score, avg_cost, total_cost)
             data.append(new_data)
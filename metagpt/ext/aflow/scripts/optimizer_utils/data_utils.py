@@ -90,21 +90,14 @@ class DataUtils:
 
     def load_log(self, cur_round, path=None, mode: str = "Graph"):
         if mode == "Graph":
-            log_dir = os.path.join(self.root_path, "workflows", f"round_{cur_round}", "log.json")
+            log_dir = os.path.join(self.root_path, "workflows", f"round_{cur_round}", "log.jsonl")
         else:
             log_dir = path
 
-        # 检查文件是否存在
-        if not os.path.exists(log_dir):
-            return ""  # 如果文件不存在，返回空字符串
-        logger.info(log_dir)
-        data = read_json_file(log_dir, encoding="utf-8")
-
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            data = list(data)
-
+        data = self._read_log(log_dir)
+        if data is None:
+            # the rounds logged before the mismatches were appended one per line
+            data = self._read_log(os.path.join(os.path.dirname(log_dir), "log.json"))
         if not data:
             return ""
 
@@ -117,6 +110,25 @@ class DataUtils:
 
         return log
 
+    @staticmethod
+    def _read_log(log_path: str):
+        """The mismatches of `log.jsonl`, or of a legacy `log.json`, None if the file does not exist"""
+        if not os.path.exists(log_path):
+            return None
+        logger.info(log_path)
+        if not log_path.endswith(".jsonl"):
+            data = read_json_file(log_path, encoding="utf-8")
+            return [data] if isinstance(data, dict) else list(data)
+
+        data = []
+        with open(log_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    data.append(json.loads(line))
+                except json.JSONDecodeError:  # the last line of a crashed run
+                    continue
+        return data
+
     def get_results_file_path(self, graph_path: str) -> str:
         return os.path.join(graph_path, "results.json")
 
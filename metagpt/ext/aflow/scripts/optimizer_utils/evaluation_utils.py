@@ -9,6 +9,7 @@ class EvaluationUtils:
         # 使用 optimizer 的 graph_utils 来加载图
         optimizer.graph = optimizer.graph_utils.load_graph(optimizer.round, graph_path)
         evaluator = Evaluator(eval_path=directory)
+        data[:] = [i for i in data if i["round"] != optimizer.round]
 
         for i in range(validation_n):
             score, avg_cost, total_cost = await evaluator.graph_evaluate(
@@ -17,6 +18,7 @@ class EvaluationUtils:
                 {"dataset": optimizer.dataset, "llm_config": optimizer.execute_llm_config},
                 directory,
                 is_test=False,
+                run_index=i,
             )
 
             new_data = optimizer.data_utils.create_result_data(optimizer.round, score, avg_cost, total_cost)
@@ -30,6 +32,9 @@ class EvaluationUtils:
     async def evaluate_graph(self, optimizer, directory, validation_n, data, initial=False):
         evaluator = Evaluator(eval_path=directory)
         sum_score = 0
+        cur_round = optimizer.round + 1 if initial is False else optimizer.round
+        # the runs of a round evaluated again, e.g., resumed after a crash, replace its earlier ones
+        data[:] = [i for i in data if i["round"] != cur_round]
 
         for i in range(validation_n):
             score, avg_cost, total_cost = await evaluator.graph_evaluate(
@@ -38,10 +43,9 @@ class EvaluationUtils:
                 {"dataset": optimizer.dataset, "llm_config": optimizer.execute_llm_config},
                 directory,
                 is_test=False,
+                run_index=i,
             )
 
-            cur_round = optimizer.round + 1 if initial is False else optimizer.round
-
             new_data = optimizer.data_utils.create_result_data(cur_round, score, avg_cost, total_cost)
             data.append(new_data)
 
@@ -52,7 +56,7 @@ class EvaluationUtils:
 
         return sum_score / validation_n
 
-    async def evaluate_graph_test(self, optimizer, directory, is_test=True):
+    async def evaluate_graph_test(self, optimizer, directory, is_test=True, run_index=0):
         evaluator = Evaluator(eval_path=directory)
         return await evaluator.graph_evaluate(
             optimizer.dataset,
@@ -60,4 +64,5 @@ class EvaluationUtils:
             {"dataset": optimizer.dataset, "llm_config": optimizer.execute_llm_config},
             directory,
             is_test=is_test,
+            run_index=run_index,
         )
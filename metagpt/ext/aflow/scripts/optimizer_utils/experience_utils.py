@@ -26,6 +26,8 @@ class ExperienceUtils:
                     json_file_path = os.path.join(round_path, "experience.json")
                     if os.path.exists(json_file_path):
                         data = read_json_file(json_file_path, encoding="utf-8")
+                        if data["after"] is None:  # not evaluated yet
+                            continue
                         father_node = data["father node"]
 
                         if experience_data[father_node]["score"] is None:
@@ -89,8 +91,19 @@ class ExperienceUtils:
             "succeed": None,
         }
 
+    def save_experience(self, directory, experience):
+        write_json_file(os.path.join(directory, "experience.json"), experience, encoding="utf-8", indent=4)
+
+    def load_pending_experience(self, directory):
+        """The experience of the round generated but not evaluated yet, e.g., by a crashed run, None if there is none"""
+        json_file_path = os.path.join(directory, "experience.json")
+        if not os.path.exists(json_file_path) or not os.path.exists(os.path.join(directory, "graph.py")):
+            return None
+        experience = read_json_file(json_file_path, encoding="utf-8")
+        return experience if experience["after"] is None else None
+
     def update_experience(self, directory, experience, avg_score):
         experience["after"] = avg_score
         experience["succeed"] = bool(avg_score > experience["before"])
 
-        write_json_file(os.path.join(directory, "experience.json"), experience, encoding="utf-8", indent=4)
+        self.save_experience(directory, experience)
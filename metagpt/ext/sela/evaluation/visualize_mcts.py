@@ -133,11 +133,14 @@ def build_tree_recursive(graph, parent_id, node, node_order, start_task_id=2):
     Recursively builds the entire tree starting from the root node.
     Adds nodes and edges to the NetworkX graph.
     """
-    role = node.load_role()
     depth = node.get_depth()
     if depth == 0:
+        role = node.load_role()
         instruction = "\n\n".join([role.planner.plan.tasks[i].instruction for i in range(start_task_id)])
+    elif node.action is not None:  # the instruction the node changed, no need to load its role and its ancestors'
+        instruction = node.action
     else:
+        role = node.load_role()
         instruction = role.planner.plan.tasks[depth + start_task_id - 1].instruction
     print(instruction)
     # Add the current node with attributes to the graph
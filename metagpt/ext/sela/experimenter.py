@@ -3,8 +3,10 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import re
+from typing import Optional
 
-from pydantic import model_validator
+from pydantic import PrivateAttr, model_validator
 
 from metagpt.actions.di.write_analysis_code import WriteAnalysisCode
 from metagpt.const import SERDESER_PATH
@@ -66,6 +68,8 @@ class Experimenter(DataInterpreter):
     state_saved: bool = False
     role_dir: str = SERDESER_PATH.joinpath("team", "environment", "roles", "Experimenter")
     role_timeout: int = 1000
+    # (shared output dir, output dir of the node) the goal and the unfinished tasks refer to, not saved in the state
+    _output_dir_redirect: Optional[tuple[str, str]] = PrivateAttr(default=None)
 
     def get_node_name(self):
         return f"Node-{self.node_id}"
@@ -174,7 +178,33 @@ class Experimenter(DataInterpreter):
         name = self.get_node_name()
         role_path = os.path.join(stg_path, f"{name}.json")
         # save state as json file
-        write_json_file(role_path, self.model_dump())
+        write_json_file(role_path, self._dump_without_redirect())
+
+    def _dump_without_redirect(self) -> dict:
+        """The state referring to the shared output dir, the roles of the children redirect it to their own dirs"""
+        role_dict = self.model_dump()
+        if self._output_dir_redirect is None:
+            return role_dict
+        output_dir, new_output_dir = self._output_dir_redirect
+        plan = role_dict["planner"]["plan"]
+        plan["goal"] = plan["goal"].replace(new_output_dir, output_dir)
+        for task in [*plan["tasks"], *plan["task_map"].values()]:
+            task["instruction"] = task["instruction"].replace(new_output_dir, output_dir)
+        return role_dict
+
+    def redirect_output_dir(self, output_dir: str, new_output_dir: str):
+        """
+        Refer to another output dir in the goal and the unfinished tasks, to run along with the other roles. The
+        output dir of a node, `{output_dir}/Node-{id}`, left by an older state is redirected too, and the state is
+        saved referring to `output_dir`.
+        """
+        pattern = re.compile(re.escape(output_dir) + r"(?:/Node-[\d-]+)?(?![\w-])")
+        plan = self.planner.plan
+        plan.goal = pattern.sub(lambda m: new_output_dir, plan.goal)
+        for task in plan.tasks:
+            if not task.is_finished:
+                task.instruction = pattern.sub(lambda m: new_output_dir, task.instruction)
+        self._output_dir_redirect = (output_dir, new_output_dir)
 
     def remap_tasks(self):
         self.planner.plan.tasks = [
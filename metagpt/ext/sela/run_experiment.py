@@ -42,6 +42,8 @@ def get_mcts_args(parser):
     parser.add_argument("--no_load_tree", dest="load_tree", action="store_false")
     parser.set_defaults(load_tree=False)
     parser.add_argument("--rollouts", type=int, default=5)
+    parser.add_argument("--n_workers", type=int, default=1, help="Number of rollouts running concurrently")
+    parser.add_argument("--rollout_timeout", type=float, default=None, help="Timeout of a rollout in seconds")
     parser.add_argument("--use_fixed_insights", dest="use_fixed_insights", action="store_true")
     parser.set_defaults(use_fixed_insights=False)
     parser.add_argument("--start_task_id", type=int, default=2)
@@ -24,7 +24,11 @@ class MCTS(BaseTreeSearch):
         def uct(node: Node):
             n_visits = node.visited if node.visited else self.c_unvisited
             avg_value = node.avg_value() if node.visited else node.value / self.c_unvisited
-            return avg_value + self.c_explore * np.sqrt(np.log(node.parent.visited) / n_visits)
+            if node.virtual_loss:  # count the running rollouts as visits without reward
+                avg_value = avg_value * n_visits / (n_visits + node.virtual_loss)
+                n_visits += node.virtual_loss
+            parent_visits = node.parent.visited + node.parent.virtual_loss
+            return avg_value + self.c_explore * np.sqrt(np.log(parent_visits) / n_visits)
 
         if len(self.children) == 0:
             return self.root_node
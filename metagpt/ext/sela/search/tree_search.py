@@ -1,7 +1,9 @@
+import asyncio
 import json
 import os
 import pickle
 import shutil
+from collections import defaultdict
 
 import numpy as np
 import pandas as pd
@@ -17,6 +19,7 @@ from metagpt.ext.sela.data.dataset import (
 from metagpt.ext.sela.evaluation.evaluation import evaluate_score
 from metagpt.ext.sela.experimenter import Experimenter, TimeoutException
 from metagpt.ext.sela.insights.instruction_generator import InstructionGenerator
+from metagpt.ext.sela.search.tree_store import TreeStore, get_tree_store
 from metagpt.ext.sela.utils import get_exp_pool_path, load_execute_notebook, mcts_logger
 from metagpt.tools.tool_recommend import ToolRecommender
 from metagpt.utils.common import read_json_file
@@ -119,6 +122,8 @@ class Node:
     children: list = []
     normalized_reward: dict = {"train_score": 0, "dev_score": 0, "test_score": 0}
     parent = None
+    virtual_loss: int = 0  # the losses of the rollouts running through the node, to spread the parallel selections
+    output_dir: str = None  # the dir of the predictions, None to share `{work_dir}/{task}` with the other nodes
 
     def __init__(
         self, parent=None, state: dict = None, action: str = None, value: float = 0, max_depth: int = 4, **kwargs
@@ -144,14 +149,30 @@ class Node:
     def __hash__(self):
         return hash(self.id)
 
-    def save_node(self):
-        os.makedirs(self.state["node_dir"], exist_ok=True)
-        with open(os.path.join(self.state["node_dir"], f"Node-{self.id}.pkl"), "wb") as f:
-            pickle.dump(self, f)
+    @classmethod
+    def from_record(cls, record: dict, parent: "Node" = None):
+        """Restore the node from its record in the tree store, as the last child of the parent"""
+        state = {**parent.state, **record["state_diff"]} if parent is not None else record["state_diff"]
+        node = cls(
+            parent=None, state=state, action=record["action"], value=record["value"], max_depth=record["max_depth"]
+        )
+        node.parent = parent
+        node.id = record["id"]
+        node.depth = record["depth"]
+        node.visited = record["visited"]
+        node.raw_value = record["raw_value"]
+        node.raw_reward = record["raw_reward"]
+        node.normalized_reward = record["normalized_reward"]
+        node.output_dir = record["output_dir"]
+        if parent is not None:
+            parent.add_child(node)
+        return node
 
-    def load_node(self):
-        with open(os.path.join(self.state["node_dir"], f"Node-{self.id}.pkl"), "rb") as f:
-            return pickle.load(f)
+    def get_tree_store(self) -> TreeStore:
+        return get_tree_store(self.state["node_dir"])
+
+    def save_node(self):
+        self.get_tree_store().save_node(self)
 
     def get_depth(self):
         return self.depth
@@ -191,7 +212,7 @@ class Node:
             self.raw_value = reward["test_score"]
         self.value += reward["score"]
         self.visited += 1
-        self.save_node()
+        self.get_tree_store().update_stats(self)
 
     def get_role_path(self):
         fname = f"Node-{self.id}.json"
@@ -232,18 +253,30 @@ class Node:
         )
         new_state = self.state.copy()
         new_state["start_task_id"] += 1
-        for insight in insights:
-            new_role = role.model_copy()
-            node = Node(parent=self, state=new_state, action=insight, value=0)
-            node.save_new_role(new_role)
-            self.add_child(node)
+        with self.get_tree_store().transaction():
+            for insight in insights:
+                new_role = role.model_copy()
+                node = Node(parent=self, state=new_state, action=insight, value=0)
+                node.save_new_role(new_role)
+                self.add_child(node)
+
+    def get_shared_output_dir(self):
+        return f"{self.state['work_dir']}/{self.state['task']}"
+
+    def get_output_dir(self):
+        return self.output_dir or self.get_shared_output_dir()
+
+    def isolate_output_dir(self):
+        """Save the predictions of the node to its own dir, so that it can run along with the other nodes"""
+        self.output_dir = os.path.join(self.get_shared_output_dir(), f"Node-{self.id}")
+        os.makedirs(self.output_dir, exist_ok=True)
 
     def get_predictions_path(self, split):
         return os.path.join(self.state["node_dir"], f"Node-{self.id}-{split}_predictions.csv")
 
     def get_and_move_predictions(self, split):
         if not os.path.exists(self.get_predictions_path(split)):
-            pred_path = os.path.join(self.state["work_dir"], self.state["task"], f"{split}_predictions.csv")
+            pred_path = os.path.join(self.get_output_dir(), f"{split}_predictions.csv")
             shutil.copy(pred_path, self.get_predictions_path(split))
             os.remove(pred_path)
         return pd.read_csv(self.get_predictions_path(split))
@@ -268,6 +301,17 @@ class Node:
             self.get_and_move_predictions("test")
         return score_dict
 
+    def get_failed_score(self):
+        if self.state["low_is_better"]:
+            return {"test_score": np.inf, "dev_score": np.inf, "score": np.inf}
+        return {"test_score": 0, "dev_score": 0, "score": 0}
+
+    def get_failed_reward(self):
+        """The reward of a run that did not finish, e.g., cancelled by the rollout timeout"""
+        self.raw_reward = self.get_failed_score()
+        self.normalized_reward = {k: 0 for k in self.raw_reward}
+        return self.normalized_reward
+
     async def run_node(self, role: Experimenter = None):
         if self.is_terminal() and role is not None:
             if role.state_saved:
@@ -280,6 +324,8 @@ class Node:
             try:
                 if not role:
                     role = self.load_role()
+                    if self.output_dir:
+                        role.redirect_output_dir(self.get_shared_output_dir(), self.output_dir)
                     await load_execute_notebook(role)  # execute previous notebook's code
                     await role.run(with_message="continue")
                 else:
@@ -291,16 +337,17 @@ class Node:
             except TimeoutException as e:
                 mcts_logger.log("MCTS", f"Role-level timeout: {e}")
                 break
+            except asyncio.CancelledError:
+                if role:  # shut down the kernel of the role cancelled by the rollout timeout
+                    await role.execute_code.terminate()
+                raise
             except Exception as e:
                 mcts_logger.log("MCTS", f"Error in running the role: {e}")
                 num_runs += 1
 
         if not run_finished:
             mcts_logger.log("MCTS", f"Role {role.node_id} failed to run")
-            if self.state["low_is_better"]:
-                score_dict = {"test_score": np.inf, "dev_score": np.inf, "score": np.inf}
-            else:
-                score_dict = {"test_score": 0, "dev_score": 0, "score": 0}
+            score_dict = self.get_failed_score()
             self.raw_reward = score_dict
         if self.state["low_is_better"]:
             # normalized the score to be between 0 and 1, and higher is better
@@ -325,11 +372,16 @@ class BaseTreeSearch:
     node_order: list = []
     # insight generator
     instruction_generator: InstructionGenerator = None
+    # parallel rollouts
+    virtual_loss: int = 1
+    isolate_output: bool = False
 
     def __init__(self, root_node: Node, max_depth: int, use_fixed_insights: bool):
         self.root_node = root_node
         self.max_depth = max_depth
         self.use_fixed_insights = use_fixed_insights
+        self._expand_locks = defaultdict(asyncio.Lock)  # node id -> lock, one expansion per node
+        self._simulating: dict[str, asyncio.Future] = {}  # node id -> future done with its simulation
 
     def select(self, node: Node):
         node = self.best_child()
@@ -340,7 +392,8 @@ class BaseTreeSearch:
         raise NotImplementedError
 
     async def expand(self, node: Node, max_children=5):
-        await node.expand(max_children, self.instruction_generator)
+        async with self._expand_locks[node.id]:  # the rollouts selecting the node at once share its expansion
+            await node.expand(max_children, self.instruction_generator)
         if node not in self.children or not self.children[node]:
             self.children[node] = node.children
         return node.children
@@ -350,18 +403,47 @@ class BaseTreeSearch:
         mcts_logger.log("MCTS", f"Start simulating node {node.id}:")
         while node.children:
             node = np.random.choice(node.children)
+        if self.isolate_output and role is None:
+            node.isolate_output_dir()
         reward, result_dict = await node.run_node(role)
         mcts_logger.log("MCTS", f"Simulated node's reward: {reward}")
         # TODO: add new insights
         return reward
 
     def backpropagate(self, node: Node, reward: dict):
-        child_node = node
-        node.update(reward)
-        node = node.parent
+        with node.get_tree_store().transaction():
+            child_node = node
+            node.update(reward)
+            node = node.parent
+            while node is not None:
+                node.update(reward, child_node)
+                node, child_node = node.parent, node
+
+    def claim(self, node: Node):
+        """
+        Claim a leaf under the node to simulate, descending to a random child not being simulated as `simulate` does,
+        None if the node or all the leaves on the way are being simulated by the other rollouts
+        """
+        while node.children:
+            children = [child for child in node.children if child.id not in self._simulating]
+            if not children:
+                return None
+            node = np.random.choice(children)
+        if node.id in self._simulating:
+            return None
+        self._simulating[node.id] = asyncio.get_running_loop().create_future()
+        return node
+
+    def release(self, node: Node):
+        future = self._simulating.pop(node.id, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    @staticmethod
+    def add_virtual_loss(node: Node, loss: int):
         while node is not None:
-            node.update(reward, child_node)
-            node, child_node = node.parent, node
+            node.virtual_loss += loss
+            node = node.parent
 
     def best_path(self, root: Node):
         best_child = root
@@ -391,23 +473,28 @@ class BaseTreeSearch:
 
     def save_node_order(self, node_id: str):
         self.node_order.append(node_id)
-        with open(os.path.join(self.root_node.state["node_dir"], "node_order.json"), "w") as f:
-            json.dump(self.node_order, f)
+        self.root_node.get_tree_store().add_node_order(node_id)
 
     def load_node_order(self):
-        with open(os.path.join(self.root_node.state["node_dir"], "node_order.json"), "r") as f:
-            self.node_order = json.load(f)
+        store = self.root_node.get_tree_store()
+        self.node_order = store.load_node_order()
+        legacy_path = os.path.join(self.root_node.state["node_dir"], "node_order.json")
+        if not self.node_order and os.path.exists(legacy_path):
+            with open(legacy_path, "r") as f:
+                self.node_order = json.load(f)
+            with store.transaction():
+                for node_id in self.node_order:
+                    store.add_node_order(node_id)
 
     def get_score_order_dict(self):
         scores = {"dev": [], "test": [], "dev_raw": [], "test_raw": []}
+        records = {record["id"]: record for record in self.root_node.get_tree_store().load_records()}
         for node_id in self.node_order:
-            node = Node(parent=None, state=self.root_node.state, action=None, value=0)
-            node.id = node_id
-            node = node.load_node()
-            scores["dev"].append(node.normalized_reward["dev_score"])
-            scores["test"].append(node.normalized_reward["test_score"])
-            scores["dev_raw"].append(node.raw_reward["dev_score"])
-            scores["test_raw"].append(node.raw_reward["test_score"])
+            record = records[node_id]
+            scores["dev"].append(record["normalized_reward"]["dev_score"])
+            scores["test"].append(record["normalized_reward"]["test_score"])
+            scores["dev_raw"].append(record["raw_reward"]["dev_score"])
+            scores["test_raw"].append(record["raw_reward"]["test_score"])
         return scores
 
     async def search(self, state: dict, args):
@@ -432,6 +519,7 @@ class BaseTreeSearch:
             rollouts -= 2  # 2 rollouts for the initial tree
             if rollouts < 0:
                 raise ValueError("Rollouts must be greater than 2 if there is no tree to load")
+            root.get_tree_store().clear()  # the nodes of a previous search in the node dir
             self.children[root] = []
             reward = await self.simulate(root, role)
             self.backpropagate(root, reward)
@@ -443,21 +531,78 @@ class BaseTreeSearch:
             root = self.root_node
             self.load_node_order()
 
-        for _ in range(rollouts):  # number of rollouts
-            mcts_logger.log("MCTS", f"Start the next rollout {_+1}")
+        n_workers = max(args.n_workers, 1)
+        if n_workers == 1:
+            for _ in range(rollouts):  # number of rollouts
+                mcts_logger.log("MCTS", f"Start the next rollout {_+1}")
+                await self.rollout(root, args.rollout_timeout)
+        else:
+            await self.parallel_rollouts(root, rollouts, n_workers, args.rollout_timeout)
+        return self.best_path(root)
+
+    async def parallel_rollouts(self, root: Node, rollouts: int, n_workers: int, rollout_timeout: float = None):
+        """
+        Run the rollouts `n_workers` at a time, each with the kernel of its own role and its own output dir.
+        The selection of a rollout happens once a worker is free, seeing the stats of the finished rollouts and the
+        virtual losses of the running ones.
+        """
+        self.isolate_output = True
+        semaphore = asyncio.Semaphore(n_workers)
+
+        async def worker(idx: int):
+            async with semaphore:
+                mcts_logger.log("MCTS", f"Start the next rollout {idx + 1}")
+                try:
+                    await self.rollout(root, rollout_timeout)
+                except Exception as e:
+                    mcts_logger.log("MCTS", f"Rollout {idx + 1} failed: {e}")
+
+        await asyncio.gather(*[worker(idx) for idx in range(rollouts)])
+
+    async def rollout(self, root: Node, rollout_timeout: float = None):
+        """
+        Select, expand, simulate and backpropagate once. The nodes on the path of the rollout carry a virtual loss
+        until it backpropagates, and the simulation is scored as failed if it exceeds `rollout_timeout` seconds.
+        A node is simulated by one rollout at a time, the rollout selects again once one of the running simulations
+        is done if the selected node has no leaf left to simulate.
+        """
+        while True:
             node = self.select(root)
-            if node.is_terminal():
-                if node.raw_value == 0:
-                    reward = await self.simulate(node)
-                else:
-                    reward = {"test_score": node.raw_value, "score": node.raw_reward["score"]}
+            if node.is_terminal() and node.raw_value != 0:
+                reward = {"test_score": node.raw_value, "score": node.raw_reward["score"]}
                 mcts_logger.log("MCTS", f"Terminal node's reward: {reward}")
                 self.backpropagate(node, reward)
-            else:
-                node, reward = await self.expand_and_simulate(node)
-                # self.backpropagate(node, reward)
-            self.save_node_order(node.id)
-        return self.best_path(root)
+                self.save_node_order(node.id)
+                return node, reward
+            if node.id not in self._simulating:
+                if not node.is_terminal() and node.visited > 0:
+                    self.add_virtual_loss(node, self.virtual_loss)
+                    try:
+                        await self.expand(node)
+                    finally:
+                        self.add_virtual_loss(node, -self.virtual_loss)
+                leaf = self.claim(node)
+                if leaf is not None:
+                    node = leaf
+                    break
+            mcts_logger.log(
+                "MCTS", f"No leaf of node {node.id} left to simulate, select again once a simulation is done"
+            )
+            await asyncio.wait(set(self._simulating.values()), return_when=asyncio.FIRST_COMPLETED)
+
+        self.add_virtual_loss(node, self.virtual_loss)
+        try:
+            reward = await asyncio.wait_for(self.simulate(node), timeout=rollout_timeout)
+        except asyncio.TimeoutError:
+            mcts_logger.log("MCTS", f"Rollout of node {node.id} timed out after {rollout_timeout} seconds")
+            reward = node.get_failed_reward()
+        finally:
+            self.add_virtual_loss(node, -self.virtual_loss)
+            self.release(node)
+        # no await from here, the backpropagation is never interleaved with the selections of the other rollouts
+        self.backpropagate(node, reward)
+        self.save_node_order(node.id)
+        return node, reward
 
     async def expand_and_simulate(self, node: Node):
         # Expand and randomly select a child node, then simulate it
@@ -469,24 +614,58 @@ class BaseTreeSearch:
         return node, reward
 
     def load_tree(self):
+        records = self.root_node.get_tree_store().load_records()
+        if not records:
+            return self.load_pickled_tree()
+
+        nodes = {}
+        for record in records:  # the parents come first
+            parent = nodes.get(record["parent_id"])
+            if record["parent_id"] is not None and parent is None:
+                mcts_logger.log("MCTS", f"Skip node {record['id']}, its parent is not stored")
+                continue
+            nodes[record["id"]] = Node.from_record(record, parent)
+        if "0" not in nodes:
+            return False
+        self.root_node = nodes["0"]
+        self.children = {node: node.children for node in nodes.values()}
+        mcts_logger.log("MCTS", f"Loaded {len(nodes)} nodes from {self.root_node.get_tree_store().path}")
+        return True
+
+    def load_pickled_tree(self):
+        """Load the tree saved as `Node-{id}.pkl` files by the previous versions, and move it to the tree store"""
+
         def load_children_node(node: Node):
             mcts_logger.log("MCTS", f"Load node {node.id}'s child: {node.children}")
+            node.virtual_loss = 0  # the rollouts running when the search stopped are gone
             if node.is_terminal() or not node.children:
                 return
             for child in node.children:
-                child.load_node()
                 self.children[child] = child.children
                 load_children_node(child)
 
-        # Load all pkl files in the node_dir
-        all_pkl_files = os.listdir(self.root_node.state["node_dir"])
-        all_pkl_files = [f for f in all_pkl_files if f.endswith(".pkl")]
-        if os.path.exists(os.path.join(self.root_node.state["node_dir"], "Node-0.pkl")):
-            with open(os.path.join(self.root_node.state["node_dir"], "Node-0.pkl"), "rb") as f:
-                self.root_node = pickle.load(f)
-            self.children[self.root_node] = self.root_node.children
+        # Every pkl file holds the whole tree as it was when the node was saved, load the latest one, which also holds
+        # the nodes expanded by the rollouts still running when a parallel search stopped.
+        # The ancestors are saved right after the node on backpropagation, prefer them on a tie.
+        node_dir = self.root_node.state["node_dir"]
+        all_pkl_files = [
+            os.path.join(node_dir, f) for f in os.listdir(node_dir) if f.startswith("Node-") and f.endswith(".pkl")
+        ]
+        all_pkl_files.sort(key=lambda f: (os.stat(f).st_mtime_ns, -f.count("-")), reverse=True)
+        for pkl_file in all_pkl_files:
+            try:
+                with open(pkl_file, "rb") as f:
+                    node = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError) as e:  # interrupted while saving
+                mcts_logger.log("MCTS", f"Skip broken node file {pkl_file}: {e}")
+                continue
+            while node.parent is not None:
+                node = node.parent
+            self.root_node = node
+            self.children = {self.root_node: self.root_node.children}
             load_children_node(self.root_node)
-
-            if self.children:
-                return True
+            with self.root_node.get_tree_store().transaction() as store:
+                for node in self.children:
+                    store.save_node(node)
+            return True
         return False
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from metagpt.ext.sela.search.tree_search import Node
+
+TREE_STORE_FNAME = "tree.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    depth INTEGER NOT NULL,
+    max_depth INTEGER NOT NULL,
+    action TEXT,
+    state_diff TEXT NOT NULL,
+    visited INTEGER NOT NULL,
+    value REAL NOT NULL,
+    raw_value REAL NOT NULL,
+    raw_reward TEXT NOT NULL,
+    normalized_reward TEXT NOT NULL,
+    output_dir TEXT,
+    role_path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node_order (seq INTEGER PRIMARY KEY AUTOINCREMENT, node_id TEXT NOT NULL);
+"""
+
+STATS_COLUMNS = ("visited", "value", "raw_value", "raw_reward", "normalized_reward", "output_dir")
+JSON_COLUMNS = ("state_diff", "raw_reward", "normalized_reward")
+
+
+def get_state_diff(state: dict, parent_state: dict = None) -> dict:
+    """The items of the state differing from the state of the parent, e.g., the start task id of a child"""
+    if parent_state is None:
+        return state
+    return {k: v for k, v in state.items() if k not in parent_state or parent_state[k] != v}
+
+
+class TreeStore:
+    """
+    The nodes of a search tree in a SQLite database, `{node_dir}/tree.sqlite3`, one row per node holding its stats,
+    its state as a diff from the state of its parent and the path of its role checkpoint, along with the order the
+    nodes were simulated in. The stats of a node are updated in place on backpropagation.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._transaction_depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """Commit the writes within once, e.g., the updates of a backpropagation"""
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            self._commit()
+
+    def _commit(self):
+        if self._transaction_depth == 0:
+            self._conn.commit()
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False, default=float)
+
+    def _stats(self, node: Node) -> tuple:
+        return (
+            node.visited,
+            float(node.value),
+            float(node.raw_value),
+            self._dumps(node.raw_reward),
+            self._dumps(node.normalized_reward),
+            node.output_dir,
+        )
+
+    def save_node(self, node: Node):
+        parent_state = node.parent.state if node.parent is not None else None
+        row = (
+            node.id,
+            node.parent.id if node.parent is not None else None,
+            node.depth,
+            node.max_depth,
+            node.action,
+            self._dumps(get_state_diff(node.state, parent_state)),
+            *self._stats(node),
+            node.get_role_path(),
+        )
+        self._conn.execute(f"INSERT OR REPLACE INTO nodes VALUES ({','.join('?' * len(row))})", row)
+        self._commit()
+
+    def update_stats(self, node: Node):
+        """Update the visit and value stats of the node, saving the whole node if it is not stored yet"""
+        cursor = self._conn.execute(
+            f"UPDATE nodes SET {', '.join(f'{i} = ?' for i in STATS_COLUMNS)} WHERE id = ?",
+            (*self._stats(node), node.id),
+        )
+        if cursor.rowcount == 0:
+            self.save_node(node)
+        else:
+            self._commit()
+
+    def load_records(self) -> list[dict]:
+        """The stored nodes, the parents before their children and the siblings in the order they were expanded"""
+        cursor = self._conn.execute("SELECT * FROM nodes")
+        columns = [i[0] for i in cursor.description]
+        records = []
+        for row in cursor:
+            record = dict(zip(columns, row))
+            for column in JSON_COLUMNS:
+                record[column] = json.loads(record[column])
+            records.append(record)
+        records.sort(key=lambda r: (r["depth"], [int(i) for i in r["id"].split("-")]))
+        return records
+
+    def add_node_order(self, node_id: str):
+        self._conn.execute("INSERT INTO node_order (node_id) VALUES (?)", (node_id,))
+        self._commit()
+
+    def load_node_order(self) -> list[str]:
+        return [i for (i,) in self._conn.execute("SELECT node_id FROM node_order ORDER BY seq")]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM nodes")
+        self._conn.execute("DELETE FROM node_order")
+        self._commit()
+
+    def close(self):
+        self._conn.close()
+
+
+_tree_stores: dict[str, TreeStore] = {}
+
+
+def get_tree_store(node_dir: str) -> TreeStore:
+    """The tree store of the node dir, opened once per process"""
+    path = os.path.abspath(os.path.join(node_dir, TREE_STORE_FNAME))
+    if path not in _tree_stores:
+        _tree_stores[path] = TreeStore(path)
+    return _tree_stores[path]
@@ -6,9 +6,9 @@ from pathlib import Path
 import nbformat
 import yaml
 from loguru import logger as _logger
-from nbclient import NotebookClient
 from nbformat.notebooknode import NotebookNode
 
+from metagpt.actions.di.execute_nb_code import StreamNotebookClient
 from metagpt.roles.role import Role
 
 
@@ -92,7 +92,7 @@ def process_cells(nb: NotebookNode) -> NotebookNode:
 def save_notebook(role: Role, save_dir: str = "", name: str = "", save_to_depth=False):
     save_dir = Path(save_dir)
     tasks = role.planner.plan.tasks
-    nb = process_cells(role.execute_code.nb)
+    nb = process_cells(role.execute_code.full_notebook())
     os.makedirs(save_dir, exist_ok=True)
     file_path = save_dir / f"{name}.ipynb"
     nbformat.write(nb, file_path)
@@ -111,7 +111,7 @@ async def load_execute_notebook(role):
     codes = [task.code for task in tasks if task.code]
     executor = role.execute_code
     executor.nb = nbformat.v4.new_notebook()
-    executor.nb_client = NotebookClient(executor.nb, timeout=role.role_timeout)
+    executor.nb_client = StreamNotebookClient(executor.nb, timeout=role.role_timeout)
     # await executor.build()
     for code in codes:
         outputs, success = await executor.run(code)
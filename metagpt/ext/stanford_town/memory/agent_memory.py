@@ -2,17 +2,28 @@
 # -*- coding: utf-8 -*-
 # @Desc   : BasicMemory,AgentMemory实现
 
+import io
+import json
+import os
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Deque, Optional
 
-from pydantic import Field, field_serializer, model_validator
+import numpy as np
+from pydantic import Field, PrivateAttr, field_serializer, model_validator
 
 from metagpt.logs import logger
 from metagpt.memory.memory import Memory
 from metagpt.schema import Message
 from metagpt.utils.common import read_json_file, write_json_file
 
+NODES_FNAME = "nodes.jsonl"
+EMBEDDINGS_FNAME = "embeddings.npy"
+EMBEDDING_KEYS_FNAME = "embedding_keys.jsonl"
+KW_STRENGTH_FNAME = "kw_strength.json"
+
 
 class BasicMemory(Message):
     """
@@ -88,9 +99,153 @@ class BasicMemory(Message):
             ]
         )
 
+        basic_mem_obj["node_count"] = self.memory_count  # the GA names of the fields
+        basic_mem_obj["type"] = self.memory_type
+
         memory_dict[node_id] = basic_mem_obj
         return memory_dict
 
+    def to_record(self) -> dict:
+        """One line of `nodes.jsonl`, loaded back by `BasicMemory(**record)`"""
+        return self.model_dump(
+            include={
+                "memory_id",
+                "memory_count",
+                "type_count",
+                "memory_type",
+                "depth",
+                "created",
+                "expiration",
+                "subject",
+                "predicate",
+                "object",
+                "description",
+                "embedding_key",
+                "poignancy",
+                "keywords",
+                "filling",
+                "cause_by",
+            }
+        )
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_timestamp(time: Optional[datetime]) -> float:
+    """Seconds since the epoch of a naive datetime, NaN if not set"""
+    return (time - EPOCH).total_seconds() if time else np.nan
+
+
+class MemoryMatrix:
+    """
+    The memories of AgentMemory in contiguous arrays, row i being the i-th memory added, to score all the memories
+    with vectorized operations: unit-length embeddings, poignancy, created and last_accessed timestamps
+    """
+
+    def __init__(self):
+        self.nodes: list[BasicMemory] = []
+        self.rows: dict[str, int] = {}  # memory_id -> row
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._poignancy = np.zeros(0)
+        self._created = np.zeros(0)
+        self._last_accessed = np.zeros(0)
+        self._retrievable = np.zeros(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._embeddings[: len(self)]
+
+    @property
+    def poignancy(self) -> np.ndarray:
+        return self._poignancy[: len(self)]
+
+    @property
+    def created(self) -> np.ndarray:
+        return self._created[: len(self)]
+
+    @property
+    def last_accessed(self) -> np.ndarray:
+        return self._last_accessed[: len(self)]
+
+    def retrievable_rows(self) -> np.ndarray:
+        """Rows of the events and thoughts which are not idle, the memories searched by `new_agent_retrieve`"""
+        return np.flatnonzero(self._retrievable[: len(self)])
+
+    def get_node(self, memory_id: str) -> Optional[BasicMemory]:
+        row = self.rows.get(memory_id)
+        return None if row is None else self.nodes[row]
+
+    def add(self, node: BasicMemory, embedding: Optional[list[float]]):
+        row = len(self.nodes)
+        if embedding is not None and self._embeddings.shape[1] == 0:
+            self._embeddings = np.zeros((self._embeddings.shape[0], len(embedding)), dtype=np.float32)
+        if row == self._embeddings.shape[0]:
+            self._grow(max(64, 2 * row))
+
+        if embedding is not None and len(embedding) == self._embeddings.shape[1]:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            self._embeddings[row] = vector / norm if norm else vector
+        elif embedding is not None:
+            logger.warning(f"embedding of {node.memory_id} has {len(embedding)} dimensions, ignored")
+        self._poignancy[row] = node.poignancy
+        self._created[row] = to_timestamp(node.created)
+        self._last_accessed[row] = to_timestamp(node.last_accessed)
+        self._retrievable[row] = node.memory_type in ("event", "thought") and "idle" not in (node.embedding_key or "")
+        self.nodes.append(node)
+        self.rows[node.memory_id] = row
+
+    def remove(self, memory_id: str):
+        """Exclude a memory from the retrieval, the rows of the other memories are kept"""
+        row = self.rows.pop(memory_id, None)
+        if row is not None:
+            self._retrievable[row] = False
+
+    def touch(self, rows: np.ndarray, curr_time: datetime):
+        """Set the last_accessed time of the retrieved memories"""
+        self._last_accessed[rows] = to_timestamp(curr_time)
+        for row in rows:
+            self.nodes[row].last_accessed = curr_time
+
+    def _grow(self, capacity: int):
+        embeddings = np.zeros((capacity, self._embeddings.shape[1]), dtype=np.float32)
+        embeddings[: len(self)] = self.embeddings
+        self._embeddings = embeddings
+        for name in ("_poignancy", "_created", "_last_accessed", "_retrievable"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(self)] = old[: len(self)]
+            setattr(self, name, new)
+
+
+def append_npy(path: Path, rows: np.ndarray):
+    """Append rows to the 2-d array of a `.npy` file, its header is rewritten in place with the new shape"""
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            read_header, write_header = np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0
+        else:
+            read_header, write_header = np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        if not shape[0]:
+            f.seek(0)
+            f.truncate()
+            np.save(f, rows.astype(dtype))
+            return
+        header_size = f.tell()
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(rows, dtype=dtype).tobytes())
+        f.seek(0)
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order}
+        header["shape"] = (shape[0] + len(rows),) + tuple(shape[1:])
+        write_header(f, header)
+        if f.tell() != header_size:
+            raise ValueError(f"the header of {path} can not grow in place")
+
 
 class AgentMemory(Memory):
     """
@@ -98,28 +253,113 @@ class AgentMemory(Memory):
     1. embedding.json (Dict embedding_key:embedding)
     2. Node.json (Dict Node_id:Node)
     3. kw_strength.json
+    `save` stores them in a compact layout instead, and only appends the memories added since the last save:
+    1. embeddings.npy, float32 rows, and embedding_keys.jsonl, the key of each row, memory-mapped by `load`
+    2. nodes.jsonl, a node per line
+    3. kw_strength.json
+    `load` reads both layouts, `save_json` writes the GA one.
     """
 
     storage: list[BasicMemory] = []  # 重写Storage，存储BasicMemory所有节点
-    event_list: list[BasicMemory] = []  # 存储event记忆
-    thought_list: list[BasicMemory] = []  # 存储thought记忆
-    chat_list: list[BasicMemory] = []  # chat-related memory
+    event_list: Deque[BasicMemory] = Field(default_factory=deque)  # 存储event记忆，最新的在前
+    thought_list: Deque[BasicMemory] = Field(default_factory=deque)  # 存储thought记忆
+    chat_list: Deque[BasicMemory] = Field(default_factory=deque)  # chat-related memory
 
-    event_keywords: dict[str, list[BasicMemory]] = dict()  # 存储keywords
-    thought_keywords: dict[str, list[BasicMemory]] = dict()
-    chat_keywords: dict[str, list[BasicMemory]] = dict()
+    event_keywords: dict[str, Deque[BasicMemory]] = dict()  # 存储keywords
+    thought_keywords: dict[str, Deque[BasicMemory]] = dict()
+    chat_keywords: dict[str, Deque[BasicMemory]] = dict()
 
     kw_strength_event: dict[str, int] = dict()
     kw_strength_thought: dict[str, int] = dict()
 
     memory_saved: Optional[Path] = Field(default=None)
-    embeddings: dict[str, list[float]] = dict()
+    embeddings: dict[str, list[float]] = dict()  # the loaded ones are rows of the memory-mapped embeddings.npy
+
+    _matrix: MemoryMatrix = PrivateAttr(default_factory=MemoryMatrix)
+    # what the compact layout at `_persisted_path` holds: the number of nodes, and embedding key -> row
+    _persisted_path: Optional[Path] = PrivateAttr(default=None)
+    _persisted_nodes: int = PrivateAttr(default=0)
+    _persisted_rows: dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @field_serializer("embeddings")
+    def serialize_embeddings(self, embeddings: dict) -> dict[str, list[float]]:
+        return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in embeddings.items()}
+
+    @property
+    def matrix(self) -> MemoryMatrix:
+        return self._matrix
+
+    def get_node(self, memory_id: str) -> Optional[BasicMemory]:
+        return self._matrix.get_node(memory_id)
 
     def set_mem_path(self, memory_saved: Path):
         self.memory_saved = memory_saved
         self.load(memory_saved)
 
     def save(self, memory_saved: Path):
+        """
+        Store the memories in the compact layout, only the memories added since the last `save` or `load` of the same
+        path are appended, the whole layout is rewritten otherwise
+        """
+        memory_saved = Path(memory_saved)
+        nodes_path = memory_saved.joinpath(NODES_FNAME)
+        if (
+            self._persisted_path != memory_saved
+            or not nodes_path.exists()
+            or len(self.storage) < self._persisted_nodes
+            or (self._persisted_nodes and self.storage[self._persisted_nodes - 1].memory_count != self._persisted_nodes)
+        ):
+            self._write_all(memory_saved)
+        else:
+            self._append_new(memory_saved)
+
+        strength_json = dict()
+        strength_json["kw_strength_event"] = self.kw_strength_event
+        strength_json["kw_strength_thought"] = self.kw_strength_thought
+        write_json_file(memory_saved.joinpath(KW_STRENGTH_FNAME), strength_json)
+
+    def _write_all(self, memory_saved: Path):
+        memory_saved.mkdir(parents=True, exist_ok=True)
+        keys = list(self.embeddings.keys())
+        vectors = np.array([self.embeddings[i] for i in keys] or np.zeros((0, 0)), dtype=np.float32)
+
+        buffer = io.BytesIO()
+        np.save(buffer, vectors)
+        # written aside then moved, the memory-mapped embeddings of the previous layout stay valid
+        for fname, content in (
+            (EMBEDDINGS_FNAME, buffer.getvalue()),
+            (EMBEDDING_KEYS_FNAME, "".join(f"{json.dumps(i, ensure_ascii=False)}\n" for i in keys).encode("utf-8")),
+            (NODES_FNAME, "".join(self._dump_node(i) for i in self.storage).encode("utf-8")),
+        ):
+            tmp_path = memory_saved.joinpath(f"{fname}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, memory_saved.joinpath(fname))
+
+        self._persisted_path = memory_saved
+        self._persisted_nodes = len(self.storage)
+        self._persisted_rows = {key: row for row, key in enumerate(keys)}
+
+    def _append_new(self, memory_saved: Path):
+        new_keys = [i for i in self.embeddings if i not in self._persisted_rows]
+        if new_keys:
+            vectors = np.array([self.embeddings[i] for i in new_keys], dtype=np.float32)
+            append_npy(memory_saved.joinpath(EMBEDDINGS_FNAME), vectors)
+            with open(memory_saved.joinpath(EMBEDDING_KEYS_FNAME), "a", encoding="utf-8") as f:
+                f.write("".join(f"{json.dumps(i, ensure_ascii=False)}\n" for i in new_keys))
+            for key in new_keys:
+                self._persisted_rows[key] = len(self._persisted_rows)
+
+        new_nodes = self.storage[self._persisted_nodes :]
+        if new_nodes:
+            with open(memory_saved.joinpath(NODES_FNAME), "a", encoding="utf-8") as f:
+                f.write("".join(self._dump_node(i) for i in new_nodes))
+            self._persisted_nodes = len(self.storage)
+
+    @staticmethod
+    def _dump_node(node: BasicMemory) -> str:
+        return json.dumps(node.to_record(), ensure_ascii=False) + "\n"
+
+    def save_json(self, memory_saved: Path):
         """
         将MemoryBasic类存储为Nodes.json形式。复现GA中的Kw Strength.json形式
         这里添加一个路径即可
@@ -131,14 +371,46 @@ class AgentMemory(Memory):
             memory_node = memory_node.save_to_dict()
             memory_json.update(memory_node)
         write_json_file(memory_saved.joinpath("nodes.json"), memory_json)
-        write_json_file(memory_saved.joinpath("embeddings.json"), self.embeddings)
+        write_json_file(memory_saved.joinpath("embeddings.json"), self.serialize_embeddings(self.embeddings))
 
         strength_json = dict()
         strength_json["kw_strength_event"] = self.kw_strength_event
         strength_json["kw_strength_thought"] = self.kw_strength_thought
-        write_json_file(memory_saved.joinpath("kw_strength.json"), strength_json)
+        write_json_file(memory_saved.joinpath(KW_STRENGTH_FNAME), strength_json)
 
     def load(self, memory_saved: Path):
+        """
+        Load the compact layout if any, the GA JSON layout otherwise, which is converted by the next `save`
+        """
+        memory_saved = Path(memory_saved)
+        if memory_saved.joinpath(NODES_FNAME).exists():
+            self._load_compact(memory_saved)
+        else:
+            self.load_json(memory_saved)
+
+        strength_keywords_load = read_json_file(memory_saved.joinpath(KW_STRENGTH_FNAME))
+        if strength_keywords_load["kw_strength_event"]:
+            self.kw_strength_event = strength_keywords_load["kw_strength_event"]
+        if strength_keywords_load["kw_strength_thought"]:
+            self.kw_strength_thought = strength_keywords_load["kw_strength_thought"]
+
+    def _load_compact(self, memory_saved: Path):
+        with open(memory_saved.joinpath(EMBEDDING_KEYS_FNAME), encoding="utf-8") as f:
+            keys = [json.loads(i) for i in f]
+        vectors = np.load(memory_saved.joinpath(EMBEDDINGS_FNAME), mmap_mode="r") if keys else []
+        self.embeddings.update(zip(keys, vectors))
+
+        with open(memory_saved.joinpath(NODES_FNAME), encoding="utf-8") as f:
+            for line in f:
+                node = BasicMemory(**json.loads(line))
+                self._add_keywords(node)
+                self.add(node)
+
+        self._persisted_path = memory_saved
+        self._persisted_nodes = len(self.storage)
+        self._persisted_rows = {key: row for row, key in enumerate(keys)}
+
+    def load_json(self, memory_saved: Path):
         """
         将GA的JSON解析，填充到AgentMemory类之中
         """
@@ -171,30 +443,37 @@ class AgentMemory(Memory):
             if node_type == "chat":
                 self.add_chat(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
 
-        strength_keywords_load = read_json_file(memory_saved.joinpath("kw_strength.json"))
-        if strength_keywords_load["kw_strength_event"]:
-            self.kw_strength_event = strength_keywords_load["kw_strength_event"]
-        if strength_keywords_load["kw_strength_thought"]:
-            self.kw_strength_thought = strength_keywords_load["kw_strength_thought"]
-
     def add(self, memory_basic: BasicMemory):
         """
         Add a new message to storage, while updating the index
         重写add方法，修改原有的Message类为BasicMemory类，并添加不同的记忆类型添加方式
         """
-        if memory_basic.memory_id in self.storage:
+        if memory_basic.memory_id in self._matrix.rows:
             return
         self.storage.append(memory_basic)
+        self._index_message(memory_basic)
         if memory_basic.memory_type == "chat":
-            self.chat_list[0:0] = [memory_basic]
+            self.chat_list.appendleft(memory_basic)
             return
         if memory_basic.memory_type == "thought":
-            self.thought_list[0:0] = [memory_basic]
+            self.thought_list.appendleft(memory_basic)
             return
         if memory_basic.memory_type == "event":
-            self.event_list[0:0] = [memory_basic]
+            self.event_list.appendleft(memory_basic)
             return
 
+    def _add_keywords(self, memory_node: BasicMemory):
+        """Index the memory by its lowercase keywords, the latest first"""
+        keywords_index = {"chat": self.chat_keywords, "thought": self.thought_keywords, "event": self.event_keywords}
+        keywords_index = keywords_index.get(memory_node.memory_type)
+        if keywords_index is None:
+            return
+        for kw in [i.lower() for i in memory_node.keywords]:
+            if kw in keywords_index:
+                keywords_index[kw].appendleft(memory_node)
+            else:
+                keywords_index[kw] = deque([memory_node])
+
     def add_chat(
         self, created, expiration, s, p, o, content, keywords, poignancy, embedding_pair, filling, cause_by=""
     ):
@@ -226,16 +505,10 @@ class AgentMemory(Memory):
             cause_by=cause_by,
         )
 
-        keywords = [i.lower() for i in keywords]
-        for kw in keywords:
-            if kw in self.chat_keywords:
-                self.chat_keywords[kw][0:0] = [memory_node]
-            else:
-                self.chat_keywords[kw] = [memory_node]
-
-        self.add(memory_node)
+        self._add_keywords(memory_node)
 
         self.embeddings[embedding_pair[0]] = embedding_pair[1]
+        self.add(memory_node)
         return memory_node
 
     def add_thought(self, created, expiration, s, p, o, content, keywords, poignancy, embedding_pair, filling):
@@ -250,7 +523,7 @@ class AgentMemory(Memory):
 
         try:
             if filling:
-                depth_list = [memory_node.depth for memory_node in self.storage if memory_node.memory_id in filling]
+                depth_list = [self.get_node(i).depth for i in filling if i in self._matrix.rows]
                 depth += max(depth_list)
         except Exception as exp:
             logger.warning(f"filling init occur {exp}")
@@ -274,13 +547,9 @@ class AgentMemory(Memory):
             filling=filling,
         )
 
-        keywords = [i.lower() for i in keywords]
-        for kw in keywords:
-            if kw in self.thought_keywords:
-                self.thought_keywords[kw][0:0] = [memory_node]
-            else:
-                self.thought_keywords[kw] = [memory_node]
+        self._add_keywords(memory_node)
 
+        self.embeddings[embedding_pair[0]] = embedding_pair[1]
         self.add(memory_node)
 
         if f"{p} {o}" != "is idle":
@@ -289,8 +558,6 @@ class AgentMemory(Memory):
                     self.kw_strength_thought[kw] += 1
                 else:
                     self.kw_strength_thought[kw] = 1
-
-        self.embeddings[embedding_pair[0]] = embedding_pair[1]
         return memory_node
 
     def add_event(self, created, expiration, s, p, o, content, keywords, poignancy, embedding_pair, filling):
@@ -324,13 +591,9 @@ class AgentMemory(Memory):
             filling=filling,
         )
 
-        keywords = [i.lower() for i in keywords]
-        for kw in keywords:
-            if kw in self.event_keywords:
-                self.event_keywords[kw][0:0] = [memory_node]
-            else:
-                self.event_keywords[kw] = [memory_node]
+        self._add_keywords(memory_node)
 
+        self.embeddings[embedding_pair[0]] = embedding_pair[1]
         self.add(memory_node)
 
         if f"{p} {o}" != "is idle":
@@ -339,13 +602,23 @@ class AgentMemory(Memory):
                     self.kw_strength_event[kw] += 1
                 else:
                     self.kw_strength_event[kw] = 1
-
-        self.embeddings[embedding_pair[0]] = embedding_pair[1]
         return memory_node
 
+    def _reset_indexes(self):
+        super()._reset_indexes()
+        self._matrix = MemoryMatrix()
+
+    def _index_message(self, message: BasicMemory):
+        super()._index_message(message)
+        self._matrix.add(message, self.embeddings.get(message.embedding_key))
+
+    def _unindex_message(self, message: BasicMemory):
+        super()._unindex_message(message)
+        self._matrix.remove(message.memory_id)
+
     def get_summarized_latest_events(self, retention):
         ret_set = set()
-        for e_node in self.event_list[:retention]:
+        for e_node in islice(self.event_list, retention):
             ret_set.add(e_node.summary())
         return ret_set
 
@@ -4,127 +4,120 @@
 
 import datetime
 
+import numpy as np
 from numpy import dot
 from numpy.linalg import norm
 
-from metagpt.ext.stanford_town.memory.agent_memory import BasicMemory
-from metagpt.ext.stanford_town.utils.utils import get_embedding
+from metagpt.ext.stanford_town.memory.agent_memory import (
+    AgentMemory,
+    BasicMemory,
+    MemoryMatrix,
+    to_timestamp,
+)
+from metagpt.ext.stanford_town.utils.embedding import aget_embedding, aget_embeddings
 
+SECONDS_PER_DAY = 24 * 60 * 60
 
-def agent_retrieve(
-    agent_memory,
+
+async def agent_retrieve(
+    agent_memory: AgentMemory,
     curr_time: datetime.datetime,
     memory_forget: float,
     query: str,
     nodes: list[BasicMemory],
     topk: int = 4,
-) -> list[BasicMemory]:
+) -> list[str]:
     """
     Retrieve需要集合Role使用,原因在于Role才具有AgentMemory,scratch
     逻辑:Role调用该函数,self.rc.AgentMemory,self.rc.scratch.curr_time,self.rc.scratch.memory_forget
-    输入希望查询的内容与希望回顾的条数,返回TopK条高分记忆，即List[BasicMemory]
+    输入希望查询的内容与希望回顾的条数,返回TopK条高分记忆的memory_id
 
-    Score_lists示例
-    {
-        "memory": memories[i],             BasicMemory类
+    每条记忆的分数为三个因素归一化后之和:
         "importance": memories[i].poignancy
         "recency": 衰减因子计算结果
-        "relevance": 搜索结果
-    }
+        "relevance": 与query embedding的余弦相似度
     """
-    memories = nodes
-    agent_memory_embedding = agent_memory.embeddings
-    memories = sorted(memories, key=lambda memory_node: memory_node.last_accessed, reverse=True)
-
-    score_list = []
-    score_list = extract_importance(memories, score_list)
-    score_list = extract_recency(curr_time, memory_forget, score_list)
-    score_list = extract_relevance(agent_memory_embedding, query, score_list)
-    score_list = normalize_score_floats(score_list, 0, 1)
-
-    total_dict = {}
-    gw = [1, 1, 1]  # 三个因素的权重,重要性,近因性,相关性,
-    for i in range(len(score_list)):
-        total_score = (
-            score_list[i]["importance"] * gw[0] + score_list[i]["recency"] * gw[1] + score_list[i]["relevance"] * gw[2]
-        )
-        total_dict[score_list[i]["memory"].memory_id] = total_score
-
-    result = top_highest_x_values(total_dict, topk)
+    matrix = agent_memory.matrix
+    rows = np.fromiter((matrix.rows[i.memory_id] for i in nodes), dtype=np.int64, count=len(nodes))
+    query_embedding = await aget_embedding(query, warm_cache=agent_memory.embeddings)
+    top_rows = retrieve_rows(matrix, rows, query_embedding, curr_time, memory_forget, topk)
+    return [matrix.nodes[i].memory_id for i in top_rows]
 
-    return result  # 返回的是一个BasicMemory列表
 
-
-def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
+async def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
     """
     输入为role，关注点列表,返回记忆数量
     输出为字典，键为focus_point，值为对应的记忆列表
     """
+    matrix = role.memory.matrix
+    rows = matrix.retrievable_rows()
+    query_embeddings = await aget_embeddings(focus_points, warm_cache=role.memory.embeddings)
     retrieved = dict()
-    for focal_pt in focus_points:
-        nodes = [
-            [i.last_accessed, i]
-            for i in role.memory.event_list + role.memory.thought_list
-            if "idle" not in i.embedding_key
-        ]
-        nodes = sorted(nodes, key=lambda x: x[0])
-        nodes = [i for created, i in nodes]
-        results = agent_retrieve(
-            role.memory, role.scratch.curr_time, role.scratch.recency_decay, focal_pt, nodes, n_count
+    for focal_pt, query_embedding in zip(focus_points, query_embeddings):
+        top_rows = retrieve_rows(
+            matrix, rows, query_embedding, role.scratch.curr_time, role.scratch.recency_decay, n_count
         )
-        final_result = []
-        for n in results:
-            for i in role.memory.storage:
-                if i.memory_id == n:
-                    i.last_accessed = role.scratch.curr_time
-                    final_result.append(i)
-
-        retrieved[focal_pt] = final_result
+        matrix.touch(top_rows, role.scratch.curr_time)
+        retrieved[focal_pt] = [matrix.nodes[i] for i in top_rows]
 
     return retrieved
 
 
-def top_highest_x_values(d, x):
+def retrieve_rows(
+    matrix: MemoryMatrix,
+    rows: np.ndarray,
+    query_embedding: list[float],
+    curr_time: datetime.datetime,
+    memory_forget: float,
+    topk: int,
+    gw: tuple[float, float, float] = (1, 1, 1),
+) -> np.ndarray:
     """
-    输入字典，Topx
-    返回以字典值排序，字典键组成的List[BasicMemory]
+    在rows中检索，返回总分TopK的行号，按分数降序，同分时最近访问的在前
+    gw为三个因素的权重:重要性,近因性,相关性
     """
-    top_v = [item[0] for item in sorted(d.items(), key=lambda item: item[1], reverse=True)[:x]]
-    return top_v
+    if len(rows) == 0 or topk <= 0:
+        return rows[:0]
 
+    importance = matrix.poignancy[rows]
+    # 目前使用的现实世界过一天走一个衰减因子
+    day_count = np.floor((to_timestamp(curr_time) - matrix.created[rows]) / SECONDS_PER_DAY)
+    recency = memory_forget ** np.nan_to_num(day_count)
+    # 一次矩阵向量乘得到所有记忆的余弦相似度，矩阵中的embedding已经是单位向量
+    query = np.asarray(query_embedding, dtype=np.float32)
+    relevance = (matrix.embeddings @ (query / (norm(query) or 1)))[rows] if matrix.embeddings.shape[1] else 0.0
 
-def extract_importance(memories, score_list):
-    """
-    抽取重要性
-    """
-    for i in range(len(memories)):
-        score = {"memory": memories[i], "importance": memories[i].poignancy}
-        score_list.append(score)
-    return score_list
+    scores = (
+        normalize_floats(importance) * gw[0]
+        + normalize_floats(recency) * gw[1]
+        + normalize_floats(np.broadcast_to(relevance, rows.shape)) * gw[2]
+    )
+    top = top_k_indices(scores, topk, ties=-matrix.last_accessed[rows])
+    return rows[top]
 
 
-def extract_relevance(agent_memory_embedding, query, score_list):
+def top_k_indices(scores: np.ndarray, k: int, ties: np.ndarray = None) -> np.ndarray:
     """
-    抽取相关性
+    返回分数最高的k个下标，按分数降序，同分时按ties升序
     """
-    query_embedding = get_embedding(query)
-    # 进行
-    for i in range(len(score_list)):
-        node_embedding = agent_memory_embedding[score_list[i]["memory"].embedding_key]
-        result = cos_sim(node_embedding, query_embedding)
-        score_list[i]["relevance"] = result
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    keys = (-scores[top],) if ties is None else (ties[top], -scores[top])
+    return top[np.lexsort(keys)]
 
-    return score_list
 
-
-def extract_recency(curr_time, memory_forget, score_list):
+def normalize_floats(values: np.ndarray, target_min: float = 0, target_max: float = 1) -> np.ndarray:
     """
-    抽取近因性，目前使用的现实世界过一天走一个衰减因子
+    最小-最大归一化，所有值相同时取区间中值
     """
-    for i in range(len(score_list)):
-        day_count = (curr_time - score_list[i]["memory"].created).days
-        score_list[i]["recency"] = memory_forget**day_count
-    return score_list
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    min_val = values.min()
+    range_val = values.max() - min_val
+    if range_val == 0:
+        return np.full(len(values), (target_max - target_min) / 2)
+    return (values - min_val) * (target_max - target_min) / range_val + target_min
 
 
 def cos_sim(a, b):
@@ -132,49 +125,3 @@ def cos_sim(a, b):
     计算余弦相似度
     """
     return dot(a, b) / (norm(a) * norm(b))
-
-
-def normalize_list_floats(single_list, target_min, target_max):
-    """
-    单个列表归一化
-    """
-    if len(single_list) == 0:
-        return []
-
-    min_val = min(single_list)
-    max_val = max(single_list)
-    range_val = max_val - min_val
-
-    if range_val == 0:
-        for i in range(len(single_list)):
-            single_list[i] = (target_max - target_min) / 2
-    else:
-        for i in range(len(single_list)):
-            single_list[i] = (single_list[i] - min_val) * (target_max - target_min) / range_val + target_min
-    return single_list
-
-
-def normalize_score_floats(score_list, target_min, target_max):
-    """
-    整体归一化
-    """
-    importance_list = []
-    relevance_list = []
-    recency_list = []
-
-    for i in range(len(score_list)):
-        importance_list.append(score_list[i]["importance"])
-        relevance_list.append(score_list[i]["relevance"])
-        recency_list.append(score_list[i]["recency"])
-
-    # 进行归一化操作
-    importance_list = normalize_list_floats(importance_list, target_min, target_max)
-    relevance_list = normalize_list_floats(relevance_list, target_min, target_max)
-    recency_list = normalize_list_floats(recency_list, target_min, target_max)
-
-    for i in range(len(score_list)):
-        score_list[i]["importance"] = importance_list[i]
-        score_list[i]["relevance"] = relevance_list[i]
-        score_list[i]["recency"] = recency_list[i]
-
-    return score_list
@@ -15,7 +15,7 @@ from metagpt.ext.stanford_town.actions.run_reflect_action import (
     AgentPlanThoughtOnConvo,
 )
 from metagpt.ext.stanford_town.memory.retrieve import new_agent_retrieve
-from metagpt.ext.stanford_town.utils.utils import get_embedding
+from metagpt.ext.stanford_town.utils.embedding import aget_embedding
 from metagpt.logs import logger
 
 
@@ -105,7 +105,7 @@ async def run_reflect(role: "STRole"):
     focal_points = await generate_focal_points(role, 3)
     # Retrieve the relevant Nodesobject for each of the focal points.
     # <retrieved> has keys of focal points, and values of the associated Nodes.
-    retrieved = new_agent_retrieve(role, focal_points)
+    retrieved = await new_agent_retrieve(role, focal_points)
 
     # For each of the focal points, generate thoughts and save it in the
     # agent's memory.
@@ -122,7 +122,7 @@ async def run_reflect(role: "STRole"):
             s, p, o = await generate_action_event_triple("(" + thought + ")", role)
             keywords = set([s, p, o])
             thought_poignancy = await generate_poig_score(role, "thought", thought)
-            thought_embedding_pair = (thought, get_embedding(thought))
+            thought_embedding_pair = (thought, await aget_embedding(thought, warm_cache=role.memory.embeddings))
 
             role.memory.add_thought(
                 created, expiration, s, p, o, thought, keywords, thought_poignancy, thought_embedding_pair, evidence
@@ -147,7 +147,7 @@ def reflection_trigger(role: "STRole"):
     """
     logger.info(f"{role.scratch.name} role.scratch.importance_trigger_curr:: {role.scratch.importance_trigger_curr}"),
 
-    if role.scratch.importance_trigger_curr <= 0 and [] != role.memory.event_list + role.memory.thought_list:
+    if role.scratch.importance_trigger_curr <= 0 and (role.memory.event_list or role.memory.thought_list):
         return True
     return False
 
@@ -206,7 +206,10 @@ async def role_reflect(role: "STRole"):
             s, p, o = await generate_action_event_triple(planning_thought, role)
             keywords = set([s, p, o])
             thought_poignancy = await generate_poig_score(role, "thought", planning_thought)
-            thought_embedding_pair = (planning_thought, get_embedding(planning_thought))
+            thought_embedding_pair = (
+                planning_thought,
+                await aget_embedding(planning_thought, warm_cache=role.memory.embeddings),
+            )
 
             role.memory.add_thought(
                 created,
@@ -229,7 +232,10 @@ async def role_reflect(role: "STRole"):
             s, p, o = await generate_action_event_triple(memo_thought, role)
             keywords = set([s, p, o])
             thought_poignancy = await generate_poig_score(role, "thought", memo_thought)
-            thought_embedding_pair = (memo_thought, get_embedding(memo_thought))
+            thought_embedding_pair = (
+                memo_thought,
+                await aget_embedding(memo_thought, warm_cache=role.memory.embeddings),
+            )
 
             role.memory.add_thought(
                 created,
@@ -10,15 +10,12 @@ Do the steps following:
 - reflect, do the High-level thinking based on memories and re-add into the memory
 - execute, move or else in the Maze
 """
-import math
 import random
-import time
 from datetime import datetime, timedelta
-from operator import itemgetter
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
-from pydantic import ConfigDict, Field, field_validator, model_validator
+from pydantic import ConfigDict, Field, PrivateAttr, field_validator, model_validator
 
 from metagpt.actions.add_requirement import UserRequirement
 from metagpt.environment.stanford_town.env_space import (
@@ -37,13 +34,13 @@ from metagpt.ext.stanford_town.memory.scratch import Scratch
 from metagpt.ext.stanford_town.memory.spatial_memory import MemoryTree
 from metagpt.ext.stanford_town.plan.st_plan import plan
 from metagpt.ext.stanford_town.reflect.reflect import generate_poig_score, role_reflect
-from metagpt.ext.stanford_town.utils.const import STORAGE_PATH, collision_block_id
-from metagpt.ext.stanford_town.utils.mg_ga_transform import (
-    get_role_environment,
-    save_environment,
-    save_movement,
+from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
+from metagpt.ext.stanford_town.utils.embedding import aget_embedding
+from metagpt.ext.stanford_town.utils.mg_ga_transform import get_role_environment
+from metagpt.ext.stanford_town.utils.step_barrier import (
+    FrontendStepBarrier,
+    StepBarrier,
 )
-from metagpt.ext.stanford_town.utils.utils import get_embedding, path_finder
 from metagpt.logs import logger
 from metagpt.roles.role import Role, RoleContext
 from metagpt.schema import Message
@@ -92,6 +89,8 @@ class STRole(Role):
 
     role_storage_path: Optional[Path] = Field(default=None)
 
+    _step_barrier: Optional[StepBarrier] = PrivateAttr(default=None)
+
     @field_validator("curr_time", mode="before")
     @classmethod
     def check_curr_time(cls, curr_time: str) -> datetime:
@@ -131,6 +130,17 @@ class STRole(Role):
             )
         )
 
+    @property
+    def step_barrier(self) -> StepBarrier:
+        """The barrier shared by the roles of the simulation, a frontend one of the role only if not set"""
+        if not self._step_barrier:
+            self._step_barrier = FrontendStepBarrier(self.sim_code, role_names=[self.name])
+        return self._step_barrier
+
+    def set_step_barrier(self, step_barrier: StepBarrier):
+        step_barrier.add_role(self.name)
+        self._step_barrier = step_barrier
+
     @property
     def scratch(self):
         return self.rc.scratch
@@ -187,10 +197,12 @@ class STRole(Role):
         news = []
         if not news:
             news = self.rc.msg_buffer.pop_all()
-        old_messages = [] if ignore_memory else self.rc.memory.get()
         # Filter out messages of interest.
         self.rc.news = [
-            n for n in news if (n.cause_by in self.rc.watch or self.name in n.send_to) and n not in old_messages
+            n
+            for n in news
+            if (n.cause_by in self.rc.watch or self.name in n.send_to)
+            and (ignore_memory or not self.rc.memory.contains(n))
         ]
 
         if len(self.rc.news) == 1 and self.rc.news[0].cause_by == any_to_str(UserRequirement):
@@ -217,7 +229,7 @@ class STRole(Role):
         s, p, o = await run_event_triple.run(thought, self)
         keywords = set([s, p, o])
         thought_poignancy = await generate_poig_score(self, "event", whisper)
-        thought_embedding_pair = (thought, get_embedding(thought))
+        thought_embedding_pair = (thought, await aget_embedding(thought, warm_cache=self.rc.memory.embeddings))
         self.rc.memory.add_thought(
             created, expiration, s, p, o, thought, keywords, thought_poignancy, thought_embedding_pair, None
         )
@@ -237,61 +249,27 @@ class STRole(Role):
         OUTPUT:
             ret_events: a list of <BasicMemory> that are perceived and new.
         """
-        # PERCEIVE SPACE
-        # We get the nearby tiles given our current tile and the persona's vision
-        # radius.
-        nearby_tiles = self.rc.env.observe(
+        # PERCEIVE SPACE AND EVENTS
+        # The env returns the spaces within the persona's vision radius, and the
+        # <att_bandwidth> closest events taking place in the same arena as the
+        # persona's current arena, in one call. Every event is perceived once even
+        # if an object is extended across multiple tiles. If the bandwidth is
+        # larger, then it means the persona can perceive more elements within a
+        # small area.
+        perception = self.rc.env.observe(
             EnvObsParams(
-                obs_type=EnvObsType.TILE_NBR, coord=self.rc.scratch.curr_tile, vision_radius=self.rc.scratch.vision_r
+                obs_type=EnvObsType.PERCEIVE,
+                coord=self.rc.scratch.curr_tile,
+                vision_radius=self.rc.scratch.vision_r,
+                att_bandwidth=self.rc.scratch.att_bandwidth,
             )
         )
 
         # We then store the perceived space. Note that the s_mem of the persona is
         # in the form of a tree constructed using dictionaries.
-        for tile in nearby_tiles:
-            tile_info = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.GET_TITLE, coord=tile))
+        for tile_info in perception["spaces"]:
             self.rc.spatial_memory.add_tile_info(tile_info)
-
-        # PERCEIVE EVENTS.
-        # We will perceive events that take place in the same arena as the
-        # persona's current arena.
-
-        curr_arena_path = self.rc.env.observe(
-            EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=self.rc.scratch.curr_tile, level="arena")
-        )
-
-        # We do not perceive the same event twice (this can happen if an object is
-        # extended across multiple tiles).
-        percept_events_set = set()
-        # We will order our percept based on the distance, with the closest ones
-        # getting priorities.
-        percept_events_list = []
-        # First, we put all events that are occurring in the nearby tiles into the
-        # percept_events_list
-        for tile in nearby_tiles:
-            tile_details = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.GET_TITLE, coord=tile))
-            if tile_details["events"]:
-                tmp_arena_path = self.rc.env.observe(
-                    EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=tile, level="arena")
-                )
-
-                if tmp_arena_path == curr_arena_path:
-                    # This calculates the distance between the persona's current tile,
-                    # and the target tile.
-                    dist = math.dist([tile[0], tile[1]], [self.rc.scratch.curr_tile[0], self.rc.scratch.curr_tile[1]])
-                    # Add any relevant events to our temp set/list with the distant info.
-                    for event in tile_details["events"]:
-                        if event not in percept_events_set:
-                            percept_events_list += [[dist, event]]
-                            percept_events_set.add(event)
-
-        # We sort, and perceive only self.rc.scratch.att_bandwidth of the closest
-        # events. If the bandwidth is larger, then it means the persona can perceive
-        # more elements within a small area.
-        percept_events_list = sorted(percept_events_list, key=itemgetter(0))
-        perceived_events = []
-        for dist, event in percept_events_list[: self.rc.scratch.att_bandwidth]:
-            perceived_events += [event]
+        perceived_events = perception["events"]
 
         # Storing events.
         # <ret_events> is a list of <BasicMemory> instances from the persona's
@@ -326,10 +304,7 @@ class STRole(Role):
                 desc_embedding_in = desc
                 if "(" in desc:
                     desc_embedding_in = desc_embedding_in.split("(")[1].split(")")[0].strip()
-                if desc_embedding_in in self.rc.memory.embeddings:
-                    event_embedding = self.rc.memory.embeddings[desc_embedding_in]
-                else:
-                    event_embedding = get_embedding(desc_embedding_in)
+                event_embedding = await aget_embedding(desc_embedding_in, warm_cache=self.rc.memory.embeddings)
                 event_embedding_pair = (desc_embedding_in, event_embedding)
 
                 # Get event poignancy.
@@ -341,10 +316,9 @@ class STRole(Role):
                 chat_node_ids = []
                 if p_event[0] == f"{self.name}" and p_event[1] == "chat with":
                     curr_event = self.rc.scratch.act_event
-                    if self.rc.scratch.act_description in self.rc.memory.embeddings:
-                        chat_embedding = self.rc.memory.embeddings[self.rc.scratch.act_description]
-                    else:
-                        chat_embedding = get_embedding(self.rc.scratch.act_description)
+                    chat_embedding = await aget_embedding(
+                        self.rc.scratch.act_description, warm_cache=self.rc.memory.embeddings
+                    )
                     chat_embedding_pair = (self.rc.scratch.act_description, chat_embedding)
                     chat_poignancy = await generate_poig_score(self, "chat", self.rc.scratch.act_description)
                     chat_node = self.rc.memory.add_chat(
@@ -402,6 +376,10 @@ class STRole(Role):
         # TODO re-add result to memory
         # 已封装到Reflect函数之中
 
+    def _find_path(self, start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+        """The shortest path from `start` to `end`, both included, empty if `end` is unreachable"""
+        return self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.SHORTEST_PATH, coord=start, target_coord=end))
+
     async def execute(self, plan: str):
         """
         Args:
@@ -427,26 +405,15 @@ class STRole(Role):
             if "<persona>" in plan:
                 # Executing persona-persona interaction.
                 target_p_tile = roles[plan.split("<persona>")[-1].strip()].scratch.curr_tile
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                potential_path = path_finder(
-                    collision_maze, self.rc.scratch.curr_tile, target_p_tile, collision_block_id
-                )
+                potential_path = self._find_path(self.rc.scratch.curr_tile, target_p_tile)
                 if len(potential_path) <= 2:
-                    target_tiles = [potential_path[0]]
+                    target_tiles = [potential_path[0] if potential_path else target_p_tile]
                 else:
-                    collision_maze = self.rc.env.observe()["collision_maze"]
-                    potential_1 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2)],
-                        collision_block_id,
+                    potential_1 = self._find_path(
+                        self.rc.scratch.curr_tile, potential_path[int(len(potential_path) / 2)]
                     )
-
-                    potential_2 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2) + 1],
-                        collision_block_id,
+                    potential_2 = self._find_path(
+                        self.rc.scratch.curr_tile, potential_path[int(len(potential_path) / 2) + 1]
                     )
                     if len(potential_1) <= len(potential_2):
                         target_tiles = [potential_path[int(len(potential_path) / 2)]]
@@ -512,16 +479,15 @@ class STRole(Role):
             closest_target_tile = None
             path = None
             for i in target_tiles:
-                # path_finder takes a collision_mze and the curr_tile coordinate as
-                # an input, and returns a list of coordinate tuples that becomes the
-                # path.
+                # The env finds the shortest path over its collision mask, and returns
+                # a list of coordinate tuples that becomes the path, empty if the tile
+                # is unreachable.
                 # e.g., [(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)...]
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                curr_path = path_finder(collision_maze, curr_tile, i, collision_block_id)
+                curr_path = self._find_path(curr_tile, i)
                 if not closest_target_tile:
                     closest_target_tile = i
                     path = curr_path
-                elif len(curr_path) < len(path):
+                elif curr_path and (not path or len(curr_path) < len(path)):
                     closest_target_tile = i
                     path = curr_path
 
@@ -544,7 +510,7 @@ class STRole(Role):
         return execution
 
     async def update_role_env(self) -> bool:
-        role_env = get_role_environment(self.sim_code, self.name, self.step)
+        role_env = await self.step_barrier.get_role_environment(self.name, self.step)
         ret = True
         if role_env:
             for key, val in self.game_obj_cleanup.items():
@@ -584,19 +550,43 @@ class STRole(Role):
             self.rc.scratch.curr_tile = new_tile
         else:
             ret = False
-            time.sleep(1)
-            logger.warning(
-                f"{self.sim_code}/environment/{self.step}.json not exist or parses failed, " f"sleep 1s and re-check"
-            )
+            logger.warning(f"{self.sim_code}/environment/{self.step}.json has no tile of {self.name}")
         return ret
 
     async def _react(self) -> Message:
+        next_tile, role_move = None, None
+        try:
+            next_tile, role_move = await self._react_step()
+        finally:
+            if role_move is None:
+                # the role stays in place, its movement is still submitted so the step of the other roles commits
+                next_tile = self.scratch.curr_tile
+                role_move = {
+                    "movement": next_tile,
+                    "pronunciatio": self.scratch.act_pronunciatio,
+                    "description": self.scratch.act_description,
+                    "chat": self.scratch.chat,
+                }
+            await self.step_barrier.submit(self.name, self.step, role_move, next_tile, self.curr_time)
+
+            # step update
+            logger.info(
+                f"Role: {self.name} run at {self.step} step on {self.curr_time} at tile: {self.scratch.curr_tile}"
+            )
+            self.step += 1
+            self.curr_time += timedelta(seconds=self.sec_per_step)
+            self.inner_voice = False
+
+        return DummyMessage()
+
+    async def _react_step(self) -> tuple[Optional[tuple[int, int]], Optional[dict]]:
+        """run the step of the role, return its next tile and movement, None if it has no environment at the step"""
         # update role env
         ret = await self.update_role_env()
         if not ret:
             # TODO add message
             logger.info(f"Role: {self.name} update_role_env return False")
-            return DummyMessage()
+            return None, None
 
         new_day = False
         if not self.scratch.curr_time or self.inner_voice:
@@ -624,17 +614,7 @@ class STRole(Role):
             "description": description,
             "chat": self.scratch.chat,
         }
-        save_movement(self.name, role_move, step=self.step, sim_code=self.sim_code, curr_time=self.curr_time)
-
-        # step update
-        logger.info(f"Role: {self.name} run at {self.step} step on {self.curr_time} at tile: {self.scratch.curr_tile}")
-        self.step += 1
-        save_environment(self.name, self.step, self.sim_code, next_tile)
-        self.curr_time += timedelta(seconds=self.sec_per_step)
-        self.inner_voice = False
-
-        time.sleep(0.5)
-        return DummyMessage()
+        return next_tile, role_move
 
 
 STRoleContext.model_rebuild()
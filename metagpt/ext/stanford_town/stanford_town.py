@@ -4,16 +4,25 @@
 
 from typing import Any, Optional
 
+from pydantic import Field, PrivateAttr
+
 from metagpt.context import Context
 from metagpt.environment import StanfordTownEnv
 from metagpt.ext.stanford_town.roles.st_role import STRole
 from metagpt.ext.stanford_town.utils.const import MAZE_ASSET_PATH
+from metagpt.ext.stanford_town.utils.step_barrier import (
+    FrontendStepBarrier,
+    StepBarrier,
+)
 from metagpt.logs import logger
 from metagpt.team import Team
 
 
 class StanfordTown(Team):
     env: Optional[StanfordTownEnv] = None
+    headless: bool = Field(default=False, description="run without the frontend, not waiting on it")
+
+    _step_barrier: Optional[StepBarrier] = PrivateAttr(default=None)
 
     def __init__(self, context: Context = None, **data: Any):
         super(Team, self).__init__(**data)
@@ -27,10 +36,14 @@ class StanfordTown(Team):
         logger.warning(f"The Town add {len(roles)} roles, and start to operate.")
         super().hire(roles)
         for role in roles:
+            if not self._step_barrier:
+                barrier_cls = StepBarrier if self.headless else FrontendStepBarrier
+                self._step_barrier = barrier_cls(sim_code=role.sim_code)
+            role.set_step_barrier(self._step_barrier)
             await role.init_curr_tile()
 
     async def run(self, n_round: int = 3):
-        """Run company until target round or no money"""
+        """Run company until target round or no money, the roles run each step concurrently"""
         while n_round > 0:
             n_round -= 1
             logger.debug(f"{n_round=}")
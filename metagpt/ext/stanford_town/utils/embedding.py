@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : async embedding service of the agents: the concurrent requests are coalesced into batch calls, and the
+#           embeddings are cached on disk by content hash, shared across agents and simulation runs
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+
+from metagpt.config2 import config
+from metagpt.const import CONFIG_ROOT
+from metagpt.logs import logger
+
+EMBEDDING_CACHE_PATH = CONFIG_ROOT / "st_embedding_cache.sqlite3"
+
+
+class BaseEmbeddingBackend(ABC):
+    """Embedding model, `model` is part of the cache key"""
+
+    model: str
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return the embeddings of `texts`, in the same order"""
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class OpenAIEmbeddingBackend(BaseEmbeddingBackend):
+    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = None):
+        self.model = model
+        self.api_key = api_key or config.llm.api_key
+        self._client: Optional[OpenAI] = None
+        self._aclient: Optional[AsyncOpenAI] = None
+
+    @retry(wait=wait_random_exponential(min=1, max=10), stop=stop_after_attempt(3), reraise=True)
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self._client = self._client or OpenAI(api_key=self.api_key)
+        rsp = self._client.embeddings.create(input=texts, model=self.model)
+        return [i.embedding for i in sorted(rsp.data, key=lambda i: i.index)]
+
+    @retry(wait=wait_random_exponential(min=1, max=10), stop=stop_after_attempt(3), reraise=True)
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        self._aclient = self._aclient or AsyncOpenAI(api_key=self.api_key)
+        rsp = await self._aclient.embeddings.create(input=texts, model=self.model)
+        return [i.embedding for i in sorted(rsp.data, key=lambda i: i.index)]
+
+
+class HashEmbeddingBackend(BaseEmbeddingBackend):
+    """Deterministic local embeddings, hashed bag of words, to run or replay simulations offline"""
+
+    def __init__(self, dimensions: int = 1536):
+        self.dimensions = dimensions
+        self.model = f"hash-{dimensions}"
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(i) for i in texts]
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed(texts)
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1 if digest[4] & 1 else -1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class EmbeddingCache:
+    """
+    Embeddings stored as float32 blobs in a SQLite database, keyed by the hash of the model and the text, queried in a
+    worker thread by the coroutines not to block the event loop
+    """
+
+    def __init__(self, path: Union[str, Path, None] = EMBEDDING_CACHE_PATH):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        if path:
+            self._conn.execute("PRAGMA journal_mode=WAL")  # shared by the simulations running at the same time
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32).tolist()) for key, vector in rows)
+        return found
+
+    def set_many(self, items: dict[str, list[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()),
+            )
+            self._conn.commit()
+
+    async def aget_many(self, keys: list[str]) -> dict[str, list[float]]:
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset_many(self, items: dict[str, list[float]]):
+        await asyncio.to_thread(self.set_many, items)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService:
+    """
+    Embeddings of the texts, looked up in order in:
+        1. the warm cache given by the caller, usually `AgentMemory.embeddings`
+        2. the disk cache
+        3. the backend, the texts requested within `batch_wait` seconds are embedded by one call of up to
+           `batch_size` texts, and a text requested again while being embedded waits for the same call
+    The embeddings of the backend are rounded to float32, the precision of the disk cache, so that a text always gets
+    the same embedding whether it is cached or not.
+    """
+
+    def __init__(
+        self,
+        backend: BaseEmbeddingBackend = None,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+        batch_wait: float = 0.01,
+    ):
+        self.backend = backend or OpenAIEmbeddingBackend()
+        self.cache = cache or EmbeddingCache(path=None)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._inflight: dict[str, asyncio.Future] = {}  # key -> embedding, of the texts queued or being embedded
+        self._queue: dict[str, str] = {}  # key -> text, waiting for the next batch
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_tasks: set[asyncio.Task] = set()  # referenced until done, the loop only keeps weak references
+
+    async def aget_embedding(self, text: str, warm_cache: dict[str, list[float]] = None) -> list[float]:
+        return (await self.aget_embeddings([text], warm_cache=warm_cache))[0]
+
+    async def aget_embeddings(self, texts: list[str], warm_cache: dict[str, list[float]] = None) -> list[list[float]]:
+        """Return the embeddings of `texts`, in the same order"""
+        warm_cache = warm_cache or {}
+        keys = {i: self.cache.make_key(self.backend.model, self._clean(i)) for i in texts if i not in warm_cache}
+        found = await self.cache.aget_many(list(set(keys.values())))
+
+        futures = {}
+        for text, key in keys.items():
+            if key in found or key in futures:
+                continue
+            if key not in self._inflight:
+                self._inflight[key] = asyncio.get_running_loop().create_future()
+                self._queue[key] = self._clean(text)
+            futures[key] = self._inflight[key]
+        if futures:
+            self._schedule_flush()
+            found.update(zip(futures.keys(), await asyncio.gather(*futures.values())))
+        return [warm_cache[i] if i in warm_cache else found[keys[i]] for i in texts]
+
+    def get_embedding(self, text: str) -> list[float]:
+        """Blocking version of `aget_embedding` without batching, prefer `aget_embedding` in coroutines"""
+        key = self.cache.make_key(self.backend.model, self._clean(text))
+        found = self.cache.get_many([key])
+        if key not in found:
+            embedding = np.asarray(self.backend.embed([self._clean(text)])[0], dtype=np.float32).tolist()
+            self.cache.set_many({key: embedding})
+            found[key] = embedding
+        return found[key]
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        text = text.replace("\n", " ")
+        return text or "this is blank"
+
+    def _schedule_flush(self):
+        if len(self._queue) >= self.batch_size:
+            task = asyncio.create_task(self._flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        elif not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush(delay=self.batch_wait))
+
+    async def _flush(self, delay: float = 0):
+        if delay:
+            await asyncio.sleep(delay)
+        while self._queue:
+            batch = dict(list(self._queue.items())[: self.batch_size])
+            for key in batch:
+                del self._queue[key]
+            await self._embed_batch(batch)
+
+    async def _embed_batch(self, batch: dict[str, str]):
+        try:
+            embeddings = await self.backend.aembed(list(batch.values()))
+            embeddings = {k: np.asarray(v, dtype=np.float32).tolist() for k, v in zip(batch.keys(), embeddings)}
+            await self.cache.aset_many(embeddings)
+        except Exception as e:
+            logger.warning(f"embed {len(batch)} texts failed, exp: {e}")
+            for key in batch:
+                self._inflight.pop(key).set_exception(e)
+            return
+        for key, embedding in embeddings.items():
+            self._inflight.pop(key).set_result(embedding)
+
+
+_embedding_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the embedding service shared by the agents, an OpenAI backend with the default disk cache if not set"""
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService(cache=EmbeddingCache())
+    return _embedding_service
+
+
+def set_embedding_service(service: Optional[EmbeddingService]):
+    global _embedding_service
+    _embedding_service = service
+
+
+def init_embedding_service(
+    backend: str = "openai", cache_path: Union[str, Path, None] = EMBEDDING_CACHE_PATH
+) -> EmbeddingService:
+    """Set the shared embedding service, `backend` is `openai` or `hash`, no disk cache if `cache_path` is empty"""
+    backends = {"openai": OpenAIEmbeddingBackend, "hash": HashEmbeddingBackend}
+    if backend not in backends:
+        raise ValueError(f"unknown embedding backend: {backend}, expected one of {list(backends)}")
+    service = EmbeddingService(backend=backends[backend](), cache=EmbeddingCache(path=cache_path))
+    set_embedding_service(service)
+    return service
+
+
+async def aget_embedding(text: str, warm_cache: dict[str, list[float]] = None) -> list[float]:
+    return await get_embedding_service().aget_embedding(text, warm_cache=warm_cache)
+
+
+async def aget_embeddings(texts: list[str], warm_cache: dict[str, list[float]] = None) -> list[list[float]]:
+    return await get_embedding_service().aget_embeddings(texts, warm_cache=warm_cache)
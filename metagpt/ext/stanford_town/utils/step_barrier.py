@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : step barrier of the roles of a simulation, the roles run their steps concurrently and wait on the barrier,
+#           instead of sleeping, for the tiles of their next step
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from pydantic_core import to_jsonable_python
+
+from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
+from metagpt.logs import logger
+from metagpt.utils.common import read_json_file, write_json_file
+
+STEP_LOG_FNAME = "steps.jsonl"
+
+
+class StepBarrier:
+    """
+    In-process step barrier, headless: it does not wait on the frontend.
+    The tiles of the roles at step N+1 are known once all the roles submitted their movement of step N, then the
+    movements and the tiles of the step are appended to `{sim_code}/steps.jsonl` as one record.
+    The tiles of the first step come from `{sim_code}/environment/{step}.json` of the forked simulation.
+    A role waits at most `timeout` seconds for the tile of its next step, e.g., while another role failed to submit.
+    """
+
+    def __init__(
+        self, sim_code: str, role_names: Iterable[str] = (), storage_path: Path = STORAGE_PATH, timeout: float = 600
+    ):
+        self.sim_code = sim_code
+        self.timeout = timeout
+        self.sim_path = Path(storage_path).joinpath(sim_code)
+        self.role_names = set(role_names)
+        self._first_step: Optional[int] = None
+        self._movements: dict[int, dict[str, dict]] = defaultdict(dict)  # step -> role name -> movement
+        self._next_tiles: dict[int, dict[str, tuple[int, int]]] = defaultdict(dict)  # step -> role name -> tile
+        self._environment: dict[int, dict[str, dict]] = {}  # step -> role name -> tile, of the last committed step
+        self._committed: dict[int, asyncio.Event] = defaultdict(asyncio.Event)  # step -> set once its tiles are known
+
+    def add_role(self, role_name: str):
+        self.role_names.add(role_name)
+
+    async def get_role_environment(self, role_name: str, step: int) -> Optional[dict]:
+        """The tile of the role at the step, e.g., {"maze": "the_ville", "x": 58, "y": 9}, None if not found"""
+        if self._first_step is None or step <= self._first_step:
+            return self._read_environment(step).get(role_name)
+        try:
+            await asyncio.wait_for(self._committed[step].wait(), self.timeout)
+        except asyncio.TimeoutError:
+            waiting = self.role_names - self._movements.get(step - 1, {}).keys()
+            logger.warning(f"step {step} of {role_name} not committed in {self.timeout}s, waiting for {waiting}")
+            return None
+        return self._environment.get(step, {}).get(role_name)
+
+    async def submit(
+        self, role_name: str, step: int, role_move: dict, next_tile: Optional[tuple[int, int]], curr_time: datetime
+    ):
+        """Submit the movement of the role at the step and its tile of the next step, None if it has no tile"""
+        if self._first_step is None:
+            self._first_step = step
+        self._movements[step][role_name] = role_move
+        self._next_tiles[step][role_name] = next_tile
+        if self.role_names <= self._movements[step].keys():
+            await self._commit(step, curr_time)
+
+    async def _commit(self, step: int, curr_time: datetime):
+        movement = {
+            "persona": self._movements.pop(step),
+            "meta": {"curr_time": curr_time.strftime("%B %d, %Y, %H:%M:%S")},
+        }
+        environment = {
+            name: {"maze": "the_ville", "x": tile[0], "y": tile[1]}
+            for name, tile in self._next_tiles.pop(step).items()
+            if tile is not None
+        }
+        await asyncio.to_thread(self._write_step, step, movement, environment)
+        logger.info(f"commit step: {step}, curr_time: {movement['meta']['curr_time']}")
+
+        self._environment = {step + 1: environment}
+        self._committed.pop(step, None)
+        self._committed[step + 1].set()
+
+    def _write_step(self, step: int, movement: dict, environment: dict):
+        record = {"step": step, "movement": movement, "environment": environment}
+        self.sim_path.mkdir(parents=True, exist_ok=True)
+        with open(self.sim_path.joinpath(STEP_LOG_FNAME), "a", encoding="utf-8") as fout:
+            fout.write(json.dumps(record, ensure_ascii=False, default=to_jsonable_python) + "\n")
+
+    def _read_environment(self, step: int) -> dict:
+        env_path = self.sim_path.joinpath(f"environment/{step}.json")
+        return read_json_file(env_path) if env_path.exists() else {}
+
+
+class FrontendStepBarrier(StepBarrier):
+    """
+    Step barrier docking with the `generative_agents` frontend, the records of each step are also written to the
+    `movement/{step}.json` and `environment/{step + 1}.json` read by the frontend, at once, and the tiles of the roles
+    are read back from `environment/{step}.json`, polled without blocking the other roles until the frontend wrote it,
+    for `timeout` seconds at most.
+    """
+
+    def __init__(
+        self,
+        sim_code: str,
+        role_names: Iterable[str] = (),
+        storage_path: Path = STORAGE_PATH,
+        poll_interval: float = 1,
+        timeout: float = 600,
+    ):
+        super().__init__(sim_code, role_names=role_names, storage_path=storage_path, timeout=timeout)
+        self.poll_interval = poll_interval
+
+    async def get_role_environment(self, role_name: str, step: int) -> Optional[dict]:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                role_env = self._read_environment(step).get(role_name)
+            except ValueError:  # being written by the frontend
+                role_env = None
+            if role_env:
+                return role_env
+            if time.monotonic() >= deadline:
+                logger.warning(f"{self.sim_code}/environment/{step}.json of {role_name} not written in {self.timeout}s")
+                return None
+            logger.warning(f"{self.sim_code}/environment/{step}.json of {role_name} not ready, re-check later")
+            await asyncio.sleep(self.poll_interval)
+
+    def _write_step(self, step: int, movement: dict, environment: dict):
+        super()._write_step(step, movement, environment)
+        write_json_file(self.sim_path.joinpath(f"movement/{step}.json"), movement)
+        write_json_file(self.sim_path.joinpath(f"environment/{step + 1}.json"), environment)
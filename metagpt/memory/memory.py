@@ -7,9 +7,9 @@
 @Modified By: mashenquan, 2023-11-1. According to RFC 116: Updated the type of index key.
 """
 from collections import defaultdict
-from typing import DefaultDict, Iterable, Set
+from typing import Any, DefaultDict, Hashable, Iterable, Optional, Set
 
-from pydantic import BaseModel, Field, SerializeAsAny
+from pydantic import BaseModel, Field, PrivateAttr, SerializeAsAny, model_validator
 
 from metagpt.const import IGNORED_MESSAGE_ID
 from metagpt.schema import Message
@@ -23,23 +23,55 @@ class Memory(BaseModel):
     index: DefaultDict[str, list[SerializeAsAny[Message]]] = Field(default_factory=lambda: defaultdict(list))
     ignore_id: bool = False
 
+    # In-process lookup tables derived from `storage`, they are rebuilt instead of being serialized.
+    _key_index: DefaultDict[Hashable, list[Message]] = PrivateAttr(default_factory=lambda: defaultdict(list))
+    _role_index: DefaultDict[str, dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _sent_from_index: DefaultDict[str, dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+
+    @model_validator(mode="after")
+    def rebuild_indexes(self) -> "Memory":
+        """Rebuild the private lookup tables from `storage`."""
+        self._reset_indexes()
+        for message in self.storage:
+            self._index_message(message)
+        return self
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare fields only, the private lookup tables are derived from `storage`."""
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
     def add(self, message: Message):
         """Add a new message to storage, while updating the index"""
         if self.ignore_id:
             message.id = IGNORED_MESSAGE_ID
-        if message in self.storage:
+        if self.contains(message):
             return
         self.storage.append(message)
         if message.cause_by:
             self.index[message.cause_by].append(message)
+        self._index_message(message)
 
     def add_batch(self, messages: Iterable[Message]):
         for message in messages:
             self.add(message)
 
+    def contains(self, message: Message) -> bool:
+        """Return whether an equal message is already in storage"""
+        return self._lookup(self._key_index, message) is not None
+
     def get_by_role(self, role: str) -> list[Message]:
         """Return all messages of a specified role"""
-        return [message for message in self.storage if message.role == role]
+        return list(self._role_index.get(role, {}).values())
+
+    def get_by_sent_from(self, sent_from: str) -> list[Message]:
+        """Return all messages sent from a specified role"""
+        return list(self._sent_from_index.get(any_to_str(sent_from), {}).values())
 
     def get_by_content(self, content: str) -> list[Message]:
         """Return all messages containing a specified content"""
@@ -49,8 +81,9 @@ class Memory(BaseModel):
         """delete the newest message from the storage"""
         if len(self.storage) > 0:
             newest_msg = self.storage.pop()
-            if newest_msg.cause_by and newest_msg in self.index[newest_msg.cause_by]:
-                self.index[newest_msg.cause_by].remove(newest_msg)
+            if newest_msg.cause_by:
+                self._remove_from(self.index[newest_msg.cause_by], newest_msg)
+            self._unindex_message(newest_msg)
         else:
             newest_msg = None
         return newest_msg
@@ -59,14 +92,19 @@ class Memory(BaseModel):
         """Delete the specified message from storage, while updating the index"""
         if self.ignore_id:
             message.id = IGNORED_MESSAGE_ID
-        self.storage.remove(message)
-        if message.cause_by and message in self.index[message.cause_by]:
-            self.index[message.cause_by].remove(message)
+        stored = self._lookup(self._key_index, message)
+        if stored is None:
+            raise ValueError(f"{message} not in memory")
+        self._remove_from(self.storage, stored)
+        if stored.cause_by:
+            self._remove_from(self.index[stored.cause_by], stored)
+        self._unindex_message(stored)
 
     def clear(self):
         """Clear storage and index"""
         self.storage = []
         self.index = defaultdict(list)
+        self._reset_indexes()
 
     def count(self) -> int:
         """Return the number of messages in storage"""
@@ -82,13 +120,13 @@ class Memory(BaseModel):
 
     def find_news(self, observed: list[Message], k=0) -> list[Message]:
         """find news (previously unseen messages) from the most recent k memories, from all memories when k=0"""
-        already_observed = self.get(k)
-        news: list[Message] = []
-        for i in observed:
-            if i in already_observed:
-                continue
-            news.append(i)
-        return news
+        if k:
+            key_index = defaultdict(list)
+            for message in self.get(k):
+                key_index[self._dedup_key(message)].append(message)
+        else:
+            key_index = self._key_index
+        return [i for i in observed if self._lookup(key_index, i) is None]
 
     def get_by_action(self, action) -> list[Message]:
         """Return all messages triggered by a specified Action"""
@@ -104,3 +142,46 @@ class Memory(BaseModel):
                 continue
             rsp += self.index[action]
         return rsp
+
+    def _dedup_key(self, message: Message) -> Hashable:
+        """Bucket key of a message, equal messages always share the same bucket."""
+        if self.ignore_id:
+            return message.role, message.cause_by, message.sent_from, message.content
+        return message.id
+
+    def _lookup(self, key_index: dict, message: Message) -> Optional[Message]:
+        """Return the stored message equal to `message`, comparing only within its bucket."""
+        for stored in key_index.get(self._dedup_key(message), []):
+            if stored == message:
+                return stored
+            if self.ignore_id and stored == message.model_copy(update={"id": stored.id}):
+                return stored
+        return None
+
+    def _reset_indexes(self):
+        self._key_index = defaultdict(list)
+        self._role_index = defaultdict(dict)
+        self._sent_from_index = defaultdict(dict)
+
+    def _index_message(self, message: Message):
+        self._key_index[self._dedup_key(message)].append(message)
+        self._role_index[message.role][id(message)] = message
+        self._sent_from_index[message.sent_from][id(message)] = message
+
+    def _unindex_message(self, message: Message):
+        key = self._dedup_key(message)
+        self._remove_from(self._key_index[key], message)
+        if not self._key_index[key]:
+            del self._key_index[key]
+        self._role_index[message.role].pop(id(message), None)
+        self._sent_from_index[message.sent_from].pop(id(message), None)
+
+    @staticmethod
+    def _remove_from(messages: list[Message], message: Message):
+        """Remove `message` from `messages`, matching by identity first and then by equality."""
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i] is message:
+                del messages[i]
+                return
+        if message in messages:
+            messages.remove(message)
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 import json
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from typing import Any, Awaitable, Callable, Optional, Union
 
 from openai import AsyncOpenAI
 from pydantic import BaseModel
@@ -24,7 +24,8 @@ from tenacity import (
 
 from metagpt.configs.llm_config import LLMConfig
 from metagpt.const import LLM_API_TIMEOUT, USE_CONFIG_TIMEOUT
-from metagpt.logs import logger
+from metagpt.logs import log_llm_stream, logger
+from metagpt.provider.llm_response_cache import LLMResponseCache, get_response_cache
 from metagpt.schema import Message
 from metagpt.utils.common import log_and_reraise
 from metagpt.utils.cost_manager import CostManager, Costs
@@ -149,7 +150,11 @@ class BaseLLM(ABC):
         if stream is None:
             stream = self.config.stream
         logger.debug(message)
-        rsp = await self.acompletion_text(message, stream=stream, timeout=self.get_timeout(timeout))
+        rsp = await self._with_response_cache(
+            message,
+            lambda: self.acompletion_text(message, stream=stream, timeout=self.get_timeout(timeout)),
+            stream=stream,
+        )
         return rsp
 
     def _extract_assistant_rsp(self, context):
@@ -161,13 +166,40 @@ class BaseLLM(ABC):
         for msg in msgs:
             umsg = self._user_msg(msg)
             context.append(umsg)
-            rsp_text = await self.acompletion_text(context, timeout=self.get_timeout(timeout))
+            rsp_text = await self._with_response_cache(
+                context, lambda: self.acompletion_text(context, timeout=self.get_timeout(timeout))
+            )
             context.append(self._assistant_msg(rsp_text))
         return self._extract_assistant_rsp(context)
 
     async def aask_code(self, messages: Union[str, Message, list[dict]], timeout=USE_CONFIG_TIMEOUT, **kwargs) -> dict:
         raise NotImplementedError
 
+    async def _with_response_cache(
+        self, messages: list[dict], request: Callable[[], Awaitable[Any]], tools: Any = None, stream: bool = False
+    ) -> Any:
+        """Return the cached response of the messages if `LLMConfig.cache` is set, otherwise await `request()`.
+
+        A cached text is replayed through the stream log when `stream` is True, as if it were received from the LLM.
+        """
+        cache_config = getattr(self.config, "cache", None)
+        if not cache_config:
+            return await request()
+
+        cache = get_response_cache(cache_config)
+        key = LLMResponseCache.make_key(self.model or self.config.model, messages, self.config.temperature, tools)
+        rsp = await cache.get(key)
+        if self.cost_manager:
+            self.cost_manager.update_cache_stats(hit=rsp is not None)
+        if rsp is None:
+            rsp = await request()
+            await cache.set(key, rsp)
+        elif stream and isinstance(rsp, str):
+            for i in range(0, len(rsp), 16):
+                log_llm_stream(rsp[i : i + 16])
+            log_llm_stream("\n")
+        return rsp
+
     @abstractmethod
     async def _achat_completion(self, messages: list[dict], timeout=USE_CONFIG_TIMEOUT):
         """_achat_completion implemented by inherited class"""
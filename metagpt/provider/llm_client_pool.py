@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : llm_client_pool.py
+@Desc    : Share the SDK clients of LLM providers, and so their HTTP connection pools, between all the LLM instances
+    created with the same connection settings.
+"""
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Hashable, Optional
+
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.logs import logger
+
+# The fields of LLMConfig used to build a SDK client, other fields (model, temperature...) only affect the requests.
+CLIENT_CONFIG_FIELDS = {
+    "api_type",
+    "api_key",
+    "base_url",
+    "api_version",
+    "access_key",
+    "secret_key",
+    "session_token",
+    "endpoint",
+    "region_name",
+    "proxy",
+}
+
+
+def _get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LLMClientPool:
+    """Keyed cache of SDK clients.
+
+    Clients are bound to the event loop they are used in, so a client is only shared inside one event loop, and the
+    clients of closed event loops are dropped. The users of the clients, e.g., the teams running in the same event
+    loop, hold a `lease` so the clients are closed only when the last of them is done.
+    """
+
+    def __init__(self):
+        self._clients: dict[tuple, tuple[Any, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._leases: dict[asyncio.AbstractEventLoop, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(config: LLMConfig) -> str:
+        """Return the hash of the connection settings of `config`"""
+        data = config.model_dump_json(include=CLIENT_CONFIG_FIELDS)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the client of `key` in the current event loop, create it by `factory` if not existed."""
+        loop = _get_running_loop()
+        pool_key = (key, id(loop) if loop else None)
+        item = self._clients.get(pool_key)
+        if item and item[1] is loop and not (loop and loop.is_closed()):
+            self.hits += 1
+            return item[0]
+
+        self._drop_closed_loops()
+        self.misses += 1
+        client = factory()
+        self._clients[pool_key] = (client, loop)
+        return client
+
+    @asynccontextmanager
+    async def lease(self):
+        """Hold the clients of the current event loop open, they are closed once its last lease is released."""
+        loop = asyncio.get_running_loop()
+        self._leases[loop] = self._leases.get(loop, 0) + 1
+        try:
+            yield self
+        finally:
+            self._leases[loop] -= 1
+            if not self._leases[loop]:
+                del self._leases[loop]
+                await self.aclose()
+
+    async def aclose(self):
+        """Close all the clients usable in the current event loop, they will be created again on next use."""
+        logger.debug(f"LLM client pool: {self.stats()}")
+        loop = _get_running_loop()
+        for pool_key, (client, client_loop) in list(self._clients.items()):
+            if client_loop not in (loop, None):
+                continue
+            del self._clients[pool_key]
+            close = getattr(client, "close", None)
+            if not close:
+                continue
+            try:
+                ret = close()
+                if asyncio.iscoroutine(ret):
+                    await ret
+            except Exception as e:
+                logger.warning(f"Failed to close LLM client {type(client).__name__}: {e}")
+
+    def stats(self) -> dict[str, int]:
+        """Return the pool usage metrics"""
+        return {"clients": len(self._clients), "hits": self.hits, "misses": self.misses}
+
+    def _drop_closed_loops(self):
+        for pool_key, (_, loop) in list(self._clients.items()):
+            if loop and loop.is_closed():
+                del self._clients[pool_key]
+
+
+# Pool instance
+LLM_CLIENT_POOL = LLMClientPool()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : llm_response_cache.py
+@Desc    : Opt-in, content-addressed cache of LLM responses, enabled by `LLMConfig.cache`.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from metagpt.configs.llm_cache_config import LLMCacheBackend, LLMCacheConfig
+from metagpt.utils.redis import Redis
+
+
+class BaseCacheBackend(ABC):
+    """Storage of the serialized responses"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the value of `key`, None if not found or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int = 0):
+        """Set the value of `key`, it expires after `ttl` seconds if `ttl` > 0"""
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(BaseCacheBackend):
+    """In-process LRU cache"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if not item:
+            return None
+        value, expires_at = item
+        if expires_at and expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int = 0):
+        self._data[key] = (value, time.time() + ttl if ttl else 0)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+class SQLiteCacheBackend(BaseCacheBackend):
+    """On-disk cache shared between processes and runs, queried in a worker thread not to block the event loop"""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            value, expires_at = row
+            if expires_at and expires_at < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def _set(self, key: str, value: str, ttl: int = 0):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl else 0),
+            )
+            self._conn.commit()
+
+    def _close(self):
+        with self._lock:
+            self._conn.close()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: int = 0):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
+
+
+class RedisCacheBackend(BaseCacheBackend):
+    """Cache shared between machines, based on `metagpt.utils.redis.Redis`"""
+
+    KEY_PREFIX = "metagpt:llm_cache:"
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(self.KEY_PREFIX + key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: int = 0):
+        await self._redis.set(self.KEY_PREFIX + key, value, timeout_sec=ttl or None)
+
+    async def close(self):
+        await self._redis.close()
+
+
+class LLMResponseCache:
+    """Cache of LLM responses keyed by the hash of the model, the normalized messages, the temperature and the tools."""
+
+    def __init__(self, backend: BaseCacheBackend, ttl: int = 0):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], temperature: float, tools: Any = None) -> str:
+        data = {"model": model, "messages": messages, "temperature": temperature, "tools": tools}
+        text = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Any:
+        """Return the cached response, None if missed"""
+        value = await self.backend.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, response: Any):
+        await self.backend.set(key, json.dumps(response, ensure_ascii=False), ttl=self.ttl)
+
+    async def close(self):
+        """Close the backend, `get_response_cache` opens a new cache for the config afterwards"""
+        for key, cache in list(_caches.items()):
+            if cache is self:
+                del _caches[key]
+        await self.backend.close()
+
+
+_caches: dict[str, LLMResponseCache] = {}
+
+
+def get_response_cache(config: LLMCacheConfig) -> LLMResponseCache:
+    """Return the response cache of the config, LLM instances with the same cache config share one cache."""
+    key = config.model_dump_json()
+    if key in _caches:
+        return _caches[key]
+
+    if config.backend == LLMCacheBackend.SQLITE:
+        backend = SQLiteCacheBackend(config.path)
+    elif config.backend == LLMCacheBackend.REDIS:
+        if not config.redis:
+            raise ValueError("`redis` is required by the redis backend of the LLM response cache")
+        backend = RedisCacheBackend(Redis(config.redis))
+    else:
+        backend = MemoryCacheBackend(max_size=config.max_size)
+    _caches[key] = LLMResponseCache(backend, ttl=config.ttl)
+    return _caches[key]
@@ -29,6 +29,7 @@ from metagpt.const import USE_CONFIG_TIMEOUT
 from metagpt.logs import log_llm_stream, logger
 from metagpt.provider.base_llm import BaseLLM
 from metagpt.provider.constant import GENERAL_FUNCTION_SCHEMA
+from metagpt.provider.llm_client_pool import LLM_CLIENT_POOL
 from metagpt.provider.llm_provider_registry import register_provider
 from metagpt.utils.common import CodeParser, decode_image, log_and_reraise
 from metagpt.utils.cost_manager import CostManager
@@ -64,8 +65,23 @@ class OpenAILLM(BaseLLM):
         """https://github.com/openai/openai-python#async-usage"""
         self.model = self.config.model  # Used in _calc_usage & _cons_kwargs
         self.pricing_plan = self.config.pricing_plan or self.model
+        self._aclient = None
+
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """The client shared by all LLM instances with the same connection settings, unless one is set explicitly"""
+        if self._aclient:
+            return self._aclient
+        key = (type(self).__name__, LLM_CLIENT_POOL.fingerprint(self.config))
+        return LLM_CLIENT_POOL.get(key, self._create_client)
+
+    @aclient.setter
+    def aclient(self, aclient: AsyncOpenAI):
+        self._aclient = aclient
+
+    def _create_client(self) -> AsyncOpenAI:
         kwargs = self._make_client_kwargs()
-        self.aclient = AsyncOpenAI(**kwargs)
+        return AsyncOpenAI(**kwargs)
 
     def _make_client_kwargs(self) -> dict:
         kwargs = {"api_key": self.config.api_key, "base_url": self.config.base_url}
@@ -189,8 +205,12 @@ class OpenAILLM(BaseLLM):
         if "tools" not in kwargs:
             configs = {"tools": [{"type": "function", "function": GENERAL_FUNCTION_SCHEMA}]}
             kwargs.update(configs)
-        rsp = await self._achat_completion_function(messages, **kwargs)
-        return self.get_choice_function_arguments(rsp)
+
+        async def request() -> dict:
+            rsp = await self._achat_completion_function(messages, timeout=timeout, **kwargs)
+            return self.get_choice_function_arguments(rsp)
+
+        return await self._with_response_cache(self.format_msg(messages), request, tools=kwargs)
 
     def _parse_arguments(self, arguments: str) -> dict:
         """parse arguments in openai function call"""
@@ -2,6 +2,7 @@
 
 
 from functools import wraps
+from pathlib import Path
 
 import chromadb
 import faiss
@@ -16,7 +17,11 @@ from llama_index.vector_stores.milvus import MilvusVectorStore
 
 from metagpt.rag.factories.base import ConfigBasedFactory
 from metagpt.rag.retrievers.base import RAGRetriever
-from metagpt.rag.retrievers.bm25_retriever import DynamicBM25Retriever
+from metagpt.rag.retrievers.bm25_retriever import (
+    BM25_PERSIST_FNAME,
+    DynamicBM25Retriever,
+    IncrementalBM25,
+)
 from metagpt.rag.retrievers.chroma_retriever import ChromaRetriever
 from metagpt.rag.retrievers.es_retriever import ElasticsearchRetriever
 from metagpt.rag.retrievers.faiss_retriever import FAISSRetriever
@@ -93,8 +98,10 @@ class RetrieverFactory(ConfigBasedFactory):
     def _create_bm25_retriever(self, config: BM25RetrieverConfig, **kwargs) -> DynamicBM25Retriever:
         index = self._extract_index(config, **kwargs)
         nodes = list(index.docstore.docs.values()) if index else self._extract_nodes(config, **kwargs)
+        persist_path = self._val_from_config_or_kwargs("persist_path", config, **kwargs)
+        bm25 = IncrementalBM25.from_persist_path(Path(persist_path) / BM25_PERSIST_FNAME) if persist_path else None
 
-        return DynamicBM25Retriever(nodes=nodes, **config.model_dump())
+        return DynamicBM25Retriever(nodes=nodes, bm25=bm25, **config.model_dump())
 
     def _create_chroma_retriever(self, config: ChromaRetrieverConfig, **kwargs) -> ChromaRetriever:
         config.index = self._build_chroma_index(config, **kwargs)
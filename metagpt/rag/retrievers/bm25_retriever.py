@@ -1,12 +1,157 @@
 """BM25 retriever."""
-from typing import Callable, Optional
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional, Union
 
+import numpy as np
 from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
 from llama_index.core.callbacks.base import CallbackManager
 from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
-from llama_index.core.schema import BaseNode, IndexNode
+from llama_index.core.schema import BaseNode, IndexNode, NodeWithScore, QueryBundle
 from llama_index.retrievers.bm25 import BM25Retriever
-from rank_bm25 import BM25Okapi
+from llama_index.retrievers.bm25.base import tokenize_remove_stopwords
+
+BM25_PERSIST_FNAME = "bm25_index.json"
+
+
+class IncrementalBM25:
+    """Okapi BM25 index updated in place, scoring the same as `rank_bm25.BM25Okapi`.
+
+    Documents are identified by keys and stored in dense slots, a removed document is replaced by the last one.
+    The hash of the content of a document may be kept along, to tell whether a persisted document is stale.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.keys: list[str] = []
+        self._slots: dict[str, int] = {}
+        self._doc_terms: list[dict[str, int]] = []
+        self._hashes: dict[str, str] = {}
+        self._postings: dict[str, dict[int, int]] = {}  # term -> slot -> term frequency
+        self._doc_len: list[int] = []
+        self._total_len = 0
+        self._cache = None  # (length normalization of documents, idf of terms), reset on change
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def add(self, key: str, tokens: list[str], content_hash: Optional[str] = None):
+        """Add a document, replacing the document of the same key"""
+        if key in self._slots:
+            self.remove(key)
+        self._add(key, dict(Counter(tokens)), content_hash)
+
+    def get_hash(self, key: str) -> Optional[str]:
+        """Return the content hash the document was added with, None if unknown"""
+        return self._hashes.get(key)
+
+    def remove(self, key: str) -> int:
+        """Remove a document, return its slot which is taken by the last document"""
+        slot = self._slots.pop(key)
+        self._hashes.pop(key, None)
+        for term in self._doc_terms[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len[slot]
+
+        last = len(self.keys) - 1
+        if slot != last:
+            last_key, last_terms = self.keys[last], self._doc_terms[last]
+            for term, freq in last_terms.items():
+                postings = self._postings[term]
+                del postings[last]
+                postings[slot] = freq
+            self.keys[slot], self._doc_terms[slot], self._doc_len[slot] = last_key, last_terms, self._doc_len[last]
+            self._slots[last_key] = slot
+        self.keys.pop()
+        self._doc_terms.pop()
+        self._doc_len.pop()
+        self._cache = None
+        return slot
+
+    def get_scores(self, query: list[str]) -> np.ndarray:
+        """Return the BM25 scores of all the documents, in slot order"""
+        scores = np.zeros(len(self.keys))
+        if not self.keys:
+            return scores
+        norms, idf = self._get_cache()
+        for term, count in Counter(query).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            freqs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            scores[slots] += count * idf[term] * freqs * (self.k1 + 1) / (freqs + norms[slots])
+        return scores
+
+    def to_dict(self) -> dict:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "keys": self.keys,
+            "doc_terms": self._doc_terms,
+            "hashes": [self._hashes.get(i) for i in self.keys],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IncrementalBM25":
+        bm25 = cls(k1=data["k1"], b=data["b"], epsilon=data["epsilon"])
+        hashes = data.get("hashes") or [None] * len(data["keys"])
+        for key, terms, content_hash in zip(data["keys"], data["doc_terms"], hashes):
+            bm25._add(key, terms, content_hash)
+        return bm25
+
+    def persist(self, persist_path: Union[str, Path]):
+        Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(persist_path).write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def from_persist_path(cls, persist_path: Union[str, Path]) -> Optional["IncrementalBM25"]:
+        """Load the index, None if not persisted"""
+        if not Path(persist_path).exists():
+            return None
+        return cls.from_dict(json.loads(Path(persist_path).read_text(encoding="utf-8")))
+
+    def _add(self, key: str, terms: dict[str, int], content_hash: Optional[str] = None):
+        slot = len(self.keys)
+        self._slots[key] = slot
+        if content_hash is not None:
+            self._hashes[key] = content_hash
+        self.keys.append(key)
+        self._doc_terms.append(terms)
+        doc_len = sum(terms.values())
+        self._doc_len.append(doc_len)
+        self._total_len += doc_len
+        for term, freq in terms.items():
+            self._postings.setdefault(term, {})[slot] = freq
+        self._cache = None
+
+    def _get_cache(self) -> tuple[np.ndarray, dict[str, float]]:
+        if self._cache is None:
+            doc_len = np.asarray(self._doc_len, dtype=np.float64)
+            avgdl = self._total_len / len(self.keys)
+            norms = self.k1 * (1 - self.b + self.b * doc_len / avgdl) if avgdl else np.full(len(self.keys), self.k1)
+
+            # Same idf as BM25Okapi: the negative ones are replaced by epsilon * average idf
+            n = len(self.keys)
+            terms = list(self._postings.keys())
+            df = np.fromiter((len(self._postings[t]) for t in terms), dtype=np.float64, count=len(terms))
+            idf_values = np.log(n - df + 0.5) - np.log(df + 0.5)
+            eps = self.epsilon * idf_values.mean() if len(terms) else 0.0
+            idf_values[idf_values < 0] = eps
+            self._cache = norms, dict(zip(terms, idf_values.tolist()))
+        return self._cache
 
 
 class DynamicBM25Retriever(BM25Retriever):
@@ -22,28 +167,78 @@ class DynamicBM25Retriever(BM25Retriever):
         object_map: Optional[dict] = None,
         verbose: bool = False,
         index: VectorStoreIndex = None,
+        bm25: Optional[IncrementalBM25] = None,
     ) -> None:
-        super().__init__(
-            nodes=nodes,
-            tokenizer=tokenizer,
-            similarity_top_k=similarity_top_k,
+        """`bm25` is the persisted index of the nodes, the nodes are tokenized if it doesn't match them, and so are the
+        nodes whose content changed since it was persisted."""
+        self._tokenizer = tokenizer or tokenize_remove_stopwords
+        self._similarity_top_k = similarity_top_k
+        self._index = index
+        node_map = {node.node_id: node for node in nodes}
+        if bm25 is not None and len(bm25) == len(node_map) and all(i in node_map for i in bm25.keys):
+            self.bm25 = bm25
+            self._nodes = [node_map[i] for i in bm25.keys]
+            self._add_to_bm25([node for node in nodes if bm25.get_hash(node.node_id) != _content_hash(node)])
+        else:
+            self.bm25 = IncrementalBM25()
+            self._nodes = []
+            self._add_to_bm25(nodes)
+        BaseRetriever.__init__(
+            self,
             callback_manager=callback_manager,
             object_map=object_map,
             objects=objects,
             verbose=verbose,
         )
-        self._index = index
 
     def add_nodes(self, nodes: list[BaseNode], **kwargs) -> None:
         """Support add nodes."""
-        self._nodes.extend(nodes)
-        self._corpus = [self._tokenizer(node.get_content()) for node in self._nodes]
-        self.bm25 = BM25Okapi(self._corpus)
+        self._add_to_bm25(nodes)
 
         if self._index:
             self._index.insert_nodes(nodes, **kwargs)
 
+    def delete_nodes(self, node_ids: list[str], **kwargs) -> None:
+        """Support delete nodes."""
+        for node_id in node_ids:
+            if node_id in self.bm25:
+                self._remove_from_bm25(node_id)
+
+        if self._index:
+            self._index.delete_nodes(node_ids, **kwargs)
+
     def persist(self, persist_dir: str, **kwargs) -> None:
         """Support persist."""
         if self._index:
             self._index.storage_context.persist(persist_dir)
+        self.bm25.persist(Path(persist_dir) / BM25_PERSIST_FNAME)
+
+    def _add_to_bm25(self, nodes: list[BaseNode]):
+        """Tokenize only the given nodes, `self._nodes` is kept in the slot order of `self.bm25`"""
+        for node in nodes:
+            if node.node_id in self.bm25:
+                self._remove_from_bm25(node.node_id)
+            content = node.get_content()
+            self.bm25.add(node.node_id, self._tokenizer(content), _content_hash(node, content))
+            self._nodes.append(node)
+
+    def _remove_from_bm25(self, node_id: str):
+        slot = self.bm25.remove(node_id)
+        last = self._nodes.pop()
+        if slot < len(self._nodes):
+            self._nodes[slot] = last
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        scores = self.bm25.get_scores(self._tokenizer(query_bundle.query_str))
+        top_k = min(self._similarity_top_k, len(scores))
+        if not top_k:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [NodeWithScore(node=self._nodes[i], score=float(scores[i])) for i in top]
+
+
+def _content_hash(node: BaseNode, content: Optional[str] = None) -> str:
+    """The hash of the content of the node, as tokenized"""
+    content = node.get_content() if content is None else content
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
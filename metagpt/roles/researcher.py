@@ -36,6 +36,10 @@ class Researcher(Role):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.set_actions([CollectLinks, WebBrowseAndSummarize, ConductResearch])
+        if not self.enable_concurrency:
+            for action in self.actions:
+                if isinstance(action, WebBrowseAndSummarize):
+                    action.max_concurrency = 1
         self._set_react_mode(RoleReactMode.BY_ORDER.value, len(self.actions))
         if self.language not in ("en-us", "zh-cn"):
             logger.warning(f"The language `{self.language}` has not been tested, it may not work.")
@@ -427,12 +427,10 @@ class Role(SerializationMixin, ContextMixin, BaseModel):
         if not news:
             news = self.rc.msg_buffer.pop_all()
         # Store the read messages in your own memory to prevent duplicate processing.
-        old_messages = [] if ignore_memory else self.rc.memory.get()
+        unseen = news if ignore_memory else [n for n in news if not self.rc.memory.contains(n)]
         self.rc.memory.add_batch(news)
         # Filter out messages of interest.
-        self.rc.news = [
-            n for n in news if (n.cause_by in self.rc.watch or self.name in n.send_to) and n not in old_messages
-        ]
+        self.rc.news = [n for n in unseen if n.cause_by in self.rc.watch or self.name in n.send_to]
         self.latest_observed_msg = self.rc.news[-1] if self.rc.news else None  # record the latest observed msg
 
         # Design Rules:
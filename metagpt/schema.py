@@ -53,6 +53,7 @@ from metagpt.utils.serialize import (
     actionoutout_schema_to_mapping,
     actionoutput_mapping_to_str,
     actionoutput_str_to_mapping,
+    get_model_json_schema,
 )
 
 
@@ -242,7 +243,7 @@ class Message(BaseModel):
         ic_dict = None
         if ic:
             # compatible with custom-defined ActionOutput
-            schema = ic.model_json_schema()
+            schema = get_model_json_schema(type(ic))
             ic_type = str(type(ic))
             if "<class 'metagpt.actions.action_node" in ic_type:
                 # instruct_content from AutoNode.create_model_class, for now, it's single level structure.
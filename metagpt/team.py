@@ -19,8 +19,10 @@ from metagpt.const import MESSAGE_ROUTE_TO_ALL, SERDESER_PATH
 from metagpt.context import Context
 from metagpt.environment import Environment
 from metagpt.logs import logger
+from metagpt.provider.llm_client_pool import LLM_CLIENT_POOL
 from metagpt.roles import Role
 from metagpt.schema import Message
+from metagpt.tools.browser_pool import BROWSER_POOL
 from metagpt.utils.common import (
     NoMoneyException,
     read_json_file,
@@ -125,14 +127,16 @@ class Team(BaseModel):
         if idea:
             self.run_project(idea=idea, send_to=send_to)
 
-        while n_round > 0:
-            if self.env.is_idle:
-                logger.debug("All roles are idle.")
-                break
-            n_round -= 1
-            self._check_balance()
-            await self.env.run()
-
-            logger.debug(f"max {n_round=} left.")
-        self.env.archive(auto_archive)
+        # the HTTP connections and browsers shared by the roles are released once no other team of the event loop runs
+        async with LLM_CLIENT_POOL.lease(), BROWSER_POOL.lease():
+            while n_round > 0:
+                if self.env.is_idle:
+                    logger.debug("All roles are idle.")
+                    break
+                n_round -= 1
+                self._check_balance()
+                await self.env.run()
+
+                logger.debug(f"max {n_round=} left.")
+            self.env.archive(auto_archive)
         return self.env.history
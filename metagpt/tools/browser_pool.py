@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : browser_pool.py
+@Desc    : Long-lived Playwright browsers shared by the web browser engines, instead of one launch per call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from metagpt.logs import logger
+from metagpt.utils.parse_html import WebPage
+
+
+class BrowserCrashError(Exception):
+    """The browser crashed or was disconnected while a page was in use"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class PooledBrowser:
+    """A browser launched by the pool, with the contexts left idle by the pages it served"""
+
+    def __init__(self, playwright, browser, max_pages: int):
+        self.playwright = playwright
+        self.browser = browser
+        self.semaphore = asyncio.Semaphore(max_pages)
+        self.max_idle_contexts = max_pages
+        self.idle_contexts: dict[str, list] = defaultdict(list)
+        self.crashed = False
+        self.closed = False
+        browser.on("disconnected", self._on_disconnected)
+
+    def _on_disconnected(self, *args):
+        self.crashed = True
+
+    def is_healthy(self) -> bool:
+        return not self.crashed and self.browser.is_connected()
+
+    async def new_context(self, context_kwargs: dict, block_resources: frozenset[str]):
+        context = await self.browser.new_context(**context_kwargs)
+        if block_resources:
+
+            async def block(route):
+                if route.request.resource_type in block_resources:
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await context.route("**/*", block)
+        return context
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for contexts in self.idle_contexts.values():
+            for context in contexts:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+        self.idle_contexts.clear()
+        try:
+            if self.browser.is_connected():
+                await self.browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close the browser: {e}")
+        try:
+            await self.playwright.stop()
+        except Exception as e:
+            logger.warning(f"Failed to stop Playwright: {e}")
+
+
+class BrowserPool:
+    """Keyed pool of long-lived Playwright browsers.
+
+    One browser is launched per browser type and launch arguments, and is bound to the event loop it was launched in.
+    It serves at most `max_pages` pages at the same time, in contexts reused across the pages having the same context
+    arguments and blocked resource types. A browser found crashed or disconnected is launched again on next use.
+    The pages loaded are cached per URL, for the TTL given by the caller. The users of the browsers, e.g., the teams
+    running in the same event loop, hold a `lease` so the browsers are closed only when the last of them is done.
+    """
+
+    def __init__(self, max_pages: int = 8):
+        self.max_pages = max_pages
+        self._browsers: dict[tuple, tuple[PooledBrowser, asyncio.AbstractEventLoop]] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._page_cache: dict[tuple, tuple[float, WebPage]] = {}
+        self._leases: dict[asyncio.AbstractEventLoop, int] = {}
+        self.launches = 0
+        self.restarts = 0
+        self.cache_hits = 0
+
+    async def get_browser(
+        self,
+        browser_type: str,
+        launch_kwargs: dict,
+        precheck: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ) -> PooledBrowser:
+        """Return the healthy browser of the launch arguments in the current event loop, launch it if needed."""
+        loop = asyncio.get_running_loop()
+        key = (browser_type, _dumps(launch_kwargs), id(loop))
+        self._drop_closed_loops()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            item = self._browsers.get(key)
+            if item and item[0].is_healthy():
+                return item[0]
+            if item:
+                logger.warning(f"The {browser_type} browser crashed, launching it again")
+                self.restarts += 1
+                for i in [k for k, v in self._browsers.items() if v[0] is item[0]]:
+                    del self._browsers[i]
+                await item[0].close()
+
+            from playwright.async_api import async_playwright
+
+            playwright = await async_playwright().start()
+            try:
+                launcher = getattr(playwright, browser_type)
+                if precheck:
+                    await precheck(launcher)
+                browser = await launcher.launch(**launch_kwargs)
+            except BaseException:
+                await playwright.stop()
+                raise
+            self.launches += 1
+            pooled = PooledBrowser(playwright, browser, self.max_pages)
+            self._browsers[key] = (pooled, loop)
+            # the precheck may set the executable path of a fallback build in the launch arguments
+            self._browsers[(browser_type, _dumps(launch_kwargs), id(loop))] = (pooled, loop)
+            return pooled
+
+    @asynccontextmanager
+    async def page(
+        self,
+        browser_type: str,
+        launch_kwargs: dict,
+        context_kwargs: dict,
+        block_resources: frozenset[str] = frozenset(),
+        precheck: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ):
+        """Yield a new page of the pooled browser in a reused context, raise `BrowserCrashError` if the browser crashed"""
+        browser = await self.get_browser(browser_type, launch_kwargs, precheck)
+        context_key = _dumps([context_kwargs, sorted(block_resources)])
+        async with browser.semaphore:
+            idle = browser.idle_contexts[context_key]
+            try:
+                context = idle.pop() if idle else await browser.new_context(context_kwargs, block_resources)
+                page = await context.new_page()
+            except Exception as e:
+                if not browser.is_healthy():
+                    raise BrowserCrashError(str(e)) from e
+                raise
+
+            try:
+                yield page
+            except Exception as e:
+                if not browser.is_healthy():
+                    raise BrowserCrashError(str(e)) from e
+                raise
+            finally:
+                await self._release(browser, context, page, idle)
+            if not browser.is_healthy():
+                raise BrowserCrashError(f"The {browser_type} browser crashed")
+
+    @staticmethod
+    async def _release(browser: PooledBrowser, context, page, idle: list):
+        """Close the page, keep its context for the next pages unless the browser crashed or enough are kept"""
+        try:
+            await page.close()
+            if browser.is_healthy() and len(idle) < browser.max_idle_contexts:
+                idle.append(context)
+            else:
+                await context.close()
+        except Exception:
+            pass
+
+    def get_cached_page(self, key: tuple, ttl: float) -> Optional[WebPage]:
+        item = self._page_cache.get(key)
+        if not item:
+            return None
+        if time.monotonic() - item[0] > ttl:
+            del self._page_cache[key]
+            return None
+        self.cache_hits += 1
+        return item[1]
+
+    def cache_page(self, key: tuple, page: WebPage):
+        self._page_cache[key] = (time.monotonic(), page)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Hold the browsers of the current event loop open, they are closed once its last lease is released."""
+        loop = asyncio.get_running_loop()
+        self._leases[loop] = self._leases.get(loop, 0) + 1
+        try:
+            yield self
+        finally:
+            self._leases[loop] -= 1
+            if not self._leases[loop]:
+                del self._leases[loop]
+                await self.aclose()
+
+    async def aclose(self):
+        """Close the browsers of the current event loop, they will be launched again on next use."""
+        logger.debug(f"Browser pool: {self.stats()}")
+        loop = asyncio.get_running_loop()
+        for key, (browser, browser_loop) in list(self._browsers.items()):
+            if browser_loop is not loop:
+                continue
+            del self._browsers[key]
+            self._locks.pop(key, None)
+            await browser.close()  # once per browser, even if it is kept under several keys
+        self._page_cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return the pool usage metrics"""
+        return {
+            "browsers": len({id(browser) for browser, _ in self._browsers.values()}),
+            "launches": self.launches,
+            "restarts": self.restarts,
+            "cached_pages": len(self._page_cache),
+            "cache_hits": self.cache_hits,
+        }
+
+    def _drop_closed_loops(self):
+        for key, (_, loop) in list(self._browsers.items()):
+            if loop.is_closed():
+                del self._browsers[key]
+                self._locks.pop(key, None)
+
+
+BROWSER_POOL = BrowserPool()
@@ -8,10 +8,10 @@ import sys
 from pathlib import Path
 from typing import Literal, Optional
 
-from playwright.async_api import async_playwright
 from pydantic import BaseModel, Field, PrivateAttr
 
 from metagpt.logs import logger
+from metagpt.tools.browser_pool import BROWSER_POOL, BrowserCrashError
 from metagpt.utils.parse_html import WebPage
 
 
@@ -22,12 +22,19 @@ class PlaywrightWrapper(BaseModel):
     the required browsers are also installed. You can install playwright by running the command
     `pip install metagpt[playwright]` and download the necessary browser binaries by running the
     command `playwright install` for the first time.
+
+    The browsers are long-lived, shared through `BROWSER_POOL` by the wrappers having the same launch arguments, and
+    closed when the last `Team.run` of the event loop ends or by `await BROWSER_POOL.aclose()`. The requests of the resource types in
+    `block_resources` are aborted, since only the text of the pages is scraped, and the pages loaded are cached per URL
+    for `cache_ttl` seconds, 0 to disable.
     """
 
     browser_type: Literal["chromium", "firefox", "webkit"] = "chromium"
     launch_kwargs: dict = Field(default_factory=dict)
     proxy: Optional[str] = None
     context_kwargs: dict = Field(default_factory=dict)
+    block_resources: list[str] = Field(default_factory=lambda: ["image", "font", "media"])
+    cache_ttl: float = 300
     _has_run_precheck: bool = PrivateAttr(False)
 
     def __init__(self, **kwargs):
@@ -43,29 +50,45 @@ class PlaywrightWrapper(BaseModel):
             self.context_kwargs["ignore_https_errors"] = kwargs["ignore_https_errors"]
 
     async def run(self, url: str, *urls: str) -> WebPage | list[WebPage]:
-        async with async_playwright() as ap:
-            browser_type = getattr(ap, self.browser_type)
-            await self._run_precheck(browser_type)
-            browser = await browser_type.launch(**self.launch_kwargs)
-            _scrape = self._scrape
-
-            if urls:
-                return await asyncio.gather(_scrape(browser, url), *(_scrape(browser, i) for i in urls))
-            return await _scrape(browser, url)
-
-    async def _scrape(self, browser, url):
-        context = await browser.new_context(**self.context_kwargs)
-        page = await context.new_page()
-        async with page:
+        if urls:
+            return await asyncio.gather(self._scrape(url), *(self._scrape(i) for i in urls))
+        return await self._scrape(url)
+
+    async def _scrape(self, url: str) -> WebPage:
+        block_resources = frozenset(self.block_resources)
+        cache_key = (url, self.browser_type, str(self.context_kwargs), tuple(sorted(block_resources)))
+        if self.cache_ttl > 0:
+            cached = BROWSER_POOL.get_cached_page(cache_key, self.cache_ttl)
+            if cached:
+                return cached
+
+        for retry in range(2):
             try:
-                await page.goto(url)
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                html = await page.content()
-                inner_text = await page.evaluate("() => document.body.innerText")
-            except Exception as e:
-                inner_text = f"Fail to load page content for {e}"
-                html = ""
-            return WebPage(inner_text=inner_text, html=html, url=url)
+                async with BROWSER_POOL.page(
+                    self.browser_type, self.launch_kwargs, self.context_kwargs, block_resources, self._run_precheck
+                ) as page:
+                    web_page = await self._load(page, url)
+                break
+            except BrowserCrashError as e:
+                if retry:
+                    return WebPage(inner_text=f"Fail to load page content for {e}", html="", url=url)
+                logger.warning(f"The browser crashed while loading {url}, retrying")
+
+        if self.cache_ttl > 0 and web_page.html:
+            BROWSER_POOL.cache_page(cache_key, web_page)
+        return web_page
+
+    @staticmethod
+    async def _load(page, url: str) -> WebPage:
+        try:
+            await page.goto(url)
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            html = await page.content()
+            inner_text = await page.evaluate("() => document.body.innerText")
+        except Exception as e:
+            inner_text = f"Fail to load page content for {e}"
+            html = ""
+        return WebPage(inner_text=inner_text, html=html, url=url)
 
     async def _run_precheck(self, browser_type):
         if self._has_run_precheck:
@@ -31,6 +31,8 @@ class CostManager(BaseModel):
     max_budget: float = 10.0
     total_cost: float = 0
     token_costs: dict[str, dict[str, float]] = TOKEN_COSTS  # different model's token cost
+    cache_hits: int = 0  # responses served by the LLM response cache
+    cache_misses: int = 0
 
     def update_cost(self, prompt_tokens, completion_tokens, model):
         """
@@ -59,6 +61,13 @@ class CostManager(BaseModel):
             f"Current cost: ${cost:.3f}, prompt_tokens: {prompt_tokens}, completion_tokens: {completion_tokens}"
         )
 
+    def update_cache_stats(self, hit: bool):
+        """Count a lookup of the LLM response cache"""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
     def get_total_prompt_tokens(self):
         """
         Get the total number of prompt tokens.
@@ -8,51 +8,96 @@
 """
 from __future__ import annotations
 
+import atexit
 import json
+import os
 import re
+import time
+import weakref
 from pathlib import Path
-from typing import Set
+from typing import Dict, Set
 
-from metagpt.utils.common import aread, awrite
+from metagpt.logs import logger
+from metagpt.utils.common import aread
 from metagpt.utils.exceptions import handle_exception
 
+# DependencyFile instances with changes not written yet, flushed at exit
+_dirty_files: weakref.WeakSet[DependencyFile] = weakref.WeakSet()
+
 
 class DependencyFile:
     """A class representing a DependencyFile for managing dependencies.
 
+    The dependencies are cached in memory and reloaded only when the file changed. By default `update` with
+    `persist=True` writes the file at once; with a positive `flush_interval` it writes at most once every
+    `flush_interval` seconds, and the pending changes are written by `flush`, by `GitRepository.archive/commit` and at
+    exit. Meanwhile other readers of the file see the previous dependencies, and the changes made to the file by them
+    are not loaded, so write-behind is meant for a dependency file owned by one instance.
+
     :param workdir: The working directory path for the DependencyFile.
+    :param flush_interval: The minimum interval in seconds between two writes of the file by `update`, 0 to write on
+        every update.
     """
 
-    def __init__(self, workdir: Path | str):
+    def __init__(self, workdir: Path | str, flush_interval: float = 0):
         """Initialize a DependencyFile instance.
 
         :param workdir: The working directory path for the DependencyFile.
+        :param flush_interval: The minimum interval in seconds between two writes of the file by `update`, 0 to write
+            on every update.
         """
-        self._dependencies = {}
+        self._dependencies: Dict[str, list] = {}
+        self._dependents: Dict[str, Set[str]] = {}  # reverse index, dependency -> files depending on it
         self._filename = Path(workdir) / ".dependencies.json"
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._file_stat = None  # (mtime, size) of the file when last read or written
+        self._saved_at = 0.0
 
     async def load(self):
-        """Load dependencies from the file asynchronously."""
+        """Load dependencies from the file asynchronously, skipped if the file is unchanged since last load or save."""
         if not self._filename.exists():
             return
+        if self._stat() == self._file_stat:
+            return
         json_data = await aread(self._filename)
         json_data = re.sub(r"\\+", "/", json_data)  # Compatible with windows path
         self._dependencies = json.loads(json_data)
+        self._dependents = {}
+        for key, dependencies in self._dependencies.items():
+            for i in dependencies:
+                self._dependents.setdefault(i, set()).add(key)
+        self._file_stat = self._stat()
+        self._set_dirty(False)
 
     @handle_exception
     async def save(self):
         """Save dependencies to the file asynchronously."""
-        data = json.dumps(self._dependencies)
-        await awrite(filename=self._filename, data=data)
+        self.flush(force=True)
+
+    def flush(self, force: bool = False):
+        """Write the pending changes to the file, replacing it atomically.
+
+        :param force: Write the file even if there is no pending change.
+        """
+        if not self._dirty and not force:
+            return
+        self._filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = self._filename.with_name(f"{self._filename.name}.{os.getpid()}.tmp")
+        tmp_filename.write_text(json.dumps(self._dependencies), encoding="utf-8")
+        os.replace(tmp_filename, self._filename)
+        self._file_stat = self._stat()
+        self._saved_at = time.monotonic()
+        self._set_dirty(False)
 
     async def update(self, filename: Path | str, dependencies: Set[Path | str], persist=True):
         """Update dependencies for a file asynchronously.
 
         :param filename: The filename or path.
         :param dependencies: The set of dependencies.
-        :param persist: Whether to persist the changes immediately.
+        :param persist: Whether to persist the changes, written at most once every `flush_interval` seconds.
         """
-        if persist:
+        if persist and not self._dirty:
             await self.load()
 
         root = self._filename.parent
@@ -61,6 +106,8 @@ class DependencyFile:
         except ValueError:
             key = filename
         key = str(key)
+        for i in self._dependencies.get(key, []):
+            self._dependents.get(i, set()).discard(key)
         if dependencies:
             relative_paths = []
             for i in dependencies:
@@ -69,12 +116,16 @@ class DependencyFile:
                 except ValueError:
                     s = str(i)
                 relative_paths.append(s)
+                self._dependents.setdefault(s, set()).add(key)
 
             self._dependencies[key] = relative_paths
         elif key in self._dependencies:
             del self._dependencies[key]
+        else:
+            return
 
-        if persist:
+        self._set_dirty(True)
+        if persist and time.monotonic() - self._saved_at >= self.flush_interval:
             await self.save()
 
     async def get(self, filename: Path | str, persist=True):
@@ -84,21 +135,53 @@ class DependencyFile:
         :param persist: Whether to load dependencies from the file immediately.
         :return: A set of dependencies.
         """
-        if persist:
+        if persist and not self._dirty:
             await self.load()
 
-        root = self._filename.parent
-        try:
-            key = Path(filename).relative_to(root).as_posix()
-        except ValueError:
-            key = Path(filename).as_posix()
-        return set(self._dependencies.get(str(key), {}))
+        return set(self._dependencies.get(self._key(filename), {}))
+
+    def get_dependents(self, filename: Path | str) -> Set[str]:
+        """Get the files depending on a file from the loaded dependencies.
+
+        :param filename: The filename or path.
+        :return: A set of the files depending on `filename`.
+        """
+        return set(self._dependents.get(self._key(filename), set()))
 
     def delete_file(self):
         """Delete the dependency file."""
         self._filename.unlink(missing_ok=True)
+        self._file_stat = None
+        self._set_dirty(False)
 
     @property
     def exists(self):
         """Check if the dependency file exists."""
         return self._filename.exists()
+
+    def _key(self, filename: Path | str) -> str:
+        try:
+            key = Path(filename).relative_to(self._filename.parent).as_posix()
+        except ValueError:
+            key = Path(filename).as_posix()
+        return str(key)
+
+    def _stat(self):
+        stat = self._filename.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _set_dirty(self, dirty: bool):
+        self._dirty = dirty
+        if dirty:
+            _dirty_files.add(self)
+        else:
+            _dirty_files.discard(self)
+
+
+@atexit.register
+def _flush_dirty_files():
+    for i in list(_dirty_files):
+        try:
+            i.flush()
+        except Exception as e:
+            logger.warning(f"Failed to flush {i._filename}: {e}")
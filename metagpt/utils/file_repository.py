@@ -80,13 +80,21 @@ class FileRepository:
         :return: List of changed dependency filenames or paths.
         """
         dependencies = await self.get_dependency(filename=filename)
-        changed_files = set(self.changed_files.keys())
-        changed_dependent_files = set()
-        for df in dependencies:
-            rdf = Path(df).relative_to(self._relative_path)
-            if str(rdf) in changed_files:
-                changed_dependent_files.add(df)
-        return changed_dependent_files
+        if not dependencies:
+            return set()
+        changed_files = {(self._relative_path / i).as_posix() for i in self.changed_files.keys()}
+        return dependencies & changed_files
+
+    async def get_dependent_files(self, filename: Path | str) -> Set[str]:
+        """Get the files depending on a file.
+
+        :param filename: The filename or path within the repository.
+        :return: Set of the filenames or paths depending on the file.
+        """
+        pathname = self.workdir / filename
+        dependency_file = await self._git_repo.get_dependency()
+        await dependency_file.get(pathname)  # reload the dependencies if changed by other processes
+        return dependency_file.get_dependents(pathname)
 
     async def get(self, filename: Path | str) -> Document | None:
         """Read the content of a file.
@@ -40,8 +40,12 @@ class GitRepository:
 
     Attributes:
         _repository (Repo): The GitPython `Repo` object representing the Git repository.
+        dependency_flush_interval (float): The minimum interval in seconds between two writes of the dependency file
+            by `FileRepository.save`, the pending changes are written by `commit`, `archive`, `rename_root` and at exit.
     """
 
+    dependency_flush_interval: float = 5
+
     def __init__(self, local_path=None, auto_init=True):
         """Initialize a GitRepository instance.
 
@@ -101,11 +105,16 @@ class GitRepository:
 
         :param comments: Comments for the commit.
         """
+        if self._dependency:
+            self._dependency.flush()
         if self.is_valid:
             self._repository.index.commit(comments)
 
     def delete_repository(self):
         """Delete the entire repository directory."""
+        if self._dependency:
+            self._dependency.delete_file()
+            self._dependency = None
         if self.is_valid:
             try:
                 shutil.rmtree(self._repository.working_dir)
@@ -165,6 +174,8 @@ class GitRepository:
 
         :param comments: Comments for the archive commit.
         """
+        if self._dependency:
+            self._dependency.flush()
         logger.info(f"Archive: {list(self.changed_files.keys())}")
         self.add_change(self.changed_files)
         self.commit(comments)
@@ -188,7 +199,7 @@ class GitRepository:
         :return: An instance of DependencyFile.
         """
         if not self._dependency:
-            self._dependency = DependencyFile(workdir=self.workdir)
+            self._dependency = DependencyFile(workdir=self.workdir, flush_interval=self.dependency_flush_interval)
         return self._dependency
 
     def rename_root(self, new_dir_name):
@@ -198,6 +209,9 @@ class GitRepository:
         """
         if self.workdir.name == new_dir_name:
             return
+        if self._dependency:
+            self._dependency.flush()
+            self._dependency = None
         new_path = self.workdir.parent / new_dir_name
         if new_path.exists():
             logger.info(f"Delete directory {str(new_path)}")
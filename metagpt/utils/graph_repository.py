@@ -101,6 +101,19 @@ class GraphRepository(ABC):
         """
         pass
 
+    async def insert_many(self, spos: List[SPO]):
+        """Insert a batch of triples into the graph repository.
+
+        Args:
+            spos (List[SPO]): The triples to insert.
+
+        Example:
+            await my_repository.insert_many([SPO(subject="Node1", predicate="connects_to", object_="Node2")])
+            # Inserts a triple: Node1 connects_to Node2 into the graph repository.
+        """
+        for spo in spos:
+            await self.insert(subject=spo.subject, predicate=spo.predicate, object_=spo.object_)
+
     @abstractmethod
     async def select(self, subject: str = None, predicate: str = None, object_: str = None) -> List[SPO]:
         """Retrieve triples from the graph repository based on specified criteria.
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : indexed_graph_repository.py
+@Desc    : Graph repository based on SPO/POS/OSP hash indexes.
+    A drop-in replacement of DiGraphRepository: it keeps the same directed graph semantics (at most one predicate
+    between a subject and an object, the last insert wins) and the same JSON file format, while `select` and `delete`
+    look up the triples by index instead of scanning all the edges.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import networkx
+
+from metagpt.utils.di_graph_repository import DiGraphRepository
+from metagpt.utils.graph_repository import SPO, GraphRepository
+
+
+class IndexedGraphRepository(DiGraphRepository):
+    """Graph repository based on SPO/POS/OSP hash indexes."""
+
+    def __init__(self, name: str | Path, **kwargs):
+        GraphRepository.__init__(self, name=str(name), **kwargs)
+        self._clear()
+
+    def _clear(self):
+        self._nodes: Dict[str, None] = {}  # ordered set, nodes are kept after their edges are deleted like DiGraph
+        self._spo: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self._pos: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self._osp: Dict[str, Dict[str, str]] = {}  # object -> subject -> the only predicate between them
+
+    async def insert(self, subject: str, predicate: str, object_: str):
+        """Insert a new triple into the graph repository, replacing the predicate between the subject and the object.
+
+        Args:
+            subject (str): The subject of the triple.
+            predicate (str): The predicate describing the relationship.
+            object_ (str): The object of the triple.
+
+        Example:
+            await my_indexed_graph_repo.insert(subject="Node1", predicate="connects_to", object_="Node2")
+            # Adds a directed relationship: Node1 connects_to Node2
+        """
+        self._insert(subject, predicate, object_)
+
+    async def insert_many(self, spos: List[SPO]):
+        """Insert a batch of triples into the graph repository.
+
+        Args:
+            spos (List[SPO]): The triples to insert.
+        """
+        for spo in spos:
+            self._insert(spo.subject, spo.predicate, spo.object_)
+
+    async def select(self, subject: str = None, predicate: str = None, object_: str = None) -> List[SPO]:
+        """Retrieve triples from the graph repository based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            List[SPO]: A list of SPO objects representing the selected triples.
+
+        Example:
+            selected_triples = await my_indexed_graph_repo.select(subject="Node1", predicate="connects_to")
+            # Retrieves directed relationships where Node1 is the subject and the predicate is 'connects_to'.
+        """
+        return [SPO(subject=s, predicate=p, object_=o) for s, p, o in self._match(subject, predicate, object_)]
+
+    async def delete(self, subject: str = None, predicate: str = None, object_: str = None) -> int:
+        """Delete triples from the graph repository based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            int: The number of triples deleted from the repository.
+        """
+        rows = list(self._match(subject, predicate, object_))
+        for s, p, o in rows:
+            self._remove(s, p, o)
+        return len(rows)
+
+    def json(self) -> str:
+        """Convert the graph repository to a JSON-formatted string, in the format of DiGraphRepository."""
+        return json.dumps(networkx.node_link_data(self.repo))
+
+    def load_json(self, val: str):
+        """Load a JSON-encoded string saved by DiGraphRepository or IndexedGraphRepository.
+
+        Args:
+            val (str): A JSON-encoded string representing a graph structure.
+
+        Returns:
+            self: Returns the instance of the class with the loaded triples.
+        """
+        if not val:
+            return self
+        graph = networkx.node_link_graph(json.loads(val))
+        self._clear()
+        self._nodes.update(dict.fromkeys(graph.nodes))
+        for s, o, p in graph.edges(data="predicate"):
+            self._insert(s, p, o)
+        return self
+
+    @staticmethod
+    async def load_from(pathname: str | Path) -> GraphRepository:
+        """Create and load an indexed graph repository from a JSON file.
+
+        Args:
+            pathname (Union[str, Path]): The path to the JSON file to be loaded.
+
+        Returns:
+            GraphRepository: A new instance of the graph repository loaded from the specified JSON file.
+        """
+        pathname = Path(pathname)
+        graph = IndexedGraphRepository(name=pathname.stem, root=pathname.parent)
+        if pathname.exists():
+            await graph.load(pathname=pathname)
+        return graph
+
+    @property
+    def repo(self) -> networkx.DiGraph:
+        """Return a DiGraph copy of the graph repository."""
+        graph = networkx.DiGraph()
+        graph.add_nodes_from(self._nodes)
+        graph.add_edges_from((s, o, {"predicate": p}) for s, p, o in self._match())
+        return graph
+
+    def _insert(self, subject: str, predicate: str, object_: str):
+        old_predicate = self._osp.get(object_, {}).get(subject)
+        if old_predicate == predicate:
+            return
+        if old_predicate is not None:
+            self._remove(subject, old_predicate, object_)
+        self._nodes[subject] = None
+        self._nodes[object_] = None
+        self._spo.setdefault(subject, {}).setdefault(predicate, {})[object_] = None
+        self._pos.setdefault(predicate, {}).setdefault(object_, {})[subject] = None
+        self._osp.setdefault(object_, {})[subject] = predicate
+
+    def _remove(self, subject: str, predicate: str, object_: str):
+        for index, k1, k2, k3 in (
+            (self._spo, subject, predicate, object_),
+            (self._pos, predicate, object_, subject),
+        ):
+            level2 = index[k1]
+            del level2[k2][k3]
+            if not level2[k2]:
+                del level2[k2]
+                if not level2:
+                    del index[k1]
+        del self._osp[object_][subject]
+        if not self._osp[object_]:
+            del self._osp[object_]
+
+    def _match(self, subject: str = None, predicate: str = None, object_: str = None) -> Iterator[Tuple[str, str, str]]:
+        """Yield the (subject, predicate, object) triples matched, using the index of the bound terms"""
+        if subject and object_:
+            p = self._osp.get(object_, {}).get(subject)
+            if p is not None and (not predicate or predicate == p):
+                yield subject, p, object_
+        elif subject:
+            by_predicate = self._spo.get(subject, {})
+            predicates = [predicate] if predicate else by_predicate
+            for p in predicates:
+                for o in by_predicate.get(p, {}):
+                    yield subject, p, o
+        elif predicate:
+            by_object = self._pos.get(predicate, {})
+            objects = [object_] if object_ else by_object
+            for o in objects:
+                for s in by_object.get(o, {}):
+                    yield s, predicate, o
+        elif object_:
+            for s, p in self._osp.get(object_, {}).items():
+                yield s, p, object_
+        else:
+            for s, by_predicate in self._spo.items():
+                for p, objects in by_predicate.items():
+                    for o in objects:
+                        yield s, p, o
@@ -4,10 +4,20 @@
 
 import copy
 import pickle
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
 
 from metagpt.utils.common import import_class
 
 
+@lru_cache(maxsize=1024)
+def get_model_json_schema(model_class: Type[BaseModel]) -> dict:
+    """Cached `model_class.model_json_schema()`, the returned schema is shared and must not be modified."""
+    return model_class.model_json_schema()
+
+
 def actionoutout_schema_to_mapping(schema: dict) -> dict:
     """
     directly traverse the `properties` in the first level.
@@ -62,7 +72,7 @@ def serialize_message(message: "Message"):
     ic = message_cp.instruct_content
     if ic:
         # model create by pydantic create_model like `pydantic.main.prd`, can't pickle.dump directly
-        schema = ic.model_json_schema()
+        schema = get_model_json_schema(type(ic))
         mapping = actionoutout_schema_to_mapping(schema)
 
         message_cp.instruct_content = {"class": schema["title"], "mapping": mapping, "value": ic.model_dump()}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : sqlite_graph_repository.py
+@Desc    : Graph repository stored in a SQLite database.
+    The on-disk variant of IndexedGraphRepository for graphs too large to be kept in memory: the triples are indexed
+    by (subject, object), (subject, predicate) and (predicate, object), and can be imported from or exported to the
+    JSON format of DiGraphRepository.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import networkx
+
+from metagpt.utils.common import aread, awrite
+from metagpt.utils.graph_repository import SPO, GraphRepository
+
+
+class SQLiteGraphRepository(GraphRepository):
+    """Graph repository stored in a SQLite database, `root/name.sqlite3`, or in memory if `root` is not given.
+
+    Like the JSON file of DiGraphRepository, the changes are written to the database by `save` or `close`.
+    """
+
+    def __init__(self, name: str | Path, **kwargs):
+        super().__init__(name=str(name), **kwargs)
+        if self.root:
+            Path(self.root).mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_pathname) if self.root else ":memory:")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS nodes (name TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS triples (
+                subject TEXT NOT NULL,
+                predicate TEXT NOT NULL,
+                object TEXT NOT NULL,
+                PRIMARY KEY (subject, object)
+            );
+            CREATE INDEX IF NOT EXISTS idx_triples_sp ON triples (subject, predicate);
+            CREATE INDEX IF NOT EXISTS idx_triples_po ON triples (predicate, object);
+            CREATE INDEX IF NOT EXISTS idx_triples_o ON triples (object);
+            """
+        )
+
+    async def insert(self, subject: str, predicate: str, object_: str):
+        """Insert a new triple into the graph repository, replacing the predicate between the subject and the object.
+
+        Args:
+            subject (str): The subject of the triple.
+            predicate (str): The predicate describing the relationship.
+            object_ (str): The object of the triple.
+        """
+        self._insert_rows([(subject, predicate, object_)])
+
+    async def insert_many(self, spos: List[SPO]):
+        """Insert a batch of triples into the graph repository.
+
+        Args:
+            spos (List[SPO]): The triples to insert.
+        """
+        self._insert_rows([(i.subject, i.predicate, i.object_) for i in spos])
+
+    async def select(self, subject: str = None, predicate: str = None, object_: str = None) -> List[SPO]:
+        """Retrieve triples from the graph repository based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            List[SPO]: A list of SPO objects representing the selected triples.
+        """
+        return [SPO(subject=s, predicate=p, object_=o) for s, p, o in self._match(subject, predicate, object_)]
+
+    async def delete(self, subject: str = None, predicate: str = None, object_: str = None) -> int:
+        """Delete triples from the graph repository based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            int: The number of triples deleted from the repository.
+        """
+        where, params = self._where(subject, predicate, object_)
+        cursor = self._conn.execute(f"DELETE FROM triples{where}", params)
+        return cursor.rowcount
+
+    async def save(self, path: str | Path = None):
+        """Commit the changes, and export the graph repository to `path/name.json` if `path` is given.
+
+        Args:
+            path (Union[str, Path], optional): The directory path where the JSON file will be saved.
+        """
+        self._conn.commit()
+        if not path:
+            return
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        await awrite(filename=(path / self.name).with_suffix(".json"), data=self.json(), encoding="utf-8")
+
+    async def load(self, pathname: str | Path):
+        """Import the triples of a JSON file saved by DiGraphRepository."""
+        data = await aread(filename=pathname, encoding="utf-8")
+        self.load_json(data)
+
+    def json(self) -> str:
+        """Convert the graph repository to a JSON-formatted string, in the format of DiGraphRepository."""
+        graph = networkx.DiGraph()
+        graph.add_nodes_from(i for (i,) in self._conn.execute("SELECT name FROM nodes ORDER BY rowid"))
+        graph.add_edges_from((s, o, {"predicate": p}) for s, p, o in self._match())
+        return json.dumps(networkx.node_link_data(graph))
+
+    def load_json(self, val: str):
+        """Replace the triples with the ones of a JSON-encoded string saved by DiGraphRepository.
+
+        Args:
+            val (str): A JSON-encoded string representing a graph structure.
+
+        Returns:
+            self: Returns the instance of the class with the loaded triples.
+        """
+        if not val:
+            return self
+        graph = networkx.node_link_graph(json.loads(val))
+        self._conn.execute("DELETE FROM triples")
+        self._conn.execute("DELETE FROM nodes")
+        self._conn.executemany("INSERT OR IGNORE INTO nodes (name) VALUES (?)", ((i,) for i in graph.nodes))
+        self._insert_rows([(s, p, o) for s, o, p in graph.edges(data="predicate")])
+        return self
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    @property
+    def root(self) -> str:
+        """Return the root directory path for the graph repository files."""
+        return self._kwargs.get("root")
+
+    @property
+    def db_pathname(self) -> Path:
+        """Return the path and filename to the database file."""
+        return (Path(self.root) / self.name).with_suffix(".sqlite3")
+
+    def _insert_rows(self, rows: List[Tuple[str, str, str]]):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO nodes (name) VALUES (?)", ((i,) for s, _, o in rows for i in (s, o))
+        )
+        self._conn.executemany(
+            "INSERT INTO triples (subject, predicate, object) VALUES (?, ?, ?) "
+            "ON CONFLICT (subject, object) DO UPDATE SET predicate = excluded.predicate",
+            rows,
+        )
+
+    @staticmethod
+    def _where(subject: str = None, predicate: str = None, object_: str = None) -> Tuple[str, tuple]:
+        conditions = [(k, v) for k, v in (("subject", subject), ("predicate", predicate), ("object", object_)) if v]
+        if not conditions:
+            return "", ()
+        return " WHERE " + " AND ".join(f"{k} = ?" for k, _ in conditions), tuple(v for _, v in conditions)
+
+    def _match(self, subject: str = None, predicate: str = None, object_: str = None) -> Iterator[Tuple[str, str, str]]:
+        where, params = self._where(subject, predicate, object_)
+        return self._conn.execute(f"SELECT subject, predicate, object FROM triples{where} ORDER BY rowid", params)
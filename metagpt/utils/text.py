@@ -1,6 +1,6 @@
 from typing import Generator, Sequence
 
-from metagpt.utils.token_counter import TOKEN_MAX, count_output_tokens
+from metagpt.utils.token_counter import TOKEN_MAX, count_output_tokens, get_encoding
 
 
 def reduce_message_length(
@@ -11,6 +11,10 @@ def reduce_message_length(
 ) -> str:
     """Reduce the length of concatenated message segments to fit within the maximum token size.
 
+    The first message is returned as soon as it fits, otherwise the progressively shorter messages are binary searched
+    for the longest one fitting, so only a few of them are tokenized. A message having fewer UTF-8 bytes than the
+    maximum token size fits without being tokenized, a token being at least one byte.
+
     Args:
         msgs: A generator of strings representing progressively shorter valid prompts.
         model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
@@ -24,9 +28,25 @@ def reduce_message_length(
         RuntimeError: If it fails to reduce the concatenated message length.
     """
     max_token = TOKEN_MAX.get(model_name, 2048) - count_output_tokens(system_text, model_name) - reserved
-    for msg in msgs:
-        if count_output_tokens(msg, model_name) < max_token or model_name not in TOKEN_MAX:
-            return msg
+
+    def fits(msg: str) -> bool:
+        return len(msg.encode("utf-8")) < max_token or count_output_tokens(msg, model_name) < max_token
+
+    msgs = iter(msgs)
+    first = next(msgs, None)
+    if first is not None and (model_name not in TOKEN_MAX or fits(first)):
+        return first
+
+    candidates = list(msgs)
+    lo, hi = 0, len(candidates)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(candidates[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    if lo < len(candidates):
+        return candidates[lo]
 
     raise RuntimeError("fail to reduce message length")
 
@@ -37,43 +57,112 @@ def generate_prompt_chunk(
     model_name: str,
     system_text: str,
     reserved: int = 0,
+    overlap: int = 0,
 ) -> Generator[str, None, None]:
     """Split the text into chunks of a maximum token size.
 
+    The text is encoded once, and each chunk is cut at the last markdown heading, blank line, line, sentence or word
+    boundary within the token budget, preferring the boundaries in the second half of it. The chunks are yielded
+    lazily.
+
     Args:
         text: The text to split.
         prompt_template: The template for the prompt, containing a single `{}` placeholder. For example, "### Reference\n{}".
         model_name: The name of the encoding to use. (e.g., "gpt-3.5-turbo")
         system_text: The system prompts.
         reserved: The number of reserved tokens.
+        overlap: The number of tokens of the end of a chunk repeated at the start of the next one.
 
     Yields:
         The chunk of text.
     """
-    paragraphs = text.splitlines(keepends=True)
-    current_token = 0
-    current_lines = []
-
     reserved = reserved + count_output_tokens(prompt_template + system_text, model_name)
     # 100 is a magic number to ensure the maximum context length is not exceeded
     max_token = TOKEN_MAX.get(model_name, 2048) - reserved - 100
+    if max_token <= 0:
+        raise ValueError(f"No room left for the text in the prompt of {model_name}, reserved {reserved} tokens")
+    overlap = max(0, min(overlap, max_token // 2))
 
-    while paragraphs:
-        paragraph = paragraphs.pop(0)
-        token = count_output_tokens(paragraph, model_name)
-        if current_token + token <= max_token:
-            current_lines.append(paragraph)
-            current_token += token
-        elif token > max_token:
-            paragraphs = split_paragraph(paragraph) + paragraphs
-            continue
-        else:
-            yield prompt_template.format("".join(current_lines))
-            current_lines = [paragraph]
-            current_token = token
+    for start, end in _split_text(text, get_encoding(model_name), max_token, overlap):
+        yield prompt_template.format(text[start:end])
+
+
+# the boundaries a chunk is preferably cut at, by priority, and the offset of the cut from the separator found
+_CHUNK_BOUNDARIES = [
+    [(b"\n#", 1)],  # before a markdown heading
+    [(b"\n\n", 2)],
+    [(b"\n", 1)],
+    [(b". ", 2), (b"! ", 2), (b"? ", 2), ("。".encode(), 3), ("！".encode(), 3), ("？".encode(), 3)],
+    [(b" ", 1), (b"\t", 1)],
+]
 
-    if current_lines:
-        yield prompt_template.format("".join(current_lines))
+
+def _split_text(text: str, encoding, max_token: int, overlap: int = 0) -> Generator[tuple[int, int], None, None]:
+    """Yield the (start, end) character offsets of the chunks of at most about `max_token` tokens of the text.
+
+    The positions are tracked in UTF-8 bytes, the bytes of a range of tokens are decoded at once, and the token at a
+    cut is found by a binary search over the decoded lengths, so the text is tokenized only once.
+    """
+    data = text.encode("utf-8")
+    tokens = encoding.encode(text, disallowed_special=())
+    n_tokens = len(tokens)
+
+    def decoded_len(i: int, j: int) -> int:
+        return len(encoding.decode_bytes(tokens[i:j]))
+
+    def token_before(i: int, size: int, limit: int) -> tuple[int, int]:
+        """The last token j in [i, limit] with tokens[i:j] at most `size` bytes, and their size"""
+        lo, hi = i, limit
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if decoded_len(i, mid) <= size:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo, decoded_len(i, lo)
+
+    # the chunk starts at `text_byte` and `char_start` of the text, within or at the start of the token `tok`, which
+    # starts at `tok_byte`
+    tok = tok_byte = text_byte = char_start = 0
+    while n_tokens - tok > max_token:
+        window_end = tok_byte + decoded_len(tok, tok + max_token)
+        cut = _find_cut(data, text_byte, window_end)
+        char_end = char_start + len(data[text_byte:cut].decode("utf-8"))
+        yield char_start, char_end
+
+        next_byte = cut
+        if overlap:
+            overlap_tok = max(token_before(tok, cut - tok_byte, tok + max_token)[0] - overlap, tok)
+            overlap_byte = tok_byte + decoded_len(tok, overlap_tok)
+            space = data.find(b" ", overlap_byte, cut)  # not in the middle of a word
+            overlap_byte = space + 1 if space >= 0 else overlap_byte
+            while overlap_byte < cut and (data[overlap_byte] & 0xC0) == 0x80:  # nor of a character
+                overlap_byte += 1
+            if text_byte < overlap_byte < cut:
+                next_byte = overlap_byte
+        next_tok, size = token_before(tok, next_byte - tok_byte, tok + max_token)
+        char_start = char_end - len(data[next_byte:cut].decode("utf-8"))
+        tok, tok_byte, text_byte = next_tok, tok_byte + size, next_byte
+
+    if text_byte < len(data):
+        yield char_start, len(text)
+
+
+def _find_cut(data: bytes, start: int, end: int) -> int:
+    """The byte position to end the chunk [start, end) of the text at, on the best boundary found"""
+    for lower in (start + (end - start) // 2, start):
+        for separators in _CHUNK_BOUNDARIES:
+            cut = -1
+            for sep, offset in separators:
+                pos = data.rfind(sep, lower, end)
+                if pos >= 0:
+                    cut = max(cut, pos + offset)
+            if cut > start:
+                return cut
+    cut = end
+    while cut > start + 1 and cut < len(data) and (data[cut] & 0xC0) == 0x80:  # not in the middle of a character
+        cut -= 1
+    return cut
 
 
 def split_paragraph(paragraph: str, sep: str = ".,", count: int = 2) -> list[str]:
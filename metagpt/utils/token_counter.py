@@ -10,6 +10,10 @@ ref3: https://github.com/Significant-Gravitas/Auto-GPT/blob/master/autogpt/llm/t
 ref4: https://github.com/hwchase17/langchain/blob/master/langchain/chat_models/openai.py
 ref5: https://ai.google.dev/models/gemini
 """
+import functools
+import hashlib
+from collections import OrderedDict
+
 import anthropic
 import tiktoken
 from openai.types import CompletionUsage
@@ -380,21 +384,24 @@ SPARK_TOKENS = {
 }
 
 
-def count_input_tokens(messages, model="gpt-3.5-turbo-0125"):
-    """Return the number of tokens used by a list of messages."""
-    if "claude" in model:
-        # rough estimation for models newer than claude-2.1
-        vo = anthropic.Client()
-        num_tokens = 0
-        for message in messages:
-            for key, value in message.items():
-                num_tokens += vo.count_tokens(str(value))
-        return num_tokens
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """Return the tiktoken encoding of the model, resolved once per model."""
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
         logger.info(f"Warning: model {model} not found in tiktoken. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@functools.lru_cache(maxsize=None)
+def get_claude_tokenizer():
+    """Return the tokenizer bundled in the anthropic SDK, it's local and needs no network."""
+    return anthropic.Client().get_tokenizer()
+
+
+def _get_tokens_per_message(model: str) -> tuple[int, int]:
+    """Return `(tokens_per_message, tokens_per_name)` of the chat format of the model."""
     if model in {
         "gpt-3.5-turbo-0613",
         "gpt-3.5-turbo-16k-0613",
@@ -429,12 +436,6 @@ def count_input_tokens(messages, model="gpt-3.5-turbo-0125"):
     elif model == "gpt-3.5-turbo-0301":
         tokens_per_message = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
         tokens_per_name = -1  # if there's a name, the role is omitted
-    elif "gpt-3.5-turbo" == model:
-        logger.info("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125.")
-        return count_input_tokens(messages, model="gpt-3.5-turbo-0125")
-    elif "gpt-4" == model:
-        logger.info("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
-        return count_input_tokens(messages, model="gpt-4-0613")
     elif "open-llm-model" == model:
         """
         For self-hosted open_llm api, they include lots of different models. The message tokens calculation is
@@ -448,21 +449,116 @@ def count_input_tokens(messages, model="gpt-3.5-turbo-0125"):
             f"See https://cookbook.openai.com/examples/how_to_count_tokens_with_tiktoken "
             f"for information on how messages are converted to tokens."
         )
-    num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.items():
-            content = value
-            if isinstance(value, list):
-                # for gpt-4v
-                for item in value:
-                    if isinstance(item, dict) and item.get("type") in ["text"]:
-                        content = item.get("text", "")
-            num_tokens += len(encoding.encode(content))
-            if key == "name":
-                num_tokens += tokens_per_name
-    num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
-    return num_tokens
+    return tokens_per_message, tokens_per_name
+
+
+class TokenCounter:
+    """Count tokens with memoized encoders, and keep the token counts of texts in a LRU cache keyed by content hash.
+
+    Re-counting a conversation after appending a message only encodes the new message, and the batch methods encode
+    all the uncached texts in one pass.
+    """
+
+    def __init__(self, cache_size: int = 8192):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+
+    def count_text(self, text: str, model: str) -> int:
+        """Return the number of tokens in a text string."""
+        return self.count_texts([text], model)[0]
+
+    def count_texts(self, texts: list[str], model: str) -> list[int]:
+        """Return the number of tokens of each text string."""
+        scheme = "claude" if "claude" in model else get_encoding(model).name
+        keys = [(scheme, hashlib.blake2b(i.encode("utf-8", "surrogatepass"), digest_size=16).digest()) for i in texts]
+
+        counts = {}
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key in counts or key in misses:
+                continue
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                counts[key] = self._cache[key]
+            else:
+                misses[key] = text
+        if misses:
+            for key, count in zip(misses.keys(), self._encode_batch(list(misses.values()), model)):
+                counts[key] = count
+                self._cache[key] = count
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return [counts[i] for i in keys]
+
+    def count_messages(self, messages: list[dict], model: str = "gpt-3.5-turbo-0125") -> int:
+        """Return the number of tokens used by a list of messages."""
+        return self.count_messages_batch([messages], model)[0]
+
+    def count_messages_batch(self, prompts: list[list[dict]], model: str = "gpt-3.5-turbo-0125") -> list[int]:
+        """Return the number of tokens used by each list of messages, all the contents are counted in one pass."""
+        if "claude" in model:
+            # rough estimation for models newer than claude-2.1
+            texts = [[str(value) for message in messages for value in message.values()] for messages in prompts]
+            counts = iter(self.count_texts([i for j in texts for i in j], model))
+            return [sum(next(counts) for _ in i) for i in texts]
+        if "gpt-3.5-turbo" == model:
+            logger.info(
+                "Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125."
+            )
+            return self.count_messages_batch(prompts, model="gpt-3.5-turbo-0125")
+        if "gpt-4" == model:
+            logger.info("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
+            return self.count_messages_batch(prompts, model="gpt-4-0613")
+        tokens_per_message, tokens_per_name = _get_tokens_per_message(model)
+
+        contents = []
+        for messages in prompts:
+            for message in messages:
+                for value in message.values():
+                    content = value
+                    if isinstance(value, list):
+                        # for gpt-4v
+                        for item in value:
+                            if isinstance(item, dict) and item.get("type") in ["text"]:
+                                content = item.get("text", "")
+                    contents.append(content)
+        counts = iter(self.count_texts(contents, model))
+
+        num_tokens_list = []
+        for messages in prompts:
+            num_tokens = 0
+            for message in messages:
+                num_tokens += tokens_per_message
+                for key in message.keys():
+                    num_tokens += next(counts)
+                    if key == "name":
+                        num_tokens += tokens_per_name
+            num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
+            num_tokens_list.append(num_tokens)
+        return num_tokens_list
+
+    def clear(self):
+        self._cache.clear()
+
+    @staticmethod
+    def _encode_batch(texts: list[str], model: str) -> list[int]:
+        if "claude" in model:
+            return [len(i.ids) for i in get_claude_tokenizer().encode_batch(texts)]
+        return [len(i) for i in get_encoding(model).encode_batch(texts)]
+
+
+# Shared token counter
+TOKEN_COUNTER = TokenCounter()
+
+
+def count_input_tokens(messages, model="gpt-3.5-turbo-0125"):
+    """Return the number of tokens used by a list of messages."""
+    return TOKEN_COUNTER.count_messages(messages, model)
+
+
+def count_input_tokens_batch(prompts: list[list[dict]], model="gpt-3.5-turbo-0125") -> list[int]:
+    """Return the number of tokens used by each list of messages."""
+    return TOKEN_COUNTER.count_messages_batch(prompts, model)
 
 
 def count_output_tokens(string: str, model: str) -> int:
@@ -476,16 +572,7 @@ def count_output_tokens(string: str, model: str) -> int:
     Returns:
         int: The number of tokens in the text string.
     """
-    if "claude" in model:
-        vo = anthropic.Client()
-        num_tokens = vo.count_tokens(string)
-        return num_tokens
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        logger.info(f"Warning: model {model} not found in tiktoken. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(string))
+    return TOKEN_COUNTER.count_text(string, model)
 
 
 def get_max_completion_tokens(messages: list[dict], model: str, default: int) -> int:
@@ -0,0 +1,3 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmarks, run each module with `python -m tests.benchmark.<module>`
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the model class and json schema lookups done by each ActionNode.fill
+#           Usage: python -m tests.benchmark.bench_action_node
+
+import resource
+import time
+
+from metagpt.actions.design_api_an import DESIGN_API_NODE
+from metagpt.actions.project_management_an import PM_NODE
+from metagpt.actions.write_prd_an import WRITE_PRD_NODE
+from metagpt.utils.serialize import get_model_json_schema
+
+FILLS = 1_000
+NODES = {"WritePRD": WRITE_PRD_NODE, "WriteDesign": DESIGN_API_NODE, "WriteTasks": PM_NODE}
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench(node) -> float:
+    """Same lookups as one json `fill` of the node: output class, json schema and instruct_content class"""
+    start = time.perf_counter()
+    for _ in range(FILLS):
+        mapping = node.get_mapping("auto")
+        output_class = node.create_model_class(f"{node.key}_AN", mapping)
+        get_model_json_schema(output_class)
+        node.create_class()
+    return (time.perf_counter() - start) / FILLS * 1e3
+
+
+def main():
+    print(f"{'node':>12} {'fill (ms)':>10} {'max rss (MB)':>14}")
+    for name, node in NODES.items():
+        fill_ms = bench(node)
+        print(f"{name:>12} {fill_ms:>10.3f} {max_rss_mb():>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : benchmark of the aflow code execution, the warm `SandboxPool` against the previous ways: a process pool
+#           created per `Programmer.exec_code` call, and the solutions checked by threads of the evaluator process,
+#           whose runaway solutions keep spinning after their timeout
+#           Usage: python -m tests.benchmark.bench_aflow_sandbox
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from metagpt.ext.aflow.benchmark.sandbox import SandboxPool, check_program, run_code
+
+N_CODES = 100
+N_CHECKS = 200
+N_RUNAWAY = 4
+CONCURRENCY = 50
+TIMEOUT = 1
+
+CODE = "def solve():\n    return sum(i * i for i in range(10000))\n"
+SOLUTION = "def f(n):\n    return sum(i * i for i in range(n))\n"
+RUNAWAY_SOLUTION = "def f(n):\n    while True:\n        pass\n"
+LEGACY_THREADS = []
+TEST = "def check(candidate):\n    assert candidate(20000) == sum(i * i for i in range(20000))\n"
+
+
+async def legacy_exec_code(code, timeout=30):
+    """the previous `Programmer.exec_code`"""
+    loop = asyncio.get_running_loop()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        future = loop.run_in_executor(executor, run_code, code)
+        return await asyncio.wait_for(future, timeout=timeout)
+
+
+def legacy_check_solution(solution, test, entry_point, timeout):
+    """the previous `HumanEvalBenchmark.check_solution`, `check` runs in a thread which can not be stopped"""
+    global_dict = {}
+    exec(solution, global_dict)
+    exec(test, global_dict)
+    result, done = [], threading.Event()
+
+    def target():
+        try:
+            result.append(global_dict["check"](global_dict[entry_point]))
+        except Exception as e:
+            result.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=target, daemon=True)
+    LEGACY_THREADS.append(thread)
+    thread.start()
+    if not done.wait(timeout):
+        return "FAIL"
+    return "PASS" if result[0] is None else "FAIL"
+
+
+async def gather_limited(coros, limit=CONCURRENCY):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[run(i) for i in coros])
+
+
+async def pool_check(pool: SandboxPool, solution: str):
+    try:
+        await pool.run(check_program, solution, TEST, "f", True, timeout=TIMEOUT)
+        return "PASS"
+    except Exception:
+        return "FAIL"
+
+
+def solutions():
+    return [RUNAWAY_SOLUTION] * N_RUNAWAY + [SOLUTION] * (N_CHECKS - N_RUNAWAY)
+
+
+async def main():
+    begin = time.perf_counter()
+    await gather_limited([legacy_exec_code(CODE) for _ in range(N_CODES)], limit=8)
+    legacy_exec_cost = time.perf_counter() - begin
+
+    pool = SandboxPool(timeout=TIMEOUT)
+    await pool.run(run_code, CODE)  # warm up
+    begin = time.perf_counter()
+    await gather_limited([pool.run(run_code, CODE) for _ in range(N_CODES)], limit=8)
+    pool_exec_cost = time.perf_counter() - begin
+    print(f"Programmer.exec_code, {N_CODES} codes, {pool.size} workers")
+    print(f"  process pool per call: {N_CODES / legacy_exec_cost:8.1f} codes/s")
+    print(f"  sandbox pool         : {N_CODES / pool_exec_cost:8.1f} codes/s, x{legacy_exec_cost / pool_exec_cost:.1f}")
+
+    # the pool first, the runaway threads of the legacy check keep spinning in this process afterwards
+    begin = time.perf_counter()
+    checked = await gather_limited([pool_check(pool, i) for i in solutions()])
+    pool_check_cost = time.perf_counter() - begin
+    begin = time.perf_counter()
+    legacy = await gather_limited(
+        [asyncio.to_thread(legacy_check_solution, i, TEST, "f", TIMEOUT) for i in solutions()]
+    )
+    legacy_check_cost = time.perf_counter() - begin
+    leaked = sum(i.is_alive() for i in LEGACY_THREADS)
+    begin = time.perf_counter()
+    await gather_limited([asyncio.to_thread(legacy_check_solution, SOLUTION, TEST, "f", TIMEOUT) for _ in range(20)])
+    legacy_after_cost = time.perf_counter() - begin
+
+    assert legacy.count("PASS") <= checked.count("PASS") == N_CHECKS - N_RUNAWAY
+    print(f"check_solution, {N_CHECKS} solutions, {N_RUNAWAY} of them never return, timeout {TIMEOUT}s")
+    print(f"  threads     : {N_CHECKS / legacy_check_cost:8.1f} checks/s, {leaked} threads still spinning")
+    print(f"  threads, with them spinning: {20 / legacy_after_cost:8.1f} checks/s")
+    print(f"  sandbox pool: {N_CHECKS / pool_check_cost:8.1f} checks/s, x{legacy_check_cost / pool_check_cost:.1f}")
+    print(f"  sandbox stats: {pool.stats}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
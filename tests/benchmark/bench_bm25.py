@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of DynamicBM25Retriever on the docstrings of the metagpt package: adding nodes in small
+#           batches, as SimpleEngine.add_docs does, and querying
+#           Usage: python -m tests.benchmark.bench_bm25
+
+import ast
+import time
+
+from llama_index.core.schema import TextNode
+from rank_bm25 import BM25Okapi
+
+from metagpt.const import METAGPT_ROOT
+from metagpt.rag.retrievers.bm25_retriever import DynamicBM25Retriever
+
+
+def load_texts() -> list[str]:
+    texts = []
+    for filename in sorted((METAGPT_ROOT / "metagpt").rglob("*.py")):
+        tree = ast.parse(filename.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and ast.get_docstring(node):
+                texts.append(f"{node.name} {ast.get_docstring(node)}")
+    return texts
+
+
+def bench_add(texts: list[str], batch: int) -> tuple[float, float]:
+    """Return (add time of the incremental index, add time of a BM25Okapi rebuilt per batch), in seconds"""
+    nodes = [TextNode(id_=str(i), text=t) for i, t in enumerate(texts)]
+    retriever = DynamicBM25Retriever(nodes=[], tokenizer=str.split)
+    start = time.perf_counter()
+    for i in range(0, len(nodes), batch):
+        retriever.add_nodes(nodes[i : i + batch])
+    incremental_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(nodes), batch):
+        BM25Okapi([t.split() for t in texts[: i + batch]])
+    rebuild_s = time.perf_counter() - start
+    return incremental_s, rebuild_s
+
+
+def bench_query(texts: list[str], queries: list[str]) -> tuple[float, float]:
+    """Return (query time of the retriever, query time of BM25Okapi), in milliseconds"""
+    retriever = DynamicBM25Retriever(nodes=[TextNode(id_=str(i), text=t) for i, t in enumerate(texts)])
+    start = time.perf_counter()
+    for q in queries:
+        retriever.retrieve(q)
+    retriever_ms = (time.perf_counter() - start) / len(queries) * 1e3
+
+    okapi = BM25Okapi([retriever._tokenizer(t) for t in texts])
+    start = time.perf_counter()
+    for q in queries:
+        scores = okapi.get_scores(retriever._tokenizer(q))
+        sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:5]
+    okapi_ms = (time.perf_counter() - start) / len(queries) * 1e3
+    return retriever_ms, okapi_ms
+
+
+def main():
+    texts = load_texts()
+    print(f"{len(texts)} docstrings")
+    for batch in (1, 10, 100):
+        incremental_s, rebuild_s = bench_add(texts, batch)
+        print(f"add, batch {batch:>3}: incremental {incremental_s:.3f} s, rebuild {rebuild_s:.3f} s")
+    queries = ["write the code of a game", "search the web and summarize", "parse the repository symbols"]
+    retriever_ms, okapi_ms = bench_query(texts, queries)
+    print(f"query: incremental {retriever_ms:.3f} ms, BM25Okapi {okapi_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the graph repositories on the symbol graph of the metagpt package, with the
+#           lookups issued by the rebuild class/sequence view pipelines
+#           Usage: python -m tests.benchmark.bench_graph_repository
+
+import asyncio
+import tempfile
+import time
+
+from metagpt.const import METAGPT_ROOT
+from metagpt.repo_parser import RepoParser
+from metagpt.utils.di_graph_repository import DiGraphRepository
+from metagpt.utils.graph_repository import GraphKeyword, GraphRepository
+from metagpt.utils.indexed_graph_repository import IndexedGraphRepository
+from metagpt.utils.sqlite_graph_repository import SQLiteGraphRepository
+
+
+async def bench(graph_db: GraphRepository, symbols) -> dict[str, float]:
+    start = time.perf_counter()
+    for file_info in symbols:
+        await GraphRepository.update_graph_db_with_file_info(graph_db=graph_db, file_info=file_info)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = await graph_db.select(predicate=GraphKeyword.IS, object_=GraphKeyword.CLASS)
+    for r in rows:
+        await graph_db.select(subject=r.subject, predicate=GraphKeyword.HAS_PAGE_INFO)
+        await graph_db.select(subject=r.subject, predicate=GraphKeyword.HAS_CLASS_METHOD)
+        await graph_db.select(subject=r.subject)
+    select_ms = (time.perf_counter() - start) / (len(rows) * 3 + 1) * 1e3
+
+    start = time.perf_counter()
+    for r in rows:
+        await graph_db.delete(subject=r.subject, predicate=GraphKeyword.IS, object_=GraphKeyword.CLASS)
+        await graph_db.insert(subject=r.subject, predicate=GraphKeyword.IS, object_=GraphKeyword.CLASS)
+    update_ms = (time.perf_counter() - start) / len(rows) * 1e3
+    triples = len(await graph_db.select())
+    return {"triples": triples, "build (s)": build_s, "select (ms)": select_ms, "delete+insert (ms)": update_ms}
+
+
+async def main():
+    symbols = RepoParser(base_directory=METAGPT_ROOT / "metagpt").generate_symbols()
+    with tempfile.TemporaryDirectory() as root:
+        graphs = {
+            "DiGraph": DiGraphRepository(name="bench", root=root),
+            "Indexed": IndexedGraphRepository(name="bench", root=root),
+            "SQLite": SQLiteGraphRepository(name="bench", root=root),
+        }
+        print(f"{'repository':>10} {'triples':>8} {'build (s)':>10} {'select (ms)':>12} {'delete+insert (ms)':>19}")
+        for name, graph_db in graphs.items():
+            r = await bench(graph_db, symbols)
+            print(
+                f"{name:>10} {r['triples']:>8} {r['build (s)']:>10.2f} {r['select (ms)']:>12.3f}"
+                f" {r['delete+insert (ms)']:>19.3f}"
+            )
+        graphs["SQLite"].close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of ExecuteNbCode leasing warm kernels from the kernel pool, against a kernel started per
+#           executor, on the executors of a DataInterpreter run importing pandas and sklearn in their first cell
+#           Usage: python -m tests.benchmark.bench_kernel_pool
+
+import asyncio
+import time
+
+from metagpt.actions.di.execute_nb_code import ExecuteNbCode
+from metagpt.actions.di.kernel_pool import get_kernel_pool
+
+N_EXECUTORS = 8
+CODE = "import pandas as pd\nfrom sklearn.linear_model import LinearRegression\nprint(pd.DataFrame({'a': [1]}).shape)"
+
+
+async def run_executors(use_kernel_pool: bool) -> list[float]:
+    latencies = []
+    for _ in range(N_EXECUTORS):
+        executor = ExecuteNbCode(use_kernel_pool=use_kernel_pool)
+        executor._display = lambda *args, **kwargs: None
+        start = time.perf_counter()
+        _, success = await executor.run(CODE)
+        latencies.append(time.perf_counter() - start)
+        assert success
+        await executor.terminate()
+        await asyncio.sleep(0.5)  # the other steps of the role, the pool warms a kernel meanwhile
+    return latencies
+
+
+async def main():
+    for label, use_kernel_pool in (("kernel per executor", False), ("kernel pool", True)):
+        latencies = await run_executors(use_kernel_pool)
+        print(
+            f"{label:>19}: first cell in {sum(latencies) / len(latencies):.2f} s on average, "
+            f"{max(latencies):.2f} s at most, {latencies[0]:.2f} s for the first executor"
+        )
+    print(f"kernel pool: {get_kernel_pool().stats()}")
+    await get_kernel_pool().aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of Memory.add and the observe cycle of Role as the message count grows
+#           Usage: python -m tests.benchmark.bench_memory
+
+import time
+
+from metagpt.memory.memory import Memory
+from metagpt.schema import Message
+
+SIZES = (1_000, 5_000, 20_000)
+PROBES = 200
+
+
+def bench(size: int) -> tuple[float, float]:
+    memory = Memory()
+    memory.add_batch(Message(content=f"message {i}", role=f"role{i % 8}") for i in range(size))
+
+    start = time.perf_counter()
+    for i in range(PROBES):
+        memory.add(Message(content=f"probe {i}", role="probe"))
+    add_us = (time.perf_counter() - start) / PROBES * 1e6
+
+    # Same steps as `Role._observe`: filter unseen messages, then store them.
+    start = time.perf_counter()
+    for i in range(PROBES):
+        news = [Message(content=f"news {i}", role="news"), memory.storage[i]]
+        unseen = [n for n in news if not memory.contains(n)]
+        memory.add_batch(news)
+        assert len(unseen) == 1
+    observe_us = (time.perf_counter() - start) / PROBES * 1e6
+    return add_us, observe_us
+
+
+def main():
+    print(f"{'messages':>10} {'add (us)':>10} {'observe (us)':>14}")
+    for size in SIZES:
+        add_us, observe_us = bench(size)
+        print(f"{size:>10} {add_us:>10.1f} {observe_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
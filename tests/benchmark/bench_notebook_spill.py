@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the notebook kept in memory by ExecuteNbCode over a long session, with the outputs of the
+#           old cells spilled to disk against all of them kept, on cells printing a table and plotting a figure
+#           Usage: python -m tests.benchmark.bench_notebook_spill
+
+import base64
+import json
+import os
+import time
+
+from nbformat.v4 import new_code_cell, new_output
+
+from metagpt.actions.di.execute_nb_code import ExecuteNbCode
+
+N_CELLS = 500
+FIGURE = base64.b64encode(os.urandom(60_000)).decode()  # a 60 KB PNG
+TABLE = "\n".join(f"{i:>5} {i * 0.5:>10.2f} {'value':>10}" for i in range(200))
+
+
+def add_cell(executor: ExecuteNbCode, i: int):
+    cell = new_code_cell(source=f"df.describe()\nplt.plot(df['col_{i}'])\nplt.show()")
+    cell.outputs = [
+        new_output(output_type="stream", name="stdout", text=TABLE),
+        new_output(output_type="display_data", data={"image/png": FIGURE, "text/plain": "<Figure>"}),
+    ]
+    executor.nb.cells.append(cell)
+    executor.spill_outputs()
+
+
+def main():
+    for label, max_cells_in_memory in (("all kept", None), ("spilled", 20)):
+        executor = ExecuteNbCode(headless=True, max_cells_in_memory=max_cells_in_memory)
+        start = time.perf_counter()
+        for i in range(N_CELLS):
+            add_cell(executor, i)
+        elapsed = time.perf_counter() - start
+        size = len(json.dumps(executor.nb))
+        print(f"{label:>8}: {N_CELLS} cells, notebook of {size / 1e6:.1f} MB in memory, {elapsed:.2f} s")
+
+        start = time.perf_counter()
+        full_size = len(json.dumps(executor.full_notebook()))
+        print(f"{label:>8}: full notebook of {full_size / 1e6:.1f} MB loaded in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of generate_prompt_chunk, encoding the text once and cutting on the boundaries within the
+#           token budget, against the line by line packing it replaced, on multi-MB pages and a dump of the repository
+#           Usage: python -m tests.benchmark.bench_prompt_chunk
+
+import random
+import time
+
+from metagpt.const import METAGPT_ROOT
+from metagpt.utils.text import (
+    generate_prompt_chunk,
+    reduce_message_length,
+    split_paragraph,
+)
+from metagpt.utils.token_counter import TOKEN_COUNTER, TOKEN_MAX, count_output_tokens
+
+MODEL = "gpt-3.5-turbo-16k"
+TEMPLATE = "### Reference Information\n{}"
+SYSTEM = "You are an AI critical thinker research assistant."
+
+
+def legacy_generate_prompt_chunk(text: str, prompt_template: str, model_name: str, system_text: str, reserved: int = 0):
+    """The line by line packing replaced"""
+    paragraphs = text.splitlines(keepends=True)
+    TOKEN_COUNTER.count_texts(paragraphs, model_name)
+    current_token = 0
+    current_lines = []
+
+    reserved = reserved + count_output_tokens(prompt_template + system_text, model_name)
+    max_token = TOKEN_MAX.get(model_name, 2048) - reserved - 100
+
+    while paragraphs:
+        paragraph = paragraphs.pop(0)
+        token = count_output_tokens(paragraph, model_name)
+        if current_token + token <= max_token:
+            current_lines.append(paragraph)
+            current_token += token
+        elif token > max_token:
+            paragraphs = split_paragraph(paragraph) + paragraphs
+            continue
+        else:
+            yield prompt_template.format("".join(current_lines))
+            current_lines = [paragraph]
+            current_token = token
+
+    if current_lines:
+        yield prompt_template.format("".join(current_lines))
+
+
+def legacy_reduce_message_length(msgs, model_name: str, system_text: str, reserved: int = 0) -> str:
+    max_token = TOKEN_MAX.get(model_name, 2048) - count_output_tokens(system_text, model_name) - reserved
+    for msg in msgs:
+        if count_output_tokens(msg, model_name) < max_token or model_name not in TOKEN_MAX:
+            return msg
+    raise RuntimeError("fail to reduce message length")
+
+
+def make_page(size: int) -> str:
+    """Text of a scraped page: headings, paragraphs of sentences and a few huge lines, e.g., minified tables"""
+    rnd = random.Random(0)
+    words = "the of model agent research data web page token chunk summary query result 数据 模型".split()
+    parts, n = [], 0
+    while n < size:
+        if rnd.random() < 0.05:
+            part = f"## {' '.join(rnd.choices(words, k=4))}\n\n"
+        elif rnd.random() < 0.02:
+            part = " | ".join(rnd.choices(words, k=8000)) + "\n"
+        else:
+            part = " ".join(" ".join(rnd.choices(words, k=12)) + "." for _ in range(rnd.randint(1, 8))) + "\n\n"
+        parts.append(part)
+        n += len(part)
+    return "".join(parts)
+
+
+def make_repo_dump() -> str:
+    files = sorted((METAGPT_ROOT / "metagpt").rglob("*.py"))
+    return "".join(f"# file: {i.relative_to(METAGPT_ROOT)}\n{i.read_text(encoding='utf-8')}\n" for i in files)
+
+
+def bench_chunk(name: str, text: str):
+    for label, func in (("legacy", legacy_generate_prompt_chunk), ("single pass", generate_prompt_chunk)):
+        TOKEN_COUNTER.clear()
+        start = time.perf_counter()
+        chunks = list(func(text, TEMPLATE, MODEL, SYSTEM, 4096))
+        elapsed = time.perf_counter() - start
+        tokens = [count_output_tokens(i, MODEL) for i in chunks]
+        print(
+            f"{name} ({len(text) / 1e6:.1f} MB), {label:>11}: {elapsed:6.2f} s, {len(chunks)} chunks, "
+            f"{sum(tokens) / len(tokens):.0f} tokens on average, {max(tokens)} at most"
+        )
+
+    start = time.perf_counter()
+    first = next(generate_prompt_chunk(text, TEMPLATE, MODEL, SYSTEM, 4096))
+    print(f"{name}, first chunk yielded after {time.perf_counter() - start:.2f} s ({len(first)} chars)")
+
+
+def bench_reduce(text: str):
+    def msgs():
+        for n in range(40, 0, -1):
+            yield text[: n * 20000]
+
+    for label, func in (("legacy", legacy_reduce_message_length), ("bisect", reduce_message_length)):
+        TOKEN_COUNTER.clear()
+        start = time.perf_counter()
+        msg = func(msgs(), MODEL, SYSTEM, 4096)
+        print(f"reduce_message_length, {label:>6}: {time.perf_counter() - start:.3f} s, {len(msg)} chars kept")
+
+
+def main():
+    for size in (1_000_000, 4_000_000):
+        bench_chunk("page", make_page(size))
+    bench_chunk("repo dump", make_repo_dump())
+    bench_reduce(make_page(1_000_000))
+
+
+if __name__ == "__main__":
+    main()
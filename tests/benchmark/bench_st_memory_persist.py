@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the AgentMemory persistence with ada-002 sized embeddings, the compact layout
+#           (nodes.jsonl + memory-mapped embeddings.npy, saved incrementally) against the GA JSON layout
+#           Usage: python -m tests.benchmark.bench_st_memory_persist
+
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from metagpt.ext.stanford_town.memory.agent_memory import AgentMemory
+
+SIZE = 2_000
+NEW = 10
+DIM = 1536
+
+
+def add_memories(memory: AgentMemory, start: int, size: int):
+    rng = random.Random(start)
+    created = datetime(2023, 2, 13)
+    for i in range(start, start + size):
+        add = memory.add_event if i % 3 else memory.add_thought
+        embedding = [rng.random() - 0.5 for _ in range(DIM)]
+        add(
+            created + timedelta(minutes=i),
+            None,
+            "Isabella",
+            "is",
+            "cooking",
+            f"memory {i}",
+            {"cooking"},
+            5,
+            (f"memory {i}", embedding),
+            [],
+        )
+
+
+def timeit(func) -> float:
+    begin = time.perf_counter()
+    func()
+    return time.perf_counter() - begin
+
+
+def main():
+    memory = AgentMemory()
+    add_memories(memory, 0, SIZE)
+
+    with tempfile.TemporaryDirectory() as json_dir, tempfile.TemporaryDirectory() as compact_dir:
+        json_dir, compact_dir = Path(json_dir), Path(compact_dir)
+        json_save = timeit(lambda: memory.save_json(json_dir))
+        json_load = timeit(lambda: AgentMemory().load(json_dir))
+        compact_save = timeit(lambda: memory.save(compact_dir))
+        compact_load = timeit(lambda: AgentMemory().load(compact_dir))
+
+        add_memories(memory, SIZE, NEW)
+        json_resave = timeit(lambda: memory.save_json(json_dir))
+        compact_resave = timeit(lambda: memory.save(compact_dir))
+
+        json_size = sum(i.stat().st_size for i in json_dir.iterdir()) / 2**20
+        compact_size = sum(i.stat().st_size for i in compact_dir.iterdir()) / 2**20
+
+    print(f"{SIZE} memories of {DIM} dimensions, then {NEW} new ones")
+    print(
+        f"  GA JSON: save {json_save:7.3f}s, load {json_load:7.3f}s, re-save {json_resave:7.3f}s, {json_size:6.1f} MB"
+    )
+    print(
+        f"  compact: save {compact_save:7.3f}s, load {compact_load:7.3f}s, re-save {compact_resave:7.3f}s, "
+        f"{compact_size:6.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the Stanford Town pathfinder on the bundled `the_ville` maze, the A* over the collision
+#           mask of `Maze`, cold and cached, against the previous grid rescanning wavefront of `path_finder_v2`
+#           Usage: python -m tests.benchmark.bench_st_pathfinder
+
+import random
+import time
+
+from metagpt.environment.stanford_town.maze import Maze
+from metagpt.environment.stanford_town.stanford_town_ext_env import StanfordTownExtEnv
+from metagpt.ext.stanford_town.utils.const import MAZE_ASSET_PATH, collision_block_id
+
+QUERIES = 20
+
+
+def legacy_path_finder(a, start, end, collision_block_char) -> list:
+    """the previous `path_finder`, a wavefront rescanning the whole grid on each step, at most 150 steps"""
+
+    def make_step(m, k):
+        for i in range(len(m)):
+            for j in range(len(m[i])):
+                if m[i][j] == k:
+                    if i > 0 and m[i - 1][j] == 0 and a[i - 1][j] == 0:
+                        m[i - 1][j] = k + 1
+                    if j > 0 and m[i][j - 1] == 0 and a[i][j - 1] == 0:
+                        m[i][j - 1] = k + 1
+                    if i < len(m) - 1 and m[i + 1][j] == 0 and a[i + 1][j] == 0:
+                        m[i + 1][j] = k + 1
+                    if j < len(m[i]) - 1 and m[i][j + 1] == 0 and a[i][j + 1] == 0:
+                        m[i][j + 1] = k + 1
+
+    start, end = (start[1], start[0]), (end[1], end[0])
+    a = [[1 if j == collision_block_char else 0 for j in row] for row in a]
+    m = [[0] * len(row) for row in a]
+    m[start[0]][start[1]] = 1
+
+    k = 0
+    except_handle = 150
+    while m[end[0]][end[1]] == 0:
+        k += 1
+        make_step(m, k)
+        if except_handle == 0:
+            break
+        except_handle -= 1
+
+    i, j = end
+    k = m[i][j]
+    the_path = [(i, j)]
+    while k > 1:
+        if i > 0 and m[i - 1][j] == k - 1:
+            i, j = i - 1, j
+        elif j > 0 and m[i][j - 1] == k - 1:
+            i, j = i, j - 1
+        elif i < len(m) - 1 and m[i + 1][j] == k - 1:
+            i, j = i + 1, j
+        elif j < len(m[i]) - 1 and m[i][j + 1] == k - 1:
+            i, j = i, j + 1
+        the_path.append((i, j))
+        k -= 1
+    the_path.reverse()
+    return [(j, i) for i, j in the_path]
+
+
+def sample_queries(env: StanfordTownExtEnv) -> list[tuple]:
+    """pairs of connected tiles within 150 steps, the range of the legacy pathfinder"""
+    rng = random.Random(0)
+    free = [(x, y) for y in range(env.maze_height) for x in range(env.maze_width) if not env.maze.collision[y, x]]
+    queries = []
+    while len(queries) < QUERIES:
+        start, end = rng.sample(free, 2)
+        if 1 < len(env.find_path(start, end)) <= 150:
+            queries.append((start, end))
+    return queries
+
+
+def main():
+    env = StanfordTownExtEnv(maze_asset_path=MAZE_ASSET_PATH)
+    queries = sample_queries(env)
+    lengths = [len(env.find_path(start, end)) for start, end in queries]
+    print(f"the_ville {env.maze_width}x{env.maze_height}, {QUERIES} paths of {min(lengths)}-{max(lengths)} tiles")
+
+    begin = time.perf_counter()
+    legacy = [legacy_path_finder(env.collision_maze, start, end, collision_block_id) for start, end in queries]
+    legacy_cost = time.perf_counter() - begin
+    assert [len(i) for i in legacy] == lengths
+
+    maze = Maze(env.maze.collision_ids)  # without the paths cached by `sample_queries`
+    begin = time.perf_counter()
+    for start, end in queries:
+        maze.find_path(start, end)
+    cold_cost = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    for start, end in queries:
+        maze.find_path(start, end)
+    cached_cost = time.perf_counter() - begin
+
+    print(f"  path_finder_v2: {legacy_cost / QUERIES * 1000:9.3f} ms/path")
+    print(f"  A*            : {cold_cost / QUERIES * 1000:9.3f} ms/path, x{legacy_cost / cold_cost:.0f}")
+    print(f"  A* cached     : {cached_cost / QUERIES * 1000:9.3f} ms/path, x{legacy_cost / cached_cost:.0f}")
+
+
+if __name__ == "__main__":
+    main()
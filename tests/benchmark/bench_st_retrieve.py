@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : micro-benchmark of the Stanford Town memory retrieval on synthetic memories with ada-002 sized embeddings,
+#           against the previous per-node scoring loops, the focal points are embedded by the offline hash backend
+#           Usage: python -m tests.benchmark.bench_st_retrieve
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from numpy import dot
+from numpy.linalg import norm
+
+from metagpt.ext.stanford_town.memory.agent_memory import AgentMemory
+from metagpt.ext.stanford_town.memory.retrieve import new_agent_retrieve
+from metagpt.ext.stanford_town.utils.embedding import (
+    EmbeddingService,
+    HashEmbeddingBackend,
+    set_embedding_service,
+)
+
+SIZES = (1_000, 10_000)
+DIM = 1536
+FOCAL_POINTS = ["cooking", "the party", "Klaus"]
+
+
+class Role:
+    def __init__(self, memory: AgentMemory, curr_time: datetime):
+        self.memory = memory
+        self.scratch = type("Scratch", (), {"curr_time": curr_time, "recency_decay": 0.99})()
+
+
+def build_memory(size: int) -> AgentMemory:
+    rng = random.Random(0)
+    memory = AgentMemory()
+    start = datetime(2023, 2, 13)
+    for i in range(size):
+        add = memory.add_event if i % 3 else memory.add_thought
+        embedding = [rng.random() - 0.5 for _ in range(DIM)]
+        add(
+            start + timedelta(minutes=i),
+            None,
+            "s",
+            "p",
+            "o",
+            f"memory {i}",
+            {"kw"},
+            rng.randint(1, 9),
+            (str(i), embedding),
+            [],
+        )
+    return memory
+
+
+def loop_retrieve(role: Role, focal_pt: str, query_embedding: list[float], n_count: int = 30) -> list:
+    """The previous implementation: python loops over the nodes, then a scan of the storage per result"""
+    nodes = [i for i in role.memory.event_list + role.memory.thought_list if "idle" not in i.embedding_key]
+    scores = []
+    for node in nodes:
+        embedding = role.memory.embeddings[node.embedding_key]
+        scores.append(
+            [
+                node.poignancy,
+                role.scratch.recency_decay ** (role.scratch.curr_time - node.created).days,
+                dot(embedding, query_embedding) / (norm(embedding) * norm(query_embedding)),
+            ]
+        )
+    columns = []
+    for column in zip(*scores):
+        low, high = min(column), max(column)
+        columns.append([(v - low) / (high - low) if high > low else 0.5 for v in column])
+    totals = {node.memory_id: sum(v) for node, v in zip(nodes, zip(*columns))}
+    top = sorted(totals, key=totals.get, reverse=True)[:n_count]
+    return [i for n in top for i in role.memory.storage if i.memory_id == n]
+
+
+async def main():
+    service = EmbeddingService(backend=HashEmbeddingBackend(DIM))
+    set_embedding_service(service)
+    query_embeddings = await service.aget_embeddings(FOCAL_POINTS)
+    for size in SIZES:
+        role = Role(build_memory(size), datetime(2023, 3, 1))
+        start = time.perf_counter()
+        await new_agent_retrieve(role, FOCAL_POINTS)
+        vectorized_ms = (time.perf_counter() - start) / len(FOCAL_POINTS) * 1e3
+
+        start = time.perf_counter()
+        for focal_pt, query_embedding in zip(FOCAL_POINTS, query_embeddings):
+            loop_retrieve(role, focal_pt, query_embedding)
+        loop_ms = (time.perf_counter() - start) / len(FOCAL_POINTS) * 1e3
+        print(f"{size:>6} memories: vectorized {vectorized_ms:.2f} ms, loops {loop_ms:.2f} ms per focal point")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+from contextlib import aclosing
+
 import pytest
 
 from metagpt.actions.di.execute_nb_code import ExecuteNbCode
@@ -126,3 +128,48 @@ async def test_parse_outputs():
     assert "KeyError: 'DUMMPY_ID'" in output
     assert "columns num:2" in output
     await executor.terminate()
+
+
+@pytest.mark.asyncio
+async def test_headless_spill_outputs(tmp_path):
+    executor = ExecuteNbCode(headless=True, max_cells_in_memory=1, spill_dir=str(tmp_path))
+    executor.show_bytes_figure = None  # not decoded in headless mode
+    image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+    code = (
+        "import base64\nfrom IPython.display import Image, display\n"
+        f"display(Image(data=base64.b64decode('{image}')))\nprint('first ' * 100)"
+    )
+    output, is_success = await executor.run(code)
+    assert is_success and output.startswith("first")
+    await executor.run("print('second')")
+
+    first_cell, second_cell = executor.nb.cells
+    assert len(first_cell.outputs) == 1
+    assert first_cell.outputs[0]["text"].startswith("[2 outputs spilled to disk] first")
+    assert second_cell.outputs[0]["text"] == "second\n"
+
+    nb = executor.full_notebook()
+    assert "image/png" in nb.cells[0].outputs[0]["data"]
+    assert "spilled_outputs" not in nb.cells[0].metadata
+    assert "spilled_outputs" in executor.nb.cells[0].metadata
+    await executor.terminate()
+
+
+@pytest.mark.asyncio
+async def test_run_stream():
+    executor = ExecuteNbCode()
+    chunks = [i async for i in executor.run_stream("import time\nfor i in range(3):\n    print(i, flush=True)")]
+    assert "".join(chunks) == "0\n1\n2\n"
+    output, is_success = executor.last_result
+    assert is_success and "2" in output
+
+    # closing the stream early interrupts a runaway output
+    code = "import time\nwhile True:\n    print('spam', flush=True)\n    time.sleep(0.01)"
+    async with aclosing(executor.run_stream(code)) as stream:
+        async for chunk in stream:
+            assert "spam" in chunk
+            break
+    output, is_success = executor.last_result
+    assert not is_success
+    assert "KeyboardInterrupt" in output
+    await executor.terminate()
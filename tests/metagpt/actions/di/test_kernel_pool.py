@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the kernel pool of ExecuteNbCode
+
+import pytest
+
+from metagpt.actions.di.execute_nb_code import ExecuteNbCode
+from metagpt.actions.di.kernel_pool import KernelPool, set_kernel_pool
+
+
+@pytest.fixture
+def pool():
+    pool = KernelPool(min_idle=1, preload_imports=("json",), memory_limit=512, time_limit=2)
+    set_kernel_pool(pool)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_kernel_pool_lease_and_reset(pool):
+    kernel = await pool.acquire()
+    assert await kernel.execute("x = 1", timeout=10)
+    assert await kernel.execute("import sys; assert 'json' in sys.modules", timeout=10)
+    await pool.release(kernel)
+
+    # the same warm kernel, with its namespace reset instead of a restart
+    assert await pool.acquire() is kernel
+    assert not await kernel.execute("x", timeout=10)
+    await pool.release(kernel)
+
+    stats = pool.stats()
+    assert stats["leases"] == 2 and stats["resets"] == 2
+    assert stats["idle"] + stats["warming"] == 2
+    assert stats["utilization"] == 0
+    assert stats["start_latency_max"] > 0
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_kernel_pool_replaces_dead_kernel(pool):
+    kernel = await pool.acquire()
+    assert pool.stats()["utilization"] > 0
+    kernel.kill()
+    await pool.release(kernel)
+    assert pool.stats()["replacements"] == 1
+    assert await pool.acquire() is not kernel
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_execute_nb_code_lease_limits(pool):
+    executor = ExecuteNbCode(timeout=30)
+    output, is_success = await executor.run("x = bytearray(2 * 1024**3)")
+    assert not is_success
+    assert "MemoryError" in output
+
+    # the kernel killed for exceeding the CPU time limit of the lease is replaced
+    dead_kernel = executor.kernel
+    output, is_success = await executor.run("while True:\n    pass")
+    assert not is_success
+    assert output == "DeadKernelError"
+    output, is_success = await executor.run("print('alive')")
+    assert is_success and "alive" in output
+    assert executor.kernel is not dead_kernel
+    assert pool.stats()["replacements"] >= 1
+
+    await executor.terminate()
+    assert executor.nb_client.km is None
+    await pool.aclose()
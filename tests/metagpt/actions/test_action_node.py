@@ -5,6 +5,7 @@
 @Author  : alexanderwu
 @File    : test_action_node.py
 """
+import asyncio
 from pathlib import Path
 from typing import List, Optional, Tuple
 
@@ -12,6 +13,7 @@ import pytest
 from pydantic import BaseModel, Field, ValidationError
 
 from metagpt.actions import Action
+from metagpt.actions.action_graph import ActionGraph
 from metagpt.actions.action_node import ActionNode, ReviewMode, ReviseMode
 from metagpt.environment import Environment
 from metagpt.llm import LLM
@@ -19,6 +21,7 @@ from metagpt.roles import Role
 from metagpt.schema import Message
 from metagpt.team import Team
 from metagpt.utils.common import encode_image
+from metagpt.utils.serialize import get_model_json_schema
 
 
 @pytest.mark.asyncio
@@ -98,6 +101,95 @@ async def test_action_node_two_layer():
     assert "579" in answer2.content
 
 
+class ConcurrentFillLLM:
+    """Answer the prompt of each child node after `delay` seconds, recording the calls"""
+
+    def __init__(self, keys: list[str], delay: float = 0.05, hang_once: str = ""):
+        self.keys = keys
+        self.delay = delay
+        self.hang_once = hang_once
+        self.running = 0
+        self.max_running = 0
+        self.prompts = {}
+
+    async def aask(self, prompt, system_msgs=None, images=None, timeout=None):
+        key = next(k for k in self.keys if f"fill {k}" in prompt)
+        self.prompts[key] = prompt
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if key == self.hang_once:
+                self.hang_once = ""
+                await asyncio.sleep(10)
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return f'[CONTENT]{{"{key}": "{key} value"}}[/CONTENT]'
+
+
+def _concurrent_fill_node(keys: list[str]) -> ActionNode:
+    children = [ActionNode(key=k, expected_type=str, instruction=f"fill {k}", example="") for k in keys]
+    return ActionNode.from_children("concurrent", children)
+
+
+@pytest.mark.asyncio
+async def test_action_node_complex_fill_concurrently():
+    keys = ["alpha", "beta", "gamma", "delta"]
+    node = _concurrent_fill_node(keys)
+    llm = ConcurrentFillLLM(keys)
+
+    await node.fill(context="ctx", llm=llm, strgy="complex", max_concurrency=2)
+    assert llm.max_running == 2
+    assert list(node.instruct_content.model_dump().items()) == [(k, f"{k} value") for k in keys]
+
+    await node.fill(context="ctx", llm=llm, strgy="complex", exclude=["beta"])
+    assert list(node.instruct_content.model_dump()) == ["alpha", "gamma", "delta"]
+
+
+@pytest.mark.asyncio
+async def test_action_node_complex_fill_with_graph():
+    keys = ["alpha", "beta", "gamma"]
+    node = _concurrent_fill_node(keys)
+    graph = ActionGraph()
+    graph.add_edge(node.get_child("alpha"), node.get_child("gamma"))
+    llm = ConcurrentFillLLM(keys)
+
+    await node.fill(context="ctx", llm=llm, strgy="complex", graph=graph)
+    assert '{"alpha":"alpha value"}' in llm.prompts["gamma"]
+    assert "alpha value" not in llm.prompts["beta"]
+    assert list(node.instruct_content.model_dump()) == keys
+
+    graph.add_edge(node.get_child("gamma"), node.get_child("alpha"))
+    with pytest.raises(ValueError):
+        await node.fill(context="ctx", llm=llm, strgy="complex", graph=graph)
+
+
+@pytest.mark.asyncio
+async def test_action_node_complex_fill_stream_children(mocker):
+    keys = ["alpha", "beta"]
+    node = _concurrent_fill_node(keys)
+    spy = mocker.spy(node, "create_class")
+
+    await node.fill(context="ctx", llm=ConcurrentFillLLM(keys), strgy="complex", stream_children=True)
+    partial_fields = [list(i.model_fields) for i in spy.spy_return_list]
+    assert len(partial_fields) == 2 and len(partial_fields[0]) == 1
+    assert partial_fields[1] == keys
+
+
+@pytest.mark.asyncio
+async def test_action_node_complex_fill_timeout_retry():
+    keys = ["alpha", "beta"]
+    node = _concurrent_fill_node(keys)
+
+    llm = ConcurrentFillLLM(keys, hang_once="beta")
+    await node.fill(context="ctx", llm=llm, strgy="complex", child_timeout=1, child_retries=1)
+    assert node.instruct_content.model_dump() == {"alpha": "alpha value", "beta": "beta value"}
+
+    llm = ConcurrentFillLLM(keys, hang_once="beta")
+    with pytest.raises(asyncio.TimeoutError):
+        await node.fill(context="ctx", llm=llm, strgy="complex", child_timeout=1)
+
+
 @pytest.mark.asyncio
 async def test_action_node_review():
     key = "Project Name"
@@ -243,6 +335,33 @@ def test_create_model_class_with_mapping():
     assert value == ["game.py", "app.py", "static/css/styles.css", "static/js/script.js", "templates/index.html"]
 
 
+def test_create_class_cached():
+    node = ActionNode.from_children(
+        "cached",
+        [
+            ActionNode(key="a", expected_type=str, instruction="a", example="x"),
+            ActionNode(key="b", expected_type=List[str], instruction="b", example=["y"]),
+        ],
+    )
+    same_node = ActionNode.from_children(
+        "cached",
+        [
+            ActionNode(key="a", expected_type=str, instruction="a", example="x"),
+            ActionNode(key="b", expected_type=List[str], instruction="b", example=["y"]),
+        ],
+    )
+    model_class = node.create_class()
+    assert node.create_class() is model_class
+    assert same_node.create_class() is model_class
+    assert get_model_json_schema(model_class) is get_model_json_schema(model_class)
+    assert get_model_json_schema(model_class) == model_class.model_json_schema()
+
+    assert list(node.create_class(exclude=["b"]).model_fields) == ["a"]
+    node.get_child("b").example = ["z"]
+    assert node.create_class() is not model_class
+    assert node.create_class().model_fields["b"].default == ["z"]
+
+
 @pytest.mark.asyncio
 async def test_action_node_with_image(mocker):
     # add a mock to update model in unittest, due to the gloabl MockLLM
@@ -6,11 +6,15 @@
 @File    : test_research.py
 """
 
+import asyncio
+
 import pytest
 
 from metagpt.actions import research
-from metagpt.tools import SearchEngineType
+from metagpt.tools import SearchEngineType, WebBrowserEngineType
 from metagpt.tools.search_engine import SearchEngine
+from metagpt.tools.web_browser_engine import WebBrowserEngine
+from metagpt.utils.parse_html import WebPage
 
 
 @pytest.mark.asyncio
@@ -88,6 +92,53 @@ async def test_web_browse_and_summarize(mocker, context):
     assert resp[url] is None
 
 
+@pytest.mark.asyncio
+async def test_web_browse_and_summarize_map_reduce(mocker, context):
+    pages = {
+        "https://slow.example": "slow page\n" * 5,
+        "https://fast.example": "fast page\n" * 5,
+        "https://long.example": ("long page " * 200 + "\n") * 60,
+        "https://junk.example": ("junk page " * 200 + "\n") * 60,
+    }
+    fast_summarized = asyncio.Event()
+    running = max_running = n_junk = 0
+
+    async def browse(url):
+        if url == "https://slow.example":
+            # loads only once the fast page is summarized, the pages are summarized while the others are loading
+            await asyncio.wait_for(fast_summarized.wait(), timeout=10)
+        return WebPage(inner_text=pages[url], html="", url=url)
+
+    async def mock_llm_ask(self, prompt, system_msgs):
+        nonlocal running, max_running, n_junk
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if "junk page" in prompt:
+            n_junk += 1
+            return "Not relevant."
+        if "fast page" in prompt:
+            fast_summarized.set()
+        return "summary " * 5
+
+    mocker.patch("metagpt.provider.base_llm.BaseLLM.aask", mock_llm_ask)
+    action = research.WebBrowseAndSummarize(
+        context=context,
+        web_browser_engine=WebBrowserEngine(engine=WebBrowserEngineType.CUSTOM, run_func=browse),
+        max_concurrency=2,
+        prune_after=2,
+    )
+    resp = await action.run(*pages, query="What's new")
+
+    assert list(resp) == list(pages)
+    assert resp["https://fast.example"] == resp["https://long.example"] == "summary " * 5
+    assert resp["https://slow.example"] == "summary " * 5
+    assert resp["https://junk.example"] is None
+    assert 2 <= n_junk <= 3  # pruned after 2, the chunk started before the second one was answered included
+    assert max_running == 2
+
+
 @pytest.mark.asyncio
 async def test_conduct_research(mocker, context):
     data = None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the StanfordTown maze
+
+import random
+from collections import deque
+
+import numpy as np
+
+from metagpt.environment.stanford_town.maze import Maze
+from metagpt.ext.stanford_town.utils.utils import path_finder
+
+
+def bfs_length(collision: np.ndarray, start: tuple, end: tuple) -> int:
+    height, width = collision.shape
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == end:
+            return dist[end]
+        for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+            if 0 <= nx < width and 0 <= ny < height and not collision[ny, nx] and (nx, ny) not in dist:
+                dist[(nx, ny)] = dist[(x, y)] + 1
+                queue.append((nx, ny))
+    return -1
+
+
+def assert_valid_path(collision: np.ndarray, path: list, start: tuple, end: tuple):
+    assert path[0] == start and path[-1] == end
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert abs(x1 - x0) + abs(y1 - y0) == 1
+        assert not collision[y1, x1]
+
+
+def test_find_path():
+    collision = np.array(
+        [
+            [0, 0, 0, 0],
+            [1, 1, 1, 0],
+            [0, 0, 0, 0],
+            [0, 1, 1, 1],
+        ]
+    )
+    maze = Maze(collision)
+
+    path = maze.find_path((0, 0), (0, 2))
+    assert path == [(0, 0), (1, 0), (2, 0), (3, 0), (3, 1), (3, 2), (2, 2), (1, 2), (0, 2)]
+    assert maze.find_path((1, 2), (1, 2)) == [(1, 2)]
+    assert maze.find_path((0, 0), (1, 1)) == []  # blocked
+    assert maze.find_path((0, 0), (3, 3)) == []
+
+    # the cached path is a copy, and dropped when the collision changes
+    path.clear()
+    assert len(maze.find_path((0, 0), (0, 2))) == 9
+    maze.set_collision((0, 1), 0)
+    assert maze.find_path((0, 0), (0, 2)) == [(0, 0), (0, 1), (0, 2)]
+    assert not maze.collision[1, 0]
+
+
+def test_find_path_shortest_on_random_grids():
+    rng = random.Random(0)
+    for _ in range(20):
+        collision = np.array([[int(rng.random() < 0.3) for _ in range(15)] for _ in range(10)])
+        maze = Maze(collision)
+        free = [(x, y) for y in range(10) for x in range(15) if not collision[y, x]]
+        for _ in range(10):
+            start, end = rng.sample(free, 2)
+            path = maze.find_path(start, end)
+            length = bfs_length(collision, start, end)
+            if length < 0:
+                assert path == []
+            else:
+                assert len(path) == length + 1
+                assert_valid_path(collision, path, start, end)
+
+
+def test_path_finder():
+    collision_maze = [["0", "0", "0"], ["32125", "32125", "0"], ["0", "0", "0"]]
+    path = path_finder(collision_maze, [0, 0], [0, 2], "32125")
+    assert path == [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2)]
+
+
+def test_nearby_slices():
+    maze = Maze(np.zeros((100, 140)))
+    assert maze.nearby_slices((58, 9), 5) == (slice(4, 15), slice(53, 64))
+    assert maze.nearby_slices((1, 98), 5) == (slice(93, 99), slice(0, 7))
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # @Desc   : the unittest of StanfordTownExtEnv
 
+import math
 from pathlib import Path
 
 from metagpt.environment.stanford_town.env_space import (
@@ -31,6 +32,9 @@ def test_stanford_town_ext_env():
     assert ext_env.access_tile(tile=tile)["world"] == "the Ville"
     assert ext_env.get_tile_path(tile=tile, level="world") == "the Ville"
     assert len(ext_env.get_nearby_tiles(tile=tile, vision_r=5)) == 121
+    rows, cols = ext_env.get_nearby_slices(tile=tile, vision_r=5)
+    assert ext_env.maze.collision[rows, cols].size == 121
+    assert ext_env.maze.collision.shape == (100, 140)
 
     event = ("double studio:double studio:bedroom 2:bed", None, None, None)
     ext_env.add_event_from_tile(event, tile)
@@ -62,3 +66,73 @@ def test_stanford_town_ext_env_observe_step():
     event = ("double studio:double studio:bedroom 2:bed", None, None, None)
     obs, _, _, _, _ = ext_env.step(action=EnvAction(action_type=EnvActionType.ADD_TILE_EVENT, coord=tile, event=event))
     assert len(ext_env.tiles[tile[1]][tile[0]]["events"]) == 1
+
+
+def test_stanford_town_ext_env_find_path():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)
+
+    start, end = (58, 9), (85, 12)
+    path = ext_env.observe(obs_params=EnvObsParams(obs_type=EnvObsType.SHORTEST_PATH, coord=start, target_coord=end))
+    assert path[0] == start and path[-1] == end
+    assert all(not ext_env.access_tile(tile=i)["collision"] for i in path[1:])
+
+    # block the path, the cached one is dropped
+    middle = path[len(path) // 2]
+    ext_env.set_tile_collision(middle, "32125")
+    assert ext_env.access_tile(tile=middle)["collision"]
+    assert middle not in ext_env.find_path(start, end)
+
+    ext_env.set_tile_collision(middle, "0")
+    assert len(ext_env.find_path(start, end)) == len(path)
+
+
+def test_stanford_town_ext_env_perceive():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)
+    tile, vision_r = (72, 14), 8
+    arena = ext_env.get_tile_path(tile=tile, level="arena")
+    for i, nbr in enumerate(ext_env.get_nearby_tiles(tile=tile, vision_r=vision_r)):
+        if i % 7 == 0:
+            ext_env.add_event_from_tile((f"role {i % 3}", "is", "walking", "walking"), nbr)
+
+    # the events of the same arena within the radius, with the distance of their closest tile
+    expected = {}
+    for nbr in ext_env.get_nearby_tiles(tile=tile, vision_r=vision_r):
+        if ext_env.get_tile_path(tile=nbr, level="arena") == arena:
+            for event in ext_env.access_tile(tile=nbr)["events"]:
+                expected[event] = min(expected.get(event, 1e9), math.dist(nbr, tile))
+
+    perception = ext_env.observe(
+        obs_params=EnvObsParams(obs_type=EnvObsType.PERCEIVE, coord=tile, vision_radius=vision_r, att_bandwidth=1000)
+    )
+    assert set(perception["events"]) == set(expected)
+    dists = [expected[i] for i in perception["events"]]
+    assert dists == sorted(dists)
+    assert ext_env.perceive(tile=tile, vision_r=vision_r, att_bandwidth=2)["events"] == perception["events"][:2]
+
+    addresses = {
+        ext_env.get_tile_path(tile=nbr, level="object")
+        for nbr in ext_env.get_nearby_tiles(tile=tile, vision_r=vision_r)
+    }
+    assert {
+        ":".join([i["world"], i["sector"], i["arena"], i["game_object"]]) for i in perception["spaces"]
+    } == addresses
+
+
+def test_stanford_town_ext_env_event_index():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)
+    tile, subject = (72, 14), "Isabella Rodriguez"
+    event = (subject, "is", "cooking", "cooking")
+
+    ext_env.step(EnvAction(action_type=EnvActionType.ADD_TILE_EVENT, coord=tile, event=event))
+    assert ext_env.get_subject_tiles(subject) == {tile}
+    assert event in ext_env.perceive(tile=tile, vision_r=4, att_bandwidth=100)["events"]
+
+    ext_env.turn_event_from_tile_idle(event, tile)
+    assert event not in ext_env.access_tile(tile=tile)["events"]
+    assert (subject, None, None, None) in ext_env.access_tile(tile=tile)["events"]
+    assert ext_env.get_subject_tiles(subject) == {tile}
+
+    ext_env.step(EnvAction(action_type=EnvActionType.RM_TITLE_SUB_EVENT, coord=tile, subject=subject))
+    assert all(i[0] != subject for i in ext_env.access_tile(tile=tile)["events"])
+    assert not ext_env.get_subject_tiles(subject)
+    assert all(i[0] != subject for i in ext_env.perceive(tile=tile, vision_r=4, att_bandwidth=100)["events"])
@@ -15,6 +15,8 @@ from metagpt.environment.base_env import (
     mark_as_writeable,
 )
 from metagpt.environment.base_env_space import BaseEnvAction, BaseEnvObsParams
+from metagpt.roles.role import Role
+from metagpt.schema import Message
 
 
 class ForTestEnv(Environment):
@@ -69,3 +71,31 @@ async def test_ext_env():
 
     assert await env.read_from_api("read_api_no_param") == 15
     assert await env.read_from_api(EnvAPIAbstract(api_name="read_api", kwargs={"a": 5, "b": 5})) == 10
+
+
+def test_env_publish_message_routing(tmp_path):
+    history_file = tmp_path / "history.log"
+    env = Environment(history_size=2, history_file=history_file)
+    alice = Role(name="Alice", profile="product manager")
+    bob = Role(name="Bob", profile="engineer")
+    env.add_roles([alice, bob])
+
+    env.publish_message(Message(content="to all"))
+    assert alice.rc.msg_buffer.pop_all()[0].content == "to all"
+    assert bob.rc.msg_buffer.pop_all()[0].content == "to all"
+
+    env.publish_message(Message(content="to bob", send_to="Bob"))
+    assert alice.rc.msg_buffer.empty()
+    assert bob.rc.msg_buffer.pop_all()[0].content == "to bob"
+
+    bob.set_addresses({"reviewer"})
+    env.publish_message(Message(content="to bob again", send_to="Bob"))
+    env.publish_message(Message(content="to reviewer", send_to="reviewer"))
+    assert bob.rc.msg_buffer.pop_all()[0].content == "to reviewer"
+
+    assert env.history == "\nuser: to bob again\nuser: to reviewer"
+    assert len(history_file.read_text().splitlines()) == 4
+
+    env = Environment(history_size=0)
+    env.publish_message(Message(content="to all"))
+    assert env.history == ""
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the result cache of the aflow benchmarks
+
+import json
+from typing import Any, Callable, List, Tuple
+
+import pytest
+
+from metagpt.ext.aflow.benchmark.benchmark import BaseBenchmark
+from metagpt.ext.aflow.benchmark.result_cache import (
+    ResultCache,
+    get_problem_id,
+    get_workflow_hash,
+)
+from metagpt.ext.aflow.scripts.optimizer_utils.data_utils import DataUtils
+
+
+class EchoBenchmark(BaseBenchmark):
+    async def evaluate_problem(self, problem: dict, graph: Callable) -> Tuple[Any, ...]:
+        try:
+            prediction = await graph(problem["question"])
+        except Exception as e:
+            self.report_error(e)
+            return problem["question"], str(e), problem["answer"], 0.0, 0.0
+        score, _ = self.calculate_score(problem["answer"], prediction)
+        if score == 0:
+            self.log_mismatch(problem["question"], problem["answer"], prediction, prediction)
+        return problem["question"], prediction, problem["answer"], score, 0.0
+
+    def calculate_score(self, expected_output: Any, prediction: Any) -> Tuple[float, Any]:
+        return float(expected_output == prediction), prediction
+
+    def get_result_columns(self) -> List[str]:
+        return ["question", "prediction", "expected_output", "score", "cost"]
+
+
+class CountingGraph:
+    def __init__(self, failures: int = 0):
+        self.calls = []
+        self.failures = failures
+
+    async def __call__(self, question: str) -> str:
+        self.calls.append(question)
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError("rate limited")
+        return question.upper()
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    problems = [{"question": "a", "answer": "A"}, {"question": "b", "answer": "b"}]
+    file_path = tmp_path / "data.jsonl"
+    file_path.write_text("".join(json.dumps(i) + "\n" for i in problems))
+    return file_path
+
+
+def read_log(path) -> list:
+    return [json.loads(i) for i in (path / "log.jsonl").read_text().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_result_cache_skips_scored_problems(tmp_path, dataset):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+    round_1, round_2 = tmp_path / "round_1", tmp_path / "round_2"
+    round_1.mkdir()
+    round_2.mkdir()
+
+    graph = CountingGraph()
+    benchmark = EchoBenchmark("Echo", str(dataset), str(round_1))
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert score == 0.5
+    assert sorted(graph.calls) == ["a", "b"]
+    assert [i["question"] for i in read_log(round_1)] == ["b"]
+
+    # scored already, the mismatch is not logged twice in the same round
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert score == 0.5
+    assert len(graph.calls) == 2
+    assert len(read_log(round_1)) == 1
+
+    # the same workflow in another round logs the cached mismatches there
+    benchmark = EchoBenchmark("Echo", str(dataset), str(round_2))
+    await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert len(graph.calls) == 2
+    assert [i["question"] for i in read_log(round_2)] == ["b"]
+
+    # another run of the workflow, or an edited problem, is scored again
+    await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w", run_index=1)
+    assert len(graph.calls) == 4
+    with dataset.open("a") as f:
+        f.write(json.dumps({"question": "c", "answer": "C"}) + "\n")
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert graph.calls[4:] == ["c"]
+    assert score == pytest.approx(2 / 3)
+
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_result_cache_skips_errors(tmp_path, dataset):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+    benchmark = EchoBenchmark("Echo", str(dataset), str(tmp_path))
+
+    # the problems failed with an error, e.g., during an LLM outage, are not cached as scored 0
+    graph = CountingGraph(failures=2)
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert score == 0
+    assert cache.get_many("w", 0, [get_problem_id(i) for i in await benchmark.load_data()]) == {}
+
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert score == 0.5
+    assert len(graph.calls) == 4
+
+    score, _, _ = await benchmark.run_evaluation(graph, None, result_cache=cache, workflow_hash="w")
+    assert score == 0.5
+    assert len(graph.calls) == 4
+
+    cache.close()
+
+
+def test_workflow_hash(tmp_path):
+    round_1, round_2 = tmp_path / "round_1", tmp_path / "round_2"
+    for directory, round_number in ((round_1, 1), (round_2, 2)):
+        directory.mkdir()
+        (directory / "graph.py").write_text(f"import workflows.round_{round_number}.prompt as prompt_custom\n")
+        (directory / "prompt.py").write_text("PROMPT = 'solve it'\n")
+    assert get_workflow_hash(str(round_1)) == get_workflow_hash(str(round_2))
+
+    (round_2 / "prompt.py").write_text("PROMPT = 'solve it step by step'\n")
+    assert get_workflow_hash(str(round_1)) != get_workflow_hash(str(round_2))
+    assert get_workflow_hash(str(tmp_path)) is None
+
+
+def test_load_log_skips_truncated_line(tmp_path):
+    round_dir = tmp_path / "workflows" / "round_1"
+    round_dir.mkdir(parents=True)
+    (round_dir / "log.jsonl").write_text(json.dumps({"question": "a"}) + '\n{"question": ')
+    log = DataUtils(str(tmp_path)).load_log(1)
+    assert json.loads(log) == {"question": "a"}
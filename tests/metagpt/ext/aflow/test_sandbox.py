@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the sandbox pool of aflow
+
+import asyncio
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from metagpt.ext.aflow.benchmark.humaneval import HumanEvalBenchmark
+from metagpt.ext.aflow.benchmark.sandbox import (
+    SandboxCrashError,
+    SandboxError,
+    SandboxPool,
+    SandboxTimeoutError,
+    check_program,
+    record_job_times,
+    run_code,
+    run_test_codes,
+    set_sandbox_pool,
+)
+
+SOLUTION = "def add(a, b):\n    return a + b\n"
+TEST = "def check(candidate):\n    assert candidate(1, 2) == 3\n"
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=2, timeout=5, memory_limit=512)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_check_program(pool):
+    assert await pool.run(check_program, SOLUTION, TEST, "add", True) is None
+
+    with pytest.raises(SandboxError) as exc_info:
+        await pool.run(check_program, SOLUTION.replace("+", "-"), TEST, "add", True)
+    assert exc_info.value.error_type == "AssertionError"
+
+    with pytest.raises(SandboxError, match="Function sub is not defined"):
+        await pool.run(check_program, SOLUTION, TEST, "sub", True)
+
+    status, output = await pool.run(run_code, "def solve():\n    return 6 * 7\n")
+    assert (status, output) == ("Success", "42")
+
+
+@pytest.mark.asyncio
+async def test_sandbox_pool_timeout_and_crash(pool):
+    await pool.run(run_code, "def solve():\n    return 1\n")
+    pids = {i.process.pid for i in pool._workers}
+
+    with pytest.raises(SandboxTimeoutError):
+        await pool.run(
+            check_program,
+            "def f():\n    while True:\n        pass\n",
+            "def check():\n    f()\n",
+            "f",
+            False,
+            timeout=0.5,
+        )
+    with pytest.raises(SandboxCrashError):
+        await pool.run(check_program, "import os\nos._exit(1)\n", TEST, "add", True)
+    with pytest.raises(SandboxError) as exc_info:  # over the memory limit
+        await pool.run(check_program, "x = bytearray(1024 ** 3)\n", TEST, "add", True)
+    assert exc_info.value.error_type == "MemoryError"
+
+    # the killed workers are replaced, and the pool keeps serving the concurrent jobs
+    assert len(pool._workers) == 2
+    assert {i.process.pid for i in pool._workers} != pids
+    results = await asyncio.gather(*[pool.run(check_program, SOLUTION, TEST, "add", True) for _ in range(8)])
+    assert results == [None] * 8
+    assert pool.stats.n_timeouts == 1 and pool.stats.n_crashes == 1
+
+
+def test_sandbox_pool_across_event_loops(pool):
+    for _ in range(2):  # e.g., one event loop per optimization round
+        assert asyncio.run(pool.run(run_code, "def solve():\n    return 'ok'\n")) == ("Success", "ok")
+    assert len(pool._workers) == 2
+
+
+def test_run_test_codes():
+    passed = "assert 1 + 1 == 2"
+    failed = "assert 1 + 1 == 3, 'wrong sum'"
+    raised = "raise ValueError('bad input')"
+    results = run_test_codes([passed, failed, raised, passed])
+    assert results[0] is None
+    assert results[1][:2] == ("AssertionError", "wrong sum")
+    assert results[2] == ("Exception", "bad input")
+    assert len(results) == 3
+
+
+@pytest.mark.asyncio
+async def test_record_job_times_without_wait(pool):
+    async def job():
+        with record_job_times() as job_times:
+            await pool.run(time.sleep, 0.5)
+        return job_times
+
+    # 4 jobs on 2 workers, the last ones wait for a free worker
+    results = await asyncio.gather(*[job() for _ in range(4)])
+    assert all(len(i) == 1 and 0.5 <= i[0] < 0.9 for i in results)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_csv_sandbox_throughput(tmp_path, pool):
+    set_sandbox_pool(pool)
+    problems = [
+        {"task_id": str(i), "prompt": "def add(a, b):\n", "entry_point": "add", "canonical_solution": "", "test": TEST}
+        for i in range(4)
+    ]
+    dataset = tmp_path / "humaneval.jsonl"
+    dataset.write_text("".join(json.dumps(i) + "\n" for i in problems))
+
+    async def graph(prompt: str, entry_point: str):
+        return SOLUTION, 0.0
+
+    benchmark = HumanEvalBenchmark("HumanEval", str(dataset), str(tmp_path))
+    score, _, _ = await benchmark.run_evaluation(graph, None)
+    assert score == 1
+
+    df = pd.read_csv(next(tmp_path.glob("*.csv")))
+    assert (df["sandbox_jobs"] == 4).all()
+    assert (df["sandbox_throughput"] > 0).all()
+    assert (df["check_time"] < df["sandbox_busy_time"]).all()
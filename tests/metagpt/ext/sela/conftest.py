@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the fixtures of the SELA unittests
+
+import importlib
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import metagpt
+
+SELA_DIR = Path(metagpt.__file__).parent / "ext" / "sela"
+
+
+@pytest.fixture
+def tree_search(monkeypatch):
+    """The tree search module of SELA, importing it loads the configs of SELA from the working dir"""
+    monkeypatch.chdir(SELA_DIR)
+    return importlib.import_module("metagpt.ext.sela.search.tree_search")
+
+
+@pytest.fixture
+def mock_roles(tree_search, monkeypatch):
+    """The nodes loading mocked roles instead of their checkpoints"""
+    monkeypatch.setattr(tree_search.Node, "load_role", lambda self: MagicMock())
+
+
+@pytest.fixture
+def state(tmp_path) -> dict:
+    return {
+        "task": "titanic",
+        "work_dir": str(tmp_path / "work"),
+        "node_dir": str(tmp_path / "nodes"),
+        "dataset_config": None,
+        "datasets_dir": None,
+        "exp_pool_path": None,
+        "requirement": "predict the survival",
+        "has_run": False,
+        "start_task_id": 1,
+        "low_is_better": False,
+        "role_timeout": 60,
+        "external_eval": False,
+        "custom_dataset_dir": None,
+    }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the parallel rollouts of the SELA tree search
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from metagpt.schema import Task
+
+
+class InstructionGeneratorStub:
+    async def generate_new_instructions(self, task_id: int, original_instruction: str, max_num: int):
+        return [f"insight {task_id}-{i}" for i in range(2)]
+
+
+@pytest.mark.asyncio
+async def test_parallel_rollouts_simulate_each_node_once_at_a_time(tree_search, mock_roles, state, monkeypatch):
+    from metagpt.ext.sela.search.search_algorithm import MCTS
+
+    running, overlaps = set(), []
+
+    async def run_node(self, role=None):
+        if self.id in running:
+            overlaps.append(self.id)
+        running.add(self.id)
+        await asyncio.sleep(0.05)
+        running.discard(self.id)
+        self.raw_reward = {"dev_score": 0.5, "test_score": 0.5, "score": 0.5}
+        self.normalized_reward = dict(self.raw_reward)
+        return self.normalized_reward, {}
+
+    monkeypatch.setattr(tree_search.Node, "run_node", run_node)
+    root = tree_search.Node(parent=None, state=state, action=None, value=0)
+    mcts = MCTS(root_node=root, max_depth=4, use_fixed_insights=False)
+    mcts.children = {root: []}
+    mcts.node_order = []
+    mcts.instruction_generator = InstructionGeneratorStub()
+    mcts.backpropagate(root, await mcts.simulate(root))
+    await mcts.expand_and_simulate(root)
+
+    # 2 children per node for 4 workers, the workers selecting the same node can not all simulate it
+    await mcts.parallel_rollouts(root, rollouts=12, n_workers=4)
+
+    assert not overlaps
+    assert root.visited == 14
+    assert not mcts._simulating
+    assert all(node.virtual_loss == 0 for node in mcts.children)
+
+
+@pytest.mark.asyncio
+async def test_redirected_output_dir_not_saved(tree_search, state):
+    from metagpt.ext.sela.experimenter import Experimenter
+
+    shared_dir = os.path.join(state["work_dir"], state["task"])
+    role = Experimenter(node_id="0", start_task_id=1, role_dir=state["node_dir"])
+    role.planner.plan.goal = f"Predict the survival, save the predictions to {shared_dir}/dev_predictions.csv."
+    role.planner.plan.add_tasks(
+        [
+            Task(
+                task_id=str(i),
+                instruction=f"Step {i} on {shared_dir}",
+                dependent_task_ids=[str(i - 1)] if i > 1 else [],
+            )
+            for i in range(1, 5)
+        ]
+    )
+    role.save_state(static_save=True)
+    root = tree_search.Node(parent=None, state=state, action=None, value=0)
+    generator = InstructionGeneratorStub()
+
+    # the role of a node simulated in parallel saves its state, which its children are expanded from
+    await root.expand(2, generator)
+    child = root.children[1]
+    child.isolate_output_dir()
+    child_role = child.load_role()
+    child_role.redirect_output_dir(child.get_shared_output_dir(), child.output_dir)
+    assert child_role.planner.plan.goal.endswith(f"{shared_dir}/Node-0-1/dev_predictions.csv.")
+    child_role.save_state()
+    with open(child.get_role_path()) as f:
+        assert "Node-0-1" not in json.dumps(json.load(f)["planner"])
+
+    await child.expand(2, generator)
+    grandchild = child.children[0]
+    grandchild.isolate_output_dir()
+    grandchild_role = grandchild.load_role()
+    grandchild_role.redirect_output_dir(grandchild.get_shared_output_dir(), grandchild.output_dir)
+    plan = grandchild_role.planner.plan
+    assert plan.goal.endswith(f"{shared_dir}/Node-0-1-0/dev_predictions.csv.")
+    # the tasks 2 and 3 are replaced by the insights of the expansions
+    assert [task.instruction for task in plan.tasks if shared_dir in task.instruction] == [
+        f"Step {i} on {shared_dir}/Node-0-1-0" for i in (1, 4)
+    ]
+
+    # the state of an older version holding the output dir of the parent is redirected too
+    grandchild_role.redirect_output_dir(grandchild.get_shared_output_dir(), f"{shared_dir}/Node-0-1-1")
+    assert plan.goal.endswith(f"{shared_dir}/Node-0-1-1/dev_predictions.csv.")
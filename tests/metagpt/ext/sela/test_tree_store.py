@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the SQLite store of the SELA search trees
+
+import os
+import pickle
+
+import pytest
+
+from metagpt.ext.sela.search import tree_store
+
+
+@pytest.fixture
+def tree(tree_search, mock_roles, state):
+    """A tree of 5 nodes, the root and its grandchild 0-1-0 visited, as saved on expansion and backpropagation"""
+    from metagpt.ext.sela.search.search_algorithm import MCTS
+
+    root = tree_search.Node(parent=None, state=state, action=None, value=0)
+    for i in range(3):
+        root.add_child(tree_search.Node(parent=root, state={**state, "start_task_id": 2}, action=f"insight {i}"))
+    child = root.children[1]
+    child.add_child(tree_search.Node(parent=child, state={**state, "start_task_id": 3}, action="insight 1-0"))
+
+    mcts = MCTS(root_node=root, max_depth=4, use_fixed_insights=False)
+    mcts.node_order = []
+    mcts.backpropagate(child.children[0], {"test_score": 0.8, "dev_score": 0.7, "score": 0.7})
+    mcts.save_node_order(child.children[0].id)
+    return root
+
+
+def reopen_store(node_dir: str) -> tree_store.TreeStore:
+    store = tree_store.get_tree_store(node_dir)
+    tree_store._tree_stores.pop(store.path).close()
+    return tree_store.get_tree_store(node_dir)
+
+
+def load_tree(tree_search, state):
+    from metagpt.ext.sela.search.search_algorithm import MCTS
+
+    mcts = MCTS(root_node=tree_search.Node(parent=None, state=state), max_depth=4, use_fixed_insights=False)
+    mcts.children = {}
+    mcts.node_order = []
+    assert mcts.load_tree()
+    return mcts
+
+
+def test_tree_store_save_and_load_tree(tree_search, state, tree):
+    store = reopen_store(state["node_dir"])
+    records = store.load_records()
+    # the root is saved by the update of its stats on backpropagation, after its children, and loaded first
+    assert [record["id"] for record in records] == ["0", "0-0", "0-1", "0-2", "0-1-0"]
+    assert records[0]["state_diff"] == state
+    assert records[-1]["state_diff"] == {"start_task_id": 3}
+    assert records[-1]["role_path"] == os.path.join(state["node_dir"], "Node-0-1-0.json")
+
+    mcts = load_tree(tree_search, state)
+    root = mcts.root_node
+    assert [child.id for child in root.children] == ["0-0", "0-1", "0-2"]
+    assert [child.action for child in root.children] == ["insight 0", "insight 1", "insight 2"]
+    leaf = root.children[1].children[0]
+    assert leaf.parent is root.children[1]
+    assert leaf.state == {**state, "start_task_id": 3}
+    assert (leaf.visited, leaf.value, leaf.raw_value) == (1, 0.7, 0.8)
+    assert (root.children[1].visited, root.children[1].value) == (1, 0.7)
+    assert (root.visited, root.value) == (1, 0.7)
+    assert root.children[0].visited == 0
+    assert set(mcts.children) == {root, *root.children, leaf}
+
+    mcts.load_node_order()
+    assert mcts.node_order == ["0-1-0"]
+
+
+def test_tree_store_load_legacy_pickles(tree_search, state, tree):
+    leaf = tree.children[1].children[0]
+    with open(os.path.join(state["node_dir"], f"Node-{leaf.id}.pkl"), "wb") as f:
+        pickle.dump(leaf, f)
+    tree_store.get_tree_store(state["node_dir"]).clear()
+
+    mcts = load_tree(tree_search, state)
+    assert [child.id for child in mcts.root_node.children] == ["0-0", "0-1", "0-2"]
+    assert mcts.root_node.children[1].children[0].visited == 1
+
+    # moved to the tree store, loaded from it from now on
+    records = reopen_store(state["node_dir"]).load_records()
+    assert [record["id"] for record in records] == ["0", "0-0", "0-1", "0-2", "0-1-0"]
+    assert records[-1]["value"] == 0.7
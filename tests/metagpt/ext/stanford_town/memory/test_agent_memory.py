@@ -2,12 +2,19 @@
 # -*- coding: utf-8 -*-
 # @Desc   : the unittest of AgentMemory
 
+import random
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 
+import numpy as np
 import pytest
 
 from metagpt.ext.stanford_town.memory.agent_memory import AgentMemory
-from metagpt.ext.stanford_town.memory.retrieve import agent_retrieve
+from metagpt.ext.stanford_town.memory.retrieve import (
+    agent_retrieve,
+    cos_sim,
+    new_agent_retrieve,
+)
 from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
 from metagpt.logs import logger
 
@@ -66,7 +73,8 @@ class TestAgentMemory:
         result2 = agent_memory.get_last_chat("customers")
         logger.info(f"上一次对话是{result2}")
 
-    def test_retrieve_function(self, agent_memory):
+    @pytest.mark.asyncio
+    async def test_retrieve_function(self, agent_memory):
         focus_points = ["who i love?"]
         retrieved = dict()
         for focal_pt in focus_points:
@@ -77,7 +85,7 @@ class TestAgentMemory:
             ]
             nodes = sorted(nodes, key=lambda x: x[0])
             nodes = [i for created, i in nodes]
-            results = agent_retrieve(agent_memory, datetime.now() - timedelta(days=120), 0.99, focal_pt, nodes, 5)
+            results = await agent_retrieve(agent_memory, datetime.now() - timedelta(days=120), 0.99, focal_pt, nodes, 5)
             final_result = []
             for n in results:
                 for i in agent_memory.storage:
@@ -87,3 +95,118 @@ class TestAgentMemory:
 
             retrieved[focal_pt] = final_result
         logger.info(f"检索结果为{retrieved}")
+
+
+def _random_memory(size: int, dim: int = 8) -> AgentMemory:
+    random.seed(0)
+    agent_memory = AgentMemory()
+    start = datetime(2023, 2, 13)
+    for i in range(size):
+        memory_type = random.choice(["event", "thought", "chat"])
+        getattr(agent_memory, f"add_{memory_type}")(
+            start + timedelta(hours=i),
+            None,
+            "Isabella",
+            "is",
+            "idle" if i % 10 == 0 else "cooking",
+            f"memory {i}",
+            {"cooking"},
+            random.randint(1, 9),
+            (f"memory {i}" + (" idle" if i % 10 == 0 else ""), [random.random() - 0.5 for _ in range(dim)]),
+            [],
+        )
+    return agent_memory
+
+
+def _expected_retrieve(agent_memory: AgentMemory, curr_time, memory_forget, query_embedding, topk) -> list[str]:
+    nodes = [i for i in agent_memory.event_list + agent_memory.thought_list if "idle" not in i.embedding_key]
+    factors = [
+        [
+            i.poignancy,
+            memory_forget ** (curr_time - i.created).days,
+            cos_sim(agent_memory.embeddings[i.embedding_key], query_embedding),
+        ]
+        for i in nodes
+    ]
+    factors = np.array(factors)
+    factors = (factors - factors.min(axis=0)) / (factors.max(axis=0) - factors.min(axis=0))
+    scores = factors.sum(axis=1)
+    return [nodes[i].memory_id for i in np.argsort(-scores, kind="stable")[:topk]]
+
+
+@pytest.mark.asyncio
+async def test_new_agent_retrieve_vectorized(mocker):
+    agent_memory = _random_memory(500)
+    query_embedding = [random.random() - 0.5 for _ in range(8)]
+    mocker.patch("metagpt.ext.stanford_town.memory.retrieve.aget_embedding", return_value=query_embedding)
+    mocker.patch("metagpt.ext.stanford_town.memory.retrieve.aget_embeddings", return_value=[query_embedding])
+    curr_time = datetime(2023, 3, 1)
+    role = SimpleNamespace(memory=agent_memory, scratch=SimpleNamespace(curr_time=curr_time, recency_decay=0.99))
+
+    expected = _expected_retrieve(agent_memory, curr_time, 0.99, query_embedding, 10)
+    retrieved = (await new_agent_retrieve(role, ["cooking"], 10))["cooking"]
+
+    assert [i.memory_id for i in retrieved] == expected
+    assert all(i.last_accessed == curr_time for i in retrieved)
+    assert agent_memory.get_node(expected[0]) is retrieved[0]
+    nodes = [agent_memory.matrix.nodes[i] for i in agent_memory.matrix.retrievable_rows()[::-1]]
+    assert await agent_retrieve(agent_memory, curr_time, 0.99, "cooking", nodes, 3) == expected[:3]
+
+
+def test_matrix_rebuilt_after_deserialization():
+    agent_memory = _random_memory(100)
+
+    new_memory = AgentMemory.model_validate(agent_memory.model_dump())
+
+    assert len(new_memory.matrix) == len(agent_memory.matrix)
+    assert np.array_equal(new_memory.matrix.retrievable_rows(), agent_memory.matrix.retrievable_rows())
+    assert np.allclose(new_memory.matrix.embeddings, agent_memory.matrix.embeddings)
+
+
+def _assert_same_memory(agent_memory: AgentMemory, other: AgentMemory):
+    assert [i.to_record() for i in other.storage] == [i.to_record() for i in agent_memory.storage]
+    assert [i.memory_id for i in other.event_list] == [i.memory_id for i in agent_memory.event_list]
+    assert [i.memory_id for i in other.chat_keywords["cooking"]] == [
+        i.memory_id for i in agent_memory.chat_keywords["cooking"]
+    ]
+    assert other.kw_strength_event == agent_memory.kw_strength_event
+    assert other.embeddings.keys() == agent_memory.embeddings.keys()
+    assert np.allclose(other.matrix.embeddings, agent_memory.matrix.embeddings)
+
+
+def test_save_load_compact(tmp_path):
+    agent_memory = _random_memory(50)
+    agent_memory.save(tmp_path)
+
+    loaded = AgentMemory()
+    loaded.load(tmp_path)
+    _assert_same_memory(agent_memory, loaded)
+    assert isinstance(loaded.embeddings["memory 1"], np.memmap)  # lazy loaded
+
+    # only the new memories are appended
+    nodes = (tmp_path / "nodes.jsonl").read_bytes()
+    for memory in (agent_memory, loaded):
+        memory.add_event(
+            datetime(2023, 3, 1), None, "Klaus", "is", "reading", "reading", {"book"}, 3, ("read", [1] * 8), []
+        )
+    loaded.save(tmp_path)
+    assert (tmp_path / "nodes.jsonl").read_bytes().startswith(nodes)
+
+    reloaded = AgentMemory()
+    reloaded.load(tmp_path)
+    _assert_same_memory(agent_memory, reloaded)
+    assert len(np.load(tmp_path / "embeddings.npy")) == len(agent_memory.embeddings)
+
+
+def test_convert_ga_json_layout(tmp_path):
+    agent_memory = _random_memory(30)
+    agent_memory.save_json(tmp_path)
+
+    loaded = AgentMemory()
+    loaded.load(tmp_path)
+    _assert_same_memory(agent_memory, loaded)
+
+    loaded.save(tmp_path)
+    converted = AgentMemory()
+    converted.load(tmp_path)
+    _assert_same_memory(agent_memory, converted)
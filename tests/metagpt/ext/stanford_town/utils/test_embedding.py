@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the embedding service
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from metagpt.ext.stanford_town.memory.retrieve import cos_sim
+from metagpt.ext.stanford_town.utils.embedding import (
+    BaseEmbeddingBackend,
+    EmbeddingCache,
+    EmbeddingService,
+    HashEmbeddingBackend,
+)
+
+
+class CountingBackend(BaseEmbeddingBackend):
+    model = "counting"
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        if self.fail:
+            raise ConnectionError("offline")
+        return [[len(i), 1.0 / 3] for i in texts]
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(0.01)
+        return self.embed(texts)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_and_batch_requests():
+    backend = CountingBackend()
+    service = EmbeddingService(backend=backend, batch_size=4)
+
+    texts = ["a", "bb", "a", "ccc", "bb", "dddd", "eeeee"]
+    results = await asyncio.gather(*[service.aget_embedding(i) for i in texts])
+
+    assert [i[0] for i in results] == [len(i) for i in texts]
+    assert sorted(sum(backend.calls, [])) == ["a", "bb", "ccc", "dddd", "eeeee"]
+    assert [len(i) for i in backend.calls] == [4, 1]
+    assert results[0][1] == float(np.float32(1.0 / 3))  # same precision as the disk cache
+
+
+@pytest.mark.asyncio
+async def test_warm_and_disk_cache(tmp_path):
+    path = tmp_path / "embedding.sqlite3"
+    backend = CountingBackend()
+    service = EmbeddingService(backend=backend, cache=EmbeddingCache(path))
+
+    warm_cache = {"known": [0.5, 0.5]}
+    embeddings = await service.aget_embeddings(["known", "new\ntext", ""], warm_cache=warm_cache)
+    assert embeddings[0] == [0.5, 0.5]
+    assert backend.calls == [["new text", "this is blank"]]
+
+    # shared across the runs
+    other_backend = CountingBackend()
+    other = EmbeddingService(backend=other_backend, cache=EmbeddingCache(path))
+    assert await other.aget_embeddings(["new\ntext", ""]) == embeddings[1:]
+    assert other.get_embedding("new\ntext") == embeddings[1]
+    assert other_backend.calls == []
+
+
+@pytest.mark.asyncio
+async def test_backend_error_raised_to_all_waiters():
+    service = EmbeddingService(backend=CountingBackend(fail=True))
+
+    results = await asyncio.gather(service.aget_embedding("a"), service.aget_embedding("a"), return_exceptions=True)
+
+    assert all(isinstance(i, ConnectionError) for i in results)
+    assert not service._inflight
+
+
+@pytest.mark.asyncio
+async def test_hash_backend_deterministic():
+    service = EmbeddingService(backend=HashEmbeddingBackend(dimensions=256))
+
+    cooking, cooking_again, party = await service.aget_embeddings(
+        ["Isabella is cooking breakfast", "Isabella is cooking dinner", "Klaus plans a party"]
+    )
+
+    assert len(cooking) == 256
+    assert HashEmbeddingBackend(dimensions=256).embed(["Isabella is cooking breakfast"])[0] == pytest.approx(cooking)
+    assert cos_sim(cooking, cooking_again) > cos_sim(cooking, party)
+
+
+class ThreadRecordingCache(EmbeddingCache):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        self.threads.append(threading.current_thread())
+        return super().get_many(keys)
+
+    def set_many(self, items: dict[str, list[float]]):
+        self.threads.append(threading.current_thread())
+        super().set_many(items)
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_queried_off_the_event_loop(tmp_path):
+    cache = ThreadRecordingCache(tmp_path / "embedding.sqlite3")
+    service = EmbeddingService(backend=CountingBackend(), cache=cache)
+
+    assert len(await service.aget_embeddings(["a", "bb"])) == 2
+
+    assert len(cache.threads) == 2
+    assert threading.current_thread() not in cache.threads
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the step barrier
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from metagpt.ext.stanford_town.utils.step_barrier import (
+    STEP_LOG_FNAME,
+    FrontendStepBarrier,
+    StepBarrier,
+)
+from metagpt.utils.common import read_json_file, write_json_file
+
+CURR_TIME = datetime(2023, 2, 13, 9, 0, 0)
+
+
+async def run_role(barrier: StepBarrier, name: str, step: int, n_step: int, delay: float) -> list[dict]:
+    tiles = []
+    for i in range(step, step + n_step):
+        role_env = await barrier.get_role_environment(name, i)
+        tiles.append(role_env)
+        await asyncio.sleep(delay)  # thinking
+        next_tile = (role_env["x"] + 1, role_env["y"])
+        await barrier.submit(name, i, {"movement": next_tile}, next_tile, CURR_TIME)
+    return tiles
+
+
+@pytest.mark.asyncio
+async def test_step_barrier(tmp_path):
+    write_json_file(tmp_path / "sim/environment/3.json", {"a": {"x": 0, "y": 0}, "b": {"x": 10, "y": 0}})
+    barrier = StepBarrier("sim", role_names=["a", "b"], storage_path=tmp_path)
+
+    tiles_a, tiles_b = await asyncio.gather(
+        run_role(barrier, "a", step=3, n_step=3, delay=0), run_role(barrier, "b", step=3, n_step=3, delay=0.01)
+    )
+
+    assert [i["x"] for i in tiles_a] == [0, 1, 2]
+    assert [i["x"] for i in tiles_b] == [10, 11, 12]
+    lines = (tmp_path / "sim" / STEP_LOG_FNAME).read_text().splitlines()
+    records = [json.loads(i) for i in lines]
+    assert [i["step"] for i in records] == [3, 4, 5]
+    assert records[0]["movement"]["persona"] == {"a": {"movement": [1, 0]}, "b": {"movement": [11, 0]}}
+    assert records[0]["movement"]["meta"]["curr_time"] == "February 13, 2023, 09:00:00"
+    assert records[-1]["environment"]["b"] == {"maze": "the_ville", "x": 13, "y": 0}
+    assert not (tmp_path / "sim/movement").exists()  # headless
+
+
+@pytest.mark.asyncio
+async def test_frontend_step_barrier(tmp_path):
+    barrier = FrontendStepBarrier("sim", role_names=["a"], storage_path=tmp_path, poll_interval=0.01)
+
+    waiting = asyncio.create_task(barrier.get_role_environment("a", 0))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    write_json_file(tmp_path / "sim/environment/0.json", {"a": {"x": 1, "y": 2}})
+    assert (await waiting)["x"] == 1
+
+    await barrier.submit("a", 0, {"movement": (2, 2)}, (2, 2), CURR_TIME)
+    assert read_json_file(tmp_path / "sim/movement/0.json")["persona"]["a"]["movement"] == [2, 2]
+    assert (await barrier.get_role_environment("a", 1)) == {"maze": "the_ville", "x": 2, "y": 2}
+
+
+@pytest.mark.asyncio
+async def test_step_barrier_timeout(tmp_path):
+    write_json_file(tmp_path / "sim/environment/0.json", {"a": {"x": 0, "y": 0}, "b": {"x": 10, "y": 0}})
+    barrier = StepBarrier("sim", role_names=["a", "b"], storage_path=tmp_path, timeout=0.05)
+    assert (await barrier.get_role_environment("a", 0))["x"] == 0
+    await barrier.submit("a", 0, {"movement": (1, 0)}, (1, 0), CURR_TIME)
+
+    # "b" never submitted its movement of step 0
+    assert await barrier.get_role_environment("a", 1) is None
+
+    # a role without tile stays out of the environment of the next step
+    await barrier.submit("b", 0, {"movement": None}, None, CURR_TIME)
+    assert await barrier.get_role_environment("a", 1) == {"maze": "the_ville", "x": 1, "y": 0}
+    assert await barrier.get_role_environment("b", 1) is None
+
+
+@pytest.mark.asyncio
+async def test_frontend_step_barrier_timeout(tmp_path):
+    barrier = FrontendStepBarrier("sim", role_names=["a"], storage_path=tmp_path, poll_interval=0.01, timeout=0.05)
+    assert await barrier.get_role_environment("a", 0) is None
@@ -55,3 +55,42 @@ def test_memory():
     memory.clear()
     assert memory.count() == 0
     assert len(memory.index) == 0
+
+
+def test_memory_dedup_and_indexes():
+    memory = Memory()
+
+    message1 = Message(content="test message1", role="user1", sent_from="Alice")
+    message2 = Message(content="test message2", role="user2", sent_from="Bob")
+    memory.add_batch([message1, message2, message1, message1.model_copy()])
+    assert memory.count() == 2
+    assert memory.contains(message1)
+    assert not memory.contains(Message(content="test message1", role="user1", sent_from="Alice"))
+
+    assert memory.get_by_sent_from("Alice") == [message1]
+    assert memory.find_news([message1, message2], k=1) == [message1]
+
+    memory.delete(message1.model_copy())
+    assert memory.count() == 1
+    assert memory.get_by_role("user1") == []
+    assert memory.get_by_sent_from("Alice") == []
+    assert len(memory.index[message2.cause_by]) == 1
+
+    restored = Memory(**memory.model_dump())
+    assert restored.contains(message2)
+    assert restored.get_by_role("user2")[0].content == message2.content
+    restored.delete_newest()
+    assert restored.count() == 0
+    assert len(restored.index[message2.cause_by]) == 0
+
+
+def test_memory_ignore_id():
+    memory = Memory(ignore_id=True)
+
+    memory.add(Message(content="test message1", role="user1"))
+    memory.add(Message(content="test message1", role="user1"))
+    memory.add(Message(content="test message2", role="user1"))
+    assert memory.count() == 2
+
+    news = memory.find_news([Message(content="test message1", role="user1"), Message(content="new", role="user1")])
+    assert [i.content for i in news] == ["new"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of llm_client_pool
+
+import asyncio
+
+import pytest
+
+from metagpt.provider import OpenAILLM
+from metagpt.provider.llm_client_pool import LLMClientPool
+from tests.metagpt.provider.mock_llm_config import (
+    mock_llm_config,
+    mock_llm_config_proxy,
+)
+
+
+class MockClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_llm_client_pool():
+    pool = LLMClientPool()
+
+    client = pool.get("key", MockClient)
+    assert pool.get("key", MockClient) is client
+    assert pool.get("other", MockClient) is not client
+    assert pool.stats() == {"clients": 2, "hits": 1, "misses": 2}
+
+    await pool.aclose()
+    assert client.closed
+    assert pool.stats()["clients"] == 0
+    assert pool.get("key", MockClient) is not client
+
+
+def test_llm_client_pool_per_event_loop():
+    pool = LLMClientPool()
+
+    async def get_client():
+        return pool.get("key", MockClient)
+
+    assert asyncio.run(get_client()) is not asyncio.run(get_client())
+    assert pool.stats()["clients"] == 1
+
+
+@pytest.mark.asyncio
+async def test_openai_llm_shared_client():
+    llm1 = OpenAILLM(mock_llm_config)
+    llm2 = OpenAILLM(mock_llm_config.model_copy(update={"model": "gpt-4", "temperature": 0.5}))
+    assert llm1.aclient is llm2.aclient
+    assert OpenAILLM(mock_llm_config_proxy).aclient is not llm1.aclient
+
+    client = MockClient()
+    llm1.aclient = client
+    assert llm1.aclient is client
+    assert llm2.aclient is not client
+
+
+@pytest.mark.asyncio
+async def test_llm_client_pool_lease():
+    pool = LLMClientPool()
+    first_done, second_done = asyncio.Event(), asyncio.Event()
+
+    async def team(done: asyncio.Event, wait: asyncio.Event = None):
+        async with pool.lease():
+            client = pool.get("key", MockClient)
+            if wait:
+                await wait.wait()
+            done.set()
+            return client
+
+    second = asyncio.create_task(team(second_done, first_done))
+    await asyncio.sleep(0)  # the second team holds its lease
+    client = await team(first_done)
+    assert not client.closed  # still used by the second team
+    assert await second is client
+    assert client.closed
+    assert pool.stats()["clients"] == 0
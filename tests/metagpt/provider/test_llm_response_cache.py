@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : test_llm_response_cache.py
+"""
+
+import pytest
+
+from metagpt.configs.llm_cache_config import LLMCacheBackend, LLMCacheConfig
+from metagpt.provider.llm_response_cache import (
+    LLMResponseCache,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+    get_response_cache,
+)
+from metagpt.utils.cost_manager import CostManager
+from tests.metagpt.provider.mock_llm_config import mock_llm_config
+from tests.metagpt.provider.test_base_llm import MockBaseLLM
+
+
+def test_make_key():
+    messages = [{"role": "user", "content": "hello"}]
+    key = LLMResponseCache.make_key("gpt-4", messages, 0.0)
+    assert key == LLMResponseCache.make_key("gpt-4", [{"content": "hello", "role": "user"}], 0.0)
+    assert key != LLMResponseCache.make_key("gpt-4", messages, 0.5)
+    assert key != LLMResponseCache.make_key("gpt-3.5-turbo", messages, 0.0)
+    assert key != LLMResponseCache.make_key("gpt-4", messages, 0.0, tools=[{"type": "function"}])
+
+
+@pytest.mark.asyncio
+async def test_memory_backend(mocker):
+    backend = MemoryCacheBackend(max_size=2)
+    await backend.set("a", "1")
+    await backend.set("b", "2")
+    assert await backend.get("a") == "1"
+    await backend.set("c", "3")  # evict the least recently used "b"
+    assert await backend.get("b") is None
+    assert await backend.get("a") == "1"
+
+    await backend.set("d", "4", ttl=10)
+    mocker.patch("metagpt.provider.llm_response_cache.time.time", return_value=1e12)
+    assert await backend.get("d") is None
+    assert await backend.get("a") == "1"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = LLMResponseCache(SQLiteCacheBackend(path))
+    await cache.set("k", {"language": "python", "code": "print(1)"})
+    await cache.close()
+
+    cache = LLMResponseCache(SQLiteCacheBackend(path))
+    assert await cache.get("k") == {"language": "python", "code": "print(1)"}
+    assert await cache.get("missing") is None
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_aask_with_cache(tmp_path, mocker):
+    cache_config = LLMCacheConfig(backend=LLMCacheBackend.SQLITE, path=tmp_path / "cache.sqlite3")
+    llm = MockBaseLLM(mock_llm_config.model_copy(update={"cache": cache_config}))
+    llm.cost_manager = CostManager()
+    spy = mocker.spy(llm, "acompletion_text")
+
+    rsp = await llm.aask("hello", stream=False)
+    assert await llm.aask("hello", stream=True) == rsp
+    assert spy.call_count == 1
+    assert (llm.cost_manager.cache_hits, llm.cost_manager.cache_misses) == (1, 1)
+
+    await llm.aask("hello again", stream=False)
+    assert spy.call_count == 2
+    assert llm.cost_manager.cache_misses == 2
+    await get_response_cache(cache_config).close()
+
+    # a closed cache is opened again on next use
+    assert await llm.aask("hello", stream=False) == rsp
+    assert spy.call_count == 2
+    await get_response_cache(cache_config).close()
+
+
+@pytest.mark.asyncio
+async def test_aask_without_cache(mocker):
+    llm = MockBaseLLM()
+    llm.cost_manager = CostManager()
+    spy = mocker.spy(llm, "acompletion_text")
+    await llm.aask("hello", stream=False)
+    await llm.aask("hello", stream=False)
+    assert spy.call_count == 2
+    assert llm.cost_manager.cache_hits == llm.cost_manager.cache_misses == 0
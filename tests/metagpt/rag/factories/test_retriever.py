@@ -8,7 +8,10 @@ from llama_index.vector_stores.elasticsearch import ElasticsearchStore
 from llama_index.vector_stores.milvus import MilvusVectorStore
 
 from metagpt.rag.factories.retriever import RetrieverFactory
-from metagpt.rag.retrievers.bm25_retriever import DynamicBM25Retriever
+from metagpt.rag.retrievers.bm25_retriever import (
+    BM25_PERSIST_FNAME,
+    DynamicBM25Retriever,
+)
 from metagpt.rag.retrievers.chroma_retriever import ChromaRetriever
 from metagpt.rag.retrievers.es_retriever import ElasticsearchRetriever
 from metagpt.rag.retrievers.faiss_retriever import FAISSRetriever
@@ -71,16 +74,23 @@ class TestRetrieverFactory:
 
     def test_get_retriever_with_bm25_config(self, mocker, mock_nodes):
         mock_config = BM25RetrieverConfig()
-        mocker.patch("rank_bm25.BM25Okapi.__init__", return_value=None)
 
         retriever = self.retriever_factory.get_retriever(configs=[mock_config], nodes=mock_nodes)
 
         assert isinstance(retriever, DynamicBM25Retriever)
 
+    def test_get_retriever_with_bm25_persist_path(self, mock_nodes, tmp_path):
+        mock_config = BM25RetrieverConfig()
+        self.retriever_factory.get_retriever(configs=[mock_config], nodes=mock_nodes).persist(str(tmp_path))
+
+        retriever = self.retriever_factory.get_retriever(configs=[mock_config], nodes=mock_nodes, persist_path=tmp_path)
+
+        assert retriever.bm25.keys == [mock_nodes[0].node_id]
+        assert (tmp_path / BM25_PERSIST_FNAME).exists()
+
     def test_get_retriever_with_multiple_configs_returns_hybrid(self, mocker, mock_nodes, mock_embedding):
         mock_faiss_config = FAISSRetrieverConfig(dimensions=1)
         mock_bm25_config = BM25RetrieverConfig()
-        mocker.patch("rank_bm25.BM25Okapi.__init__", return_value=None)
 
         retriever = self.retriever_factory.get_retriever(
             configs=[mock_faiss_config, mock_bm25_config], nodes=mock_nodes, embed_model=mock_embedding
@@ -1,27 +1,42 @@
 import pytest
 from llama_index.core import VectorStoreIndex
-from llama_index.core.schema import Node
+from llama_index.core.schema import Node, QueryBundle, TextNode
+from rank_bm25 import BM25Okapi
 
-from metagpt.rag.retrievers.bm25_retriever import DynamicBM25Retriever
+from metagpt.rag.retrievers.bm25_retriever import (
+    BM25_PERSIST_FNAME,
+    DynamicBM25Retriever,
+    IncrementalBM25,
+)
+
+CORPUS = [
+    "the cat sat on the mat",
+    "the dog chased the cat",
+    "a bird sang in the morning",
+    "dogs and cats are friends",
+    "the morning sun rose over the hills",
+    "cat cat cat",
+]
 
 
 class TestDynamicBM25Retriever:
     @pytest.fixture(autouse=True)
     def setup(self, mocker):
         self.doc1 = mocker.MagicMock(spec=Node)
+        self.doc1.node_id = "doc1"
         self.doc1.get_content.return_value = "Document content 1"
         self.doc2 = mocker.MagicMock(spec=Node)
+        self.doc2.node_id = "doc2"
         self.doc2.get_content.return_value = "Document content 2"
         self.mock_nodes = [self.doc1, self.doc2]
 
-        index = mocker.MagicMock(spec=VectorStoreIndex)
-        index.storage_context.persist.return_value = "ok"
+        self.index = mocker.MagicMock(spec=VectorStoreIndex)
+        self.index.storage_context.persist.return_value = "ok"
 
         mock_nodes = []
-        mock_tokenizer = mocker.MagicMock()
-        self.mock_bm25okapi = mocker.patch("rank_bm25.BM25Okapi.__init__", return_value=None)
+        mock_tokenizer = mocker.MagicMock(side_effect=str.split)
 
-        self.retriever = DynamicBM25Retriever(nodes=mock_nodes, tokenizer=mock_tokenizer, index=index)
+        self.retriever = DynamicBM25Retriever(nodes=mock_nodes, tokenizer=mock_tokenizer, index=self.index)
 
     def test_add_docs_updates_nodes_and_corpus(self):
         # Exec
@@ -29,9 +44,110 @@ class TestDynamicBM25Retriever:
 
         # Assert
         assert len(self.retriever._nodes) == len(self.mock_nodes)
-        assert len(self.retriever._corpus) == len(self.mock_nodes)
-        self.retriever._tokenizer.assert_called()
-        self.mock_bm25okapi.assert_called()
+        assert len(self.retriever.bm25) == len(self.mock_nodes)
+        assert self.retriever._tokenizer.call_count == len(self.mock_nodes)
+        self.index.insert_nodes.assert_called_once()
+
+    def test_add_docs_tokenizes_only_new_nodes(self):
+        # Exec
+        self.retriever.add_nodes([self.doc1])
+        self.retriever.add_nodes([self.doc2])
+
+        # Assert
+        assert self.retriever._tokenizer.call_count == 2
+        assert self.retriever._nodes == [self.doc1, self.doc2]
+
+    def test_delete_nodes(self):
+        # Exec
+        self.retriever.add_nodes(self.mock_nodes)
+        self.retriever.delete_nodes(["doc1", "unknown"])
+
+        # Assert
+        assert self.retriever._nodes == [self.doc2]
+        assert self.retriever.bm25.keys == ["doc2"]
+        self.index.delete_nodes.assert_called_once_with(["doc1", "unknown"])
+
+    def test_persist(self, tmp_path):
+        self.retriever.add_nodes(self.mock_nodes)
+
+        self.retriever.persist(str(tmp_path))
+
+        self.index.storage_context.persist.assert_called_once_with(str(tmp_path))
+        bm25 = IncrementalBM25.from_persist_path(tmp_path / BM25_PERSIST_FNAME)
+        assert bm25.keys == ["doc1", "doc2"]
+
+
+def _nodes(texts: list[str], offset: int = 0) -> list[TextNode]:
+    return [TextNode(id_=f"node_{i + offset}", text=text) for i, text in enumerate(texts)]
+
+
+@pytest.mark.parametrize("query", ["cat", "the cat", "morning dog", "cat cat the", "unknown"])
+def test_incremental_bm25_scores_as_bm25okapi(query):
+    bm25 = IncrementalBM25()
+    for i, text in enumerate(CORPUS):
+        bm25.add(str(i), text.split())
+
+    expected = BM25Okapi([text.split() for text in CORPUS]).get_scores(query.split())
+
+    assert bm25.get_scores(query.split()) == pytest.approx(expected)
+
+
+def test_incremental_bm25_remove_as_rebuild():
+    bm25 = IncrementalBM25()
+    for i, text in enumerate(CORPUS):
+        bm25.add(str(i), text.split())
+
+    bm25.remove("1")
+    bm25.remove("5")
+    bm25.add("0", "a new cat".split())
+
+    texts = {"0": "a new cat", **{str(i): text for i, text in enumerate(CORPUS) if i not in (0, 1, 5)}}
+    expected = BM25Okapi([texts[key].split() for key in bm25.keys]).get_scores(["cat", "the"])
+    assert sorted(bm25.keys) == sorted(texts)
+    assert bm25.get_scores(["cat", "the"]) == pytest.approx(expected)
+
+    for key in list(bm25.keys):
+        bm25.remove(key)
+    assert len(bm25) == 0
+    assert bm25.get_scores(["cat"]).size == 0
+
+
+def test_retriever_top_k_and_reload(tmp_path):
+    retriever = DynamicBM25Retriever(nodes=_nodes(CORPUS[:3]), tokenizer=str.split, similarity_top_k=2)
+    retriever.add_nodes(_nodes(CORPUS[3:], offset=3))
+    retriever.delete_nodes(["node_2"])
+
+    results = retriever.retrieve(QueryBundle("cat"))
+    assert [i.node.node_id for i in results] == ["node_5", "node_1"]
+
+    retriever.persist(str(tmp_path))
+    bm25 = IncrementalBM25.from_persist_path(tmp_path / BM25_PERSIST_FNAME)
+    nodes = retriever._nodes[::-1]
+    tokenizer_calls = []
+    reloaded = DynamicBM25Retriever(
+        nodes=nodes, tokenizer=lambda text: tokenizer_calls.append(text) or text.split(), similarity_top_k=2, bm25=bm25
+    )
+    assert reloaded.bm25 is bm25
+    assert [i.node.node_id for i in reloaded.retrieve("cat")] == ["node_5", "node_1"]
+    assert tokenizer_calls == ["cat"]
+
+    # Not matching the nodes, rebuilt
+    rebuilt = DynamicBM25Retriever(nodes=nodes[1:], tokenizer=str.split, bm25=bm25)
+    assert rebuilt.bm25 is not bm25
+    assert len(rebuilt.bm25) == len(nodes) - 1
+
+
+def test_retriever_reload_edited_node(tmp_path):
+    nodes = _nodes(CORPUS[:4])
+    DynamicBM25Retriever(nodes=nodes, tokenizer=str.split).persist(str(tmp_path))
+    bm25 = IncrementalBM25.from_persist_path(tmp_path / BM25_PERSIST_FNAME)
 
-    def test_persist(self):
-        self.retriever.persist("")
+    # the text of a node edited under the same id is tokenized again
+    nodes[0] = TextNode(id_=nodes[0].node_id, text="a zebra")
+    tokenizer_calls = []
+    reloaded = DynamicBM25Retriever(
+        nodes=nodes, tokenizer=lambda text: tokenizer_calls.append(text) or text.split(), bm25=bm25
+    )
+    assert reloaded.bm25 is bm25
+    assert tokenizer_calls == ["a zebra"]
+    assert reloaded.retrieve("zebra")[0].node.node_id == nodes[0].node_id
@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import aiohttp.web
 import pytest
 
 from metagpt.tools import web_browser_engine_playwright
+from metagpt.tools.browser_pool import BROWSER_POOL, BrowserPool
 from metagpt.utils.parse_html import WebPage
 
 
@@ -48,5 +50,62 @@ async def test_scrape_web_page(browser_type, use_proxy, kwagrs, proxy, capfd, ht
     await server.stop()
 
 
+@pytest.mark.asyncio
+async def test_browser_pool():
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path)
+        if request.path == "/logo.png":
+            return aiohttp.web.Response(body=b"", content_type="image/png")
+        return aiohttp.web.Response(
+            text=f"""<!DOCTYPE html><html><head><title>MetaGPT</title></head>
+            <body><h1>MetaGPT {request.path}</h1><img src="/logo.png"></body></html>""",
+            content_type="text/html",
+        )
+
+    runner = aiohttp.web.ServerRunner(aiohttp.web.Server(handler))
+    await runner.setup()
+    site = aiohttp.web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    _, port, *_ = site._server.sockets[0].getsockname()
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        launches = BROWSER_POOL.launches
+        browser = web_browser_engine_playwright.PlaywrightWrapper()
+        results = await browser.run(f"{url}/a", f"{url}/b", f"{url}/c")
+        assert [i.inner_text for i in results] == ["MetaGPT /a", "MetaGPT /b", "MetaGPT /c"]
+        assert "/logo.png" not in requests  # images blocked
+        assert BROWSER_POOL.launches == launches + 1  # one browser for all the pages
+
+        # served from the page cache, the browser is not launched again
+        assert (await browser.run(f"{url}/a")).inner_text == "MetaGPT /a"
+        assert requests.count("/a") == 1
+        assert BROWSER_POOL.launches == launches + 1
+
+        # a crashed browser is launched again
+        pooled = await BROWSER_POOL.get_browser("chromium", browser.launch_kwargs)
+        await pooled.browser.close()
+        no_cache = web_browser_engine_playwright.PlaywrightWrapper(cache_ttl=0, block_resources=[])
+        assert (await no_cache.run(f"{url}/a")).inner_text == "MetaGPT /a"
+        assert "/logo.png" in requests
+        assert BROWSER_POOL.launches == launches + 2
+    finally:
+        await BROWSER_POOL.aclose()
+        await runner.cleanup()
+    assert BROWSER_POOL.stats()["browsers"] == 0
+
+
+def test_browser_pool_page_cache(mocker):
+    mocker.patch("metagpt.tools.browser_pool.time.monotonic", side_effect=[0, 10, 100])
+    pool = BrowserPool()
+    page = WebPage(inner_text="MetaGPT", html="<h1>MetaGPT</h1>", url="http://127.0.0.1")
+    pool.cache_page(("http://127.0.0.1",), page)
+    assert pool.get_cached_page(("http://127.0.0.1",), ttl=60) is page
+    assert pool.get_cached_page(("http://127.0.0.1",), ttl=60) is None
+    assert pool.cache_hits == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-s"])
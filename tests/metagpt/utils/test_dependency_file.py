@@ -61,5 +61,29 @@ async def test_dependency_file():
     assert not file.exists
 
 
+@pytest.mark.asyncio
+async def test_dependency_file_write_behind(tmp_path, mocker):
+    file = DependencyFile(workdir=tmp_path, flush_interval=3600)
+    spy = mocker.spy(file, "flush")
+    await file.update(filename="a.py", dependencies={"b.py", "c.py"})
+    assert spy.call_count == 1  # the first update is written at once
+    for i in range(10):
+        await file.update(filename=f"d{i}.py", dependencies={"b.py"})
+    assert spy.call_count == 1
+    assert await DependencyFile(workdir=tmp_path).get("d0.py") == set()
+
+    assert file.get_dependents("b.py") == {"a.py"} | {f"d{i}.py" for i in range(10)}
+    await file.update(filename="a.py", dependencies={"c.py"})
+    await file.update(filename="d0.py", dependencies=None)
+    assert "a.py" not in file.get_dependents("b.py")
+    assert "d0.py" not in file.get_dependents("b.py")
+
+    file.flush()
+    reloaded = DependencyFile(workdir=tmp_path)
+    assert await reloaded.get("d1.py") == {"b.py"}
+    assert reloaded.get_dependents("c.py") == {"a.py"}
+    assert [i.name for i in tmp_path.iterdir()] == [".dependencies.json"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-s"])
@@ -13,6 +13,7 @@ from pathlib import Path
 import pytest
 
 from metagpt.utils.common import awrite
+from metagpt.utils.dependency_file import DependencyFile
 from metagpt.utils.git_repository import GitRepository
 
 
@@ -106,6 +107,22 @@ async def test_dependency_file():
     assert not dependancy_file.exists
 
 
+@pytest.mark.asyncio
+async def test_dependency_file_write_behind(tmp_path, mocker):
+    repo, _ = await mock_repo(tmp_path / "git4")
+    dependency_file = await repo.get_dependency()
+    spy = mocker.spy(dependency_file, "flush")
+    file_repo = repo.new_file_repository("src")
+    for i in range(5):
+        await file_repo.save(filename=f"{i}.py", content="", dependencies=["a.txt"])
+    assert spy.call_count == 1  # the first save is written at once, the next ones on archive
+    assert await DependencyFile(workdir=repo.workdir).get("src/4.py") == set()
+
+    repo.archive()
+    assert await DependencyFile(workdir=repo.workdir).get("src/4.py") == {"a.txt"}
+    repo.delete_repository()
+
+
 @pytest.mark.asyncio
 async def test_git_open():
     local_path = Path(__file__).parent / "git3"
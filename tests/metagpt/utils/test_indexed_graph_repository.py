@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : test_indexed_graph_repository.py
+@Desc    : Unit tests for indexed_graph_repository.py and sqlite_graph_repository.py
+"""
+
+import pytest
+
+from metagpt.utils.di_graph_repository import DiGraphRepository
+from metagpt.utils.graph_repository import SPO
+from metagpt.utils.indexed_graph_repository import IndexedGraphRepository
+from metagpt.utils.sqlite_graph_repository import SQLiteGraphRepository
+
+TRIPLES = [
+    ("main.py", "is", "source_code"),
+    ("main.py", "has_class", "main.py:Game"),
+    ("main.py:Game", "is", "class"),
+    ("main.py:Game", "has_class_method", "main.py:Game:draw"),
+    ("main.py:Game:draw", "is", "class_method"),
+    ("main.py:Game:draw", "method:hasDescription", "Draw image"),
+    ("main.py:Game:draw", "method:hasDescription", "Show image"),
+    ("main.py:Game", "is", "main.py"),  # replaced below, one predicate between a subject and an object
+    ("main.py:Game", "is_composite_of", "main.py"),
+]
+
+QUERIES = [
+    {},
+    {"subject": "main.py:Game"},
+    {"predicate": "is"},
+    {"object_": "main.py"},
+    {"subject": "main.py:Game:draw", "predicate": "method:hasDescription"},
+    {"predicate": "is", "object_": "class"},
+    {"subject": "main.py:Game", "object_": "main.py"},
+    {"subject": "main.py:Game", "predicate": "is", "object_": "main.py"},
+    {"subject": "unknown"},
+]
+
+
+def _key(rows):
+    return sorted((i.subject, i.predicate, i.object_) for i in rows)
+
+
+@pytest.fixture(params=["indexed", "sqlite"])
+def graph(request, tmp_path):
+    if request.param == "indexed":
+        yield IndexedGraphRepository(name="test", root=tmp_path)
+    else:
+        graph = SQLiteGraphRepository(name="test", root=tmp_path)
+        yield graph
+        graph.close()
+
+
+async def _di_graph(tmp_path) -> DiGraphRepository:
+    di_graph = DiGraphRepository(name="test", root=tmp_path)
+    for s, p, o in TRIPLES:
+        await di_graph.insert(subject=s, predicate=p, object_=o)
+    return di_graph
+
+
+@pytest.mark.asyncio
+async def test_select_delete_as_di_graph(graph, tmp_path):
+    di_graph = await _di_graph(tmp_path)
+    await graph.insert_many([SPO(subject=s, predicate=p, object_=o) for s, p, o in TRIPLES[:5]])
+    for s, p, o in TRIPLES[5:]:
+        await graph.insert(subject=s, predicate=p, object_=o)
+
+    for query in QUERIES:
+        assert _key(await graph.select(**query)) == _key(await di_graph.select(**query)), query
+
+    for query in [{"subject": "main.py:Game:draw", "predicate": "method:hasDescription"}, {"predicate": "is"}]:
+        assert await graph.delete(**query) == await di_graph.delete(**query)
+        for q in QUERIES:
+            assert _key(await graph.select(**q)) == _key(await di_graph.select(**q)), q
+    assert await graph.delete(subject="unknown") == 0
+
+
+@pytest.mark.asyncio
+async def test_json_compatibility(graph, tmp_path):
+    di_graph = await _di_graph(tmp_path)
+    graph.load_json(di_graph.json())
+    assert _key(await graph.select()) == _key(await di_graph.select())
+
+    new_di_graph = DiGraphRepository(name="new", root=tmp_path).load_json(graph.json())
+    assert _key(await new_di_graph.select()) == _key(await di_graph.select())
+    assert set(new_di_graph.repo.nodes) == set(di_graph.repo.nodes)
+
+
+@pytest.mark.asyncio
+async def test_indexed_graph_load_from(tmp_path):
+    di_graph = await _di_graph(tmp_path)
+    await di_graph.save()
+
+    graph = await IndexedGraphRepository.load_from(di_graph.pathname)
+    assert _key(await graph.select()) == _key(await di_graph.select())
+    await graph.delete(predicate="is")
+    await graph.save()
+
+    new_di_graph = await DiGraphRepository.load_from(di_graph.pathname)
+    assert _key(await new_di_graph.select()) == _key(await graph.select())
+
+
+@pytest.mark.asyncio
+async def test_sqlite_graph_persistence(tmp_path):
+    graph = SQLiteGraphRepository(name="test", root=tmp_path)
+    await graph.insert_many([SPO(subject=s, predicate=p, object_=o) for s, p, o in TRIPLES])
+    await graph.save()
+    graph.close()
+
+    graph = SQLiteGraphRepository(name="test", root=tmp_path)
+    assert len(await graph.select()) == len(TRIPLES) - 1
+    graph.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-s"])
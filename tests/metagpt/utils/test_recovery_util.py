@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of saving the history of a DataInterpreter
+
+from types import SimpleNamespace
+
+import nbformat
+from nbformat.v4 import new_code_cell, new_output
+
+from metagpt.actions.di.execute_nb_code import ExecuteNbCode
+from metagpt.utils import recovery_util, save_code
+
+
+def test_save_history_with_spilled_outputs(tmp_path, mocker):
+    mocker.patch.object(recovery_util, "DATA_PATH", tmp_path)
+    mocker.patch.object(save_code, "DATA_PATH", tmp_path)
+    executor = ExecuteNbCode(headless=True, max_cells_in_memory=1)
+    for i in range(3):
+        cell = new_code_cell(source=f"print({i})")
+        cell.outputs = [new_output(output_type="stream", name="stdout", text=f"{i}\n" * 1000)]
+        executor.nb.cells.append(cell)
+        executor.spill_outputs()
+    role = SimpleNamespace(planner=SimpleNamespace(plan=SimpleNamespace(dict=lambda: {})), execute_code=executor)
+
+    save_path = recovery_util.save_history(role)
+
+    nb = nbformat.read(save_path / "code.ipynb", as_version=nbformat.NO_CONVERT)
+    assert [cell.outputs[0]["text"] for cell in nb.cells] == [f"{i}\n" * 1000 for i in range(3)]
@@ -6,6 +6,7 @@ from metagpt.utils.text import (
     reduce_message_length,
     split_paragraph,
 )
+from metagpt.utils.token_counter import count_output_tokens
 
 
 def _msgs():
@@ -20,7 +21,7 @@ def _paragraphs(n):
 
 
 @pytest.mark.parametrize(
-    "msgs, model, system_text, reserved, expected",
+    "msgs, model_name, system_text, reserved, expected",
     [
         (_msgs(), "gpt-3.5-turbo-0613", "System", 1500, 1),
         (_msgs(), "gpt-3.5-turbo-16k", "System", 3000, 6),
@@ -37,13 +38,13 @@ def test_reduce_message_length(msgs, model_name, system_text, reserved, expected
 
 
 @pytest.mark.parametrize(
-    "text, prompt_template, model, system_text, reserved, expected",
+    "text, prompt_template, model_name, system_text, reserved, expected",
     [
         (" ".join("Hello World." for _ in range(1000)), "Prompt: {}", "gpt-3.5-turbo-0613", "System", 1500, 2),
         (" ".join("Hello World." for _ in range(1000)), "Prompt: {}", "gpt-3.5-turbo-16k", "System", 3000, 1),
         (" ".join("Hello World." for _ in range(4000)), "Prompt: {}", "gpt-4", "System", 2000, 2),
         (" ".join("Hello World." for _ in range(8000)), "Prompt: {}", "gpt-4-32k", "System", 4000, 1),
-        (" ".join("Hello World" for _ in range(8000)), "Prompt: {}", "gpt-3.5-turbo-0613", "System", 1000, 8),
+        (" ".join("Hello World" for _ in range(8000)), "Prompt: {}", "gpt-3.5-turbo-0613", "System", 1000, 6),
     ],
 )
 def test_generate_prompt_chunk(text, prompt_template, model_name, system_text, reserved, expected):
@@ -51,6 +52,29 @@ def test_generate_prompt_chunk(text, prompt_template, model_name, system_text, r
     assert chunk == expected
 
 
+def test_generate_prompt_chunk_boundaries():
+    sections = [f"# Section {i}\n\n" + "Some words in a sentence. " * 150 + "\n" for i in range(20)]
+    text = "".join(sections) + "多字节的文字。" * 2000
+    chunks = list(generate_prompt_chunk(text, "{}", "gpt-3.5-turbo-0613", "System", 1000))
+
+    assert "".join(chunks) == text
+    assert all(count_output_tokens(i, "gpt-3.5-turbo-0613") <= 4096 - 1000 - 100 for i in chunks)
+    # cut before the headings, then at the end of the sentences
+    assert all(i.startswith("# Section") for i in chunks[1:] if "Section" in i)
+    assert all(i.endswith(("\n", " ", "。")) for i in chunks[:-1])
+
+
+def test_generate_prompt_chunk_overlap():
+    text = " ".join(f"word{i}" for i in range(6000))
+    chunks = list(generate_prompt_chunk(text, "{}", "gpt-3.5-turbo-0613", "System", 1000, overlap=100))
+    assert len(chunks) > 1
+    for prev, cur in zip(chunks, chunks[1:]):
+        head = cur.split(" ")[0]
+        assert f" {head} " in prev  # starts at a word of the end of the previous chunk
+        assert 50 <= count_output_tokens(prev[prev.index(f" {head} ") :], "gpt-3.5-turbo-0613") <= 110
+    assert chunks[-1].endswith("word5999")
+
+
 @pytest.mark.parametrize(
     "paragraph, sep, count, expected",
     [
@@ -7,7 +7,12 @@
 """
 import pytest
 
-from metagpt.utils.token_counter import count_input_tokens, count_output_tokens
+from metagpt.utils.token_counter import (
+    TokenCounter,
+    count_input_tokens,
+    count_input_tokens_batch,
+    count_output_tokens,
+)
 
 
 def test_count_message_tokens():
@@ -69,5 +74,38 @@ def test_count_string_tokens_gpt_4():
     assert count_output_tokens(string, model="gpt-4-0314") == 4
 
 
+def test_count_message_tokens_batch():
+    messages = [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi there!"},
+    ]
+    prompts = [messages, messages[:1], []]
+    assert count_input_tokens_batch(prompts) == [count_input_tokens(i) for i in prompts]
+
+
+def test_count_message_tokens_claude():
+    messages = [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi there!"},
+    ]
+    assert count_input_tokens(messages, model="claude-3-opus-20240229") > 0
+    assert count_output_tokens("Hello, world!", model="claude-3-opus-20240229") > 0
+
+
+def test_token_counter_cache(mocker):
+    counter = TokenCounter(cache_size=3)
+    encode_batch = mocker.spy(counter, "_encode_batch")
+
+    assert counter.count_texts(["Hello", "world", "Hello"], "gpt-4-0314") == [1, 1, 1]
+    assert encode_batch.call_args.args[0] == ["Hello", "world"]
+
+    messages = [{"role": "user", "content": "Hello"}]
+    counter.count_messages(messages, "gpt-4-0314")
+    messages.append({"role": "assistant", "content": "Hi there!"})
+    assert counter.count_messages(messages, "gpt-4-0314") == 15
+    assert encode_batch.call_args.args[0] == ["assistant", "Hi there!"]
+    assert len(counter._cache) == 3
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-s"])